@@ -0,0 +1,763 @@
+"""
+BDS Console - 本機控制 API
+
+以 HTTP 提供伺服器控制（啟動/關閉/重啟、命令、備份、更新），並以 WebSocket
+即時推送控制台輸出與事件。每個 WebSocket 連線有各自的有界佇列，
+慢速客戶端只會遺失自己最舊的事件，不會拖慢伺服器輸出讀取。
+
+端點（皆需權杖：Authorization: Bearer <token> 或 ?token=<token>）:
+
+    GET  /api/status                    伺服器狀態
+    POST /api/server/start              啟動伺服器
+    POST /api/server/stop               關閉伺服器
+    POST /api/server/restart            重新啟動伺服器
+    POST /api/command                   執行命令 {"command": "list", "timeout": 2}
+    GET  /api/backups                   備份列表
+    POST /api/backups                   立即備份 {"notify_seconds": 0}
+    POST /api/backups/restore           還原備份 {"type": "manual", "name": "world_backup_....zip"}
+    POST /api/update/check              檢查更新
+    POST /api/update/apply              執行更新 {"notify_minutes": 10, "force": false}
+    POST /api/update/cancel             取消通知階段中的更新
+    GET  /api/releases                  已安裝的版本資料夾與版本庫中已快取的版本
+    POST /api/releases/install          安裝指定版本（重裝或回滾） {"version": "1.21.100.7"}
+    POST /api/releases/rollback         回滾到上一個使用的版本
+    GET  /api/events                    WebSocket 事件串流
+
+"""
+
+import base64
+import hashlib
+import hmac
+import http.server
+import itertools
+import json
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+
+# ============================================================================
+# 全域常數定義
+# ============================================================================
+
+API_CLIENT_QUEUE_SIZE = 1000            # 每個 WebSocket 客戶端的事件佇列上限（超過時丟棄最舊事件）
+API_COMMAND_TIMEOUT = 2.0               # 命令回應收集預設時間上限（秒）
+API_COMMAND_MAX_TIMEOUT = 10.0          # 命令回應收集時間上限的最大值（秒）
+API_COMMAND_IDLE = 0.3                  # 收到回應後靜默超過此秒數即視為回應結束
+API_MAX_BODY_SIZE = 64 * 1024           # 請求內容 / WebSocket 訊息大小上限（位元組）
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# WebSocket 訊框類型
+WS_OP_CONTINUATION = 0x0
+WS_OP_TEXT = 0x1
+WS_OP_CLOSE = 0x8
+WS_OP_PING = 0x9
+WS_OP_PONG = 0xA
+
+
+class APIError(Exception):
+    """API 請求錯誤（附帶 HTTP 狀態碼）"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ============================================================================
+# 事件分發
+# ============================================================================
+
+class EventClient:
+    """
+    單一事件訂閱者的有界佇列
+    
+    功能:
+        - 佇列已滿時丟棄最舊事件並累計遺失數量
+        - 寫入端永不阻塞，讀取端可逾時等待
+    """
+    
+    def __init__(self, max_size=API_CLIENT_QUEUE_SIZE):
+        """
+        初始化訂閱者
+        
+        Args:
+            max_size: 佇列上限
+        """
+        self._events = deque()
+        self._max_size = max_size
+        self._condition = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+    
+    def put(self, event):
+        """加入事件（佇列已滿時丟棄最舊事件）"""
+        with self._condition:
+            if self.closed:
+                return
+            if len(self._events) >= self._max_size:
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(event)
+            self._condition.notify()
+    
+    def get(self, timeout=None):
+        """
+        取出事件
+        
+        Args:
+            timeout: 最長等待秒數
+        
+        Returns:
+            tuple: (事件, 取出前累計遺失的事件數)，逾時或已關閉時事件為 None
+        """
+        with self._condition:
+            if not self._events and not self.closed:
+                self._condition.wait(timeout)
+            if not self._events:
+                return None, 0
+            dropped = self.dropped
+            self.dropped = 0
+            return self._events.popleft(), dropped
+    
+    def close(self):
+        """關閉佇列並喚醒等待中的讀取端"""
+        with self._condition:
+            self.closed = True
+            self._events.clear()
+            self._condition.notify_all()
+
+
+class EventHub:
+    """
+    事件分發器
+    
+    功能:
+        - 每個事件只序列化一次，再放入各訂閱者佇列
+        - 發布只持有短暫鎖，不做任何網路 I/O
+    """
+    
+    def __init__(self):
+        self._clients = []
+        self._lock = threading.Lock()
+    
+    @property
+    def client_count(self):
+        """目前訂閱者數量"""
+        with self._lock:
+            return len(self._clients)
+    
+    def subscribe(self, max_size=API_CLIENT_QUEUE_SIZE):
+        """新增訂閱者"""
+        client = EventClient(max_size)
+        with self._lock:
+            self._clients.append(client)
+        return client
+    
+    def unsubscribe(self, client):
+        """移除訂閱者"""
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+        client.close()
+    
+    def publish(self, event_type, **data):
+        """
+        發布事件
+        
+        Args:
+            event_type: 事件類型（console/log/status/player/backup/update/crash/command）
+            **data: 事件內容
+        """
+        with self._lock:
+            clients = list(self._clients)
+        if not clients:
+            return
+        event = {"type": event_type, "time": datetime.now().isoformat(timespec="seconds"), **data}
+        text = json.dumps(event, ensure_ascii=False)
+        for client in clients:
+            client.put((event, text))
+    
+    def close_all(self):
+        """關閉所有訂閱者"""
+        with self._lock:
+            clients = self._clients
+            self._clients = []
+        for client in clients:
+            client.close()
+
+
+# ============================================================================
+# WebSocket 訊框處理
+# ============================================================================
+
+def encode_websocket_frame(opcode, payload):
+    """
+    編碼伺服器端 WebSocket 訊框（不加遮罩）
+    
+    Args:
+        opcode: 訊框類型
+        payload: 內容（bytes）
+    
+    Returns:
+        bytes: 完整訊框
+    """
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header.append(length)
+    elif length < 65536:
+        header.append(126)
+        header += struct.pack("!H", length)
+    else:
+        header.append(127)
+        header += struct.pack("!Q", length)
+    return bytes(header) + payload
+
+
+def read_websocket_message(rfile):
+    """
+    讀取一則客戶端 WebSocket 訊息（合併分段訊框）
+    
+    Args:
+        rfile: 連線讀取串流
+    
+    Returns:
+        tuple: (訊框類型, 內容 bytes)
+    
+    Raises:
+        ConnectionError: 連線中斷或訊息過大
+    """
+    message_opcode = None
+    chunks = []
+    total = 0
+    while True:
+        header = _read_exact(rfile, 2)
+        fin = header[0] & 0x80
+        opcode = header[0] & 0x0F
+        masked = header[1] & 0x80
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", _read_exact(rfile, 2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", _read_exact(rfile, 8))[0]
+        total += length
+        if total > API_MAX_BODY_SIZE:
+            raise ConnectionError("WebSocket 訊息過大")
+        mask = _read_exact(rfile, 4) if masked else None
+        payload = _read_exact(rfile, length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        
+        # 控制訊框可穿插在分段訊息之間，直接返回
+        if opcode >= WS_OP_CLOSE:
+            return opcode, payload
+        
+        if opcode != WS_OP_CONTINUATION:
+            message_opcode = opcode
+        chunks.append(payload)
+        if fin:
+            return message_opcode, b"".join(chunks)
+
+
+def _read_exact(rfile, size):
+    """讀取指定長度（連線中斷時拋出 ConnectionError）"""
+    data = rfile.read(size) if size else b""
+    if len(data) < size:
+        raise ConnectionError("WebSocket 連線已中斷")
+    return data
+
+
+# ============================================================================
+# 控制 API 伺服器
+# ============================================================================
+
+class ControlAPIServer:
+    """
+    本機控制 API（HTTP + WebSocket）
+    
+    功能:
+        - HTTP 端點對應伺服器控制、備份、更新操作（直接呼叫 BDSCore 方法）
+        - 命令執行並收集伺服器回應（以收到後的靜默時間判定結束）
+        - WebSocket 即時推送控制台輸出與事件，每個連線獨立的有界佇列與寫入執行緒
+    
+    用途:
+        讓腳本與網頁儀表板遠端管理伺服器
+    """
+    
+    def __init__(self, core):
+        """
+        初始化控制 API
+        
+        Args:
+            core: BDSCore 物件
+        """
+        self.core = core
+        self.hub = EventHub()
+        self._server = None
+        self._thread = None
+        self._token = ""
+        self._command_lock = threading.Lock()           # 命令逐一執行，避免回應互相混雜
+        self._command_ids = itertools.count(1)
+    
+    @property
+    def running(self):
+        """API 是否運行中"""
+        return self._server is not None
+    
+    def start(self, bind, port, token):
+        """
+        啟動 API
+        
+        Args:
+            bind: 綁定位址
+            port: 連接埠
+            token: 存取權杖
+        """
+        if self._server is not None:
+            return
+        self._token = token
+        api = self
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+        
+            def do_GET(self):
+                api._handle_request(self, "GET")
+        
+            def do_POST(self):
+                api._handle_request(self, "POST")
+        
+            def log_message(self, format, *args):
+                # 不輸出每次請求的存取記錄
+                pass
+        
+        self._server = http.server.ThreadingHTTPServer((bind, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ControlAPI", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止 API 並中斷所有 WebSocket 連線"""
+        if self._server is None:
+            return
+        self.hub.close_all()
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+    
+    def publish(self, event_type, **data):
+        """發布事件到所有 WebSocket 連線（無連線時不做任何事）"""
+        self.hub.publish(event_type, **data)
+    
+    # ========================================================================
+    # 請求處理
+    # ========================================================================
+    
+    def _handle_request(self, handler, method):
+        """
+        分派 HTTP 請求
+        
+        Args:
+            handler: BaseHTTPRequestHandler 物件
+            method: HTTP 方法
+        """
+        url = urlsplit(handler.path)
+        path = url.path.rstrip("/") or "/"
+        query = parse_qs(url.query)
+        
+        try:
+            if not self._authorized(handler, query):
+                raise APIError(401, "權杖無效")
+        
+            if method == "GET" and path == "/api/events":
+                self._serve_websocket(handler)
+                return
+        
+            body = self._read_body(handler) if method == "POST" else {}
+            route = self._routes().get((method, path))
+            if route is None:
+                raise APIError(404, "找不到端點")
+            status, payload = route(body)
+        except APIError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            self.core.log_message(f"控制 API 處理請求失敗: {str(e)}")
+            status, payload = 500, {"error": str(e)}
+        
+        self._send_json(handler, status, payload)
+    
+    def _routes(self):
+        """端點對應表"""
+        return {
+            ("GET", "/api/status"): self._api_status,
+            ("POST", "/api/server/start"): self._api_start,
+            ("POST", "/api/server/stop"): self._api_stop,
+            ("POST", "/api/server/restart"): self._api_restart,
+            ("POST", "/api/command"): self._api_command,
+            ("GET", "/api/backups"): self._api_list_backups,
+            ("POST", "/api/backups"): self._api_backup,
+            ("POST", "/api/backups/restore"): self._api_restore,
+            ("POST", "/api/update/check"): self._api_check_update,
+            ("POST", "/api/update/apply"): self._api_apply_update,
+            ("POST", "/api/update/cancel"): self._api_cancel_update,
+            ("GET", "/api/releases"): self._api_list_releases,
+            ("POST", "/api/releases/install"): self._api_install_release,
+            ("POST", "/api/releases/rollback"): self._api_rollback_release,
+        }
+    
+    def _authorized(self, handler, query):
+        """驗證權杖（標頭或查詢參數，瀏覽器 WebSocket 無法自訂標頭）"""
+        if not self._token:
+            return False
+        supplied = ""
+        auth = handler.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            supplied = auth[len("Bearer "):].strip()
+        elif "token" in query:
+            supplied = query["token"][0]
+        return hmac.compare_digest(supplied.encode("utf-8"), self._token.encode("utf-8"))
+    
+    def _read_body(self, handler):
+        """讀取 JSON 請求內容"""
+        try:
+            length = int(handler.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise APIError(400, "Content-Length 不是有效的數字")
+        if length < 0:
+            raise APIError(400, "Content-Length 不是有效的數字")
+        if length > API_MAX_BODY_SIZE:
+            raise APIError(413, "請求內容過大")
+        if length == 0:
+            return {}
+        try:
+            body = json.loads(handler.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            raise APIError(400, "請求內容不是有效的 JSON")
+        if not isinstance(body, dict):
+            raise APIError(400, "請求內容必須是 JSON 物件")
+        return body
+    
+    def _send_json(self, handler, status, payload):
+        """回應 JSON"""
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        try:
+            handler.send_response(status)
+            handler.send_header("Content-Type", "application/json; charset=utf-8")
+            handler.send_header("Content-Length", str(len(data)))
+            handler.end_headers()
+            handler.wfile.write(data)
+        except OSError:
+            handler.close_connection = True
+    
+    # ========================================================================
+    # 伺服器控制端點
+    # ========================================================================
+    
+    def _api_status(self, body):
+        """伺服器狀態"""
+        return 200, self.core.status_snapshot()
+    
+    def _require_idle_server(self):
+        """確認沒有進行中的伺服器操作或更新"""
+        if self.core.server_operation_in_progress:
+            raise APIError(409, "伺服器操作進行中")
+        if self.core.update_in_progress:
+            raise APIError(409, "伺服器更新中")
+    
+    def _require_running_server(self):
+        """確認伺服器運行中"""
+        if self.core.server_process is None:
+            raise APIError(409, "伺服器未運行")
+    
+    def _api_start(self, body):
+        """啟動伺服器（於主執行緒執行，與介面按鈕相同）"""
+        if self.core.server_process is not None:
+            raise APIError(409, "伺服器已在運行")
+        self._require_idle_server()
+        self.core.call_later(0, self.core.start_server)
+        return 202, {"accepted": True}
+    
+    def _api_stop(self, body):
+        """關閉伺服器"""
+        self._require_running_server()
+        self._require_idle_server()
+        threading.Thread(target=self.core._do_stop_server, daemon=True).start()
+        return 202, {"accepted": True}
+    
+    def _api_restart(self, body):
+        """重新啟動伺服器"""
+        self._require_running_server()
+        self._require_idle_server()
+        self.core.is_restarting = True
+        threading.Thread(target=self.core._do_restart_server, daemon=True).start()
+        return 202, {"accepted": True}
+    
+    def _api_command(self, body):
+        """執行命令並回傳伺服器回應"""
+        command = str(body.get("command", "")).strip()
+        if not command:
+            raise APIError(400, "缺少 command")
+        try:
+            timeout = float(body.get("timeout", API_COMMAND_TIMEOUT))
+        except (TypeError, ValueError):
+            raise APIError(400, "timeout 必須是數字")
+        self._require_running_server()
+        return 200, self.execute_command(command, timeout)
+    
+    def execute_command(self, command, timeout=API_COMMAND_TIMEOUT):
+        """
+        執行命令並收集伺服器回應（盡力而為）
+        
+        BDS 不會回顯命令，輸出也沒有可辨識屬於哪個命令的標記，因此 output 只是送出後
+        這段時間內的所有控制台輸出，可能混入同時發生的其他輸出（例如玩家連線、介面送出的命令）；
+        沒有輸出的命令等到 timeout 才返回空列表。id 只是請求編號，用於對應 command 事件
+        
+        功能:
+            - 命令逐一執行，送出後訂閱控制台輸出
+            - 收到第一行回應後靜默超過 API_COMMAND_IDLE 秒即結束，最長等待 timeout 秒
+            - 結果同時以 command 事件推送
+        
+        Args:
+            command: 伺服器命令
+            timeout: 最長等待秒數
+        
+        Returns:
+            dict: {"id", "command", "sent", "output"}
+        """
+        timeout = min(max(timeout, 0.0), API_COMMAND_MAX_TIMEOUT)
+        with self._command_lock:
+            command_id = next(self._command_ids)
+            client = self.hub.subscribe()
+            output = []
+            try:
+                sent = self.core.send_server_command(command)
+                deadline = time.monotonic() + timeout
+                while sent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    event, _ = client.get(min(remaining, API_COMMAND_IDLE) if output else remaining)
+                    if event is None:
+                        if output:
+                            break
+                        continue
+                    if event[0]["type"] == "console":
+                        output.append(event[0]["line"])
+            finally:
+                self.hub.unsubscribe(client)
+        
+        result = {"id": command_id, "command": command, "sent": sent, "output": output}
+        self.publish("command", **result)
+        return result
+    
+    # ========================================================================
+    # 備份端點
+    # ========================================================================
+    
+    def _api_list_backups(self, body):
+        """備份列表"""
+        return 200, {"backups": self.core.list_backups()}
+    
+    def _api_backup(self, body):
+        """立即備份（可選遊戲內倒數通知）"""
+        try:
+            notify_seconds = int(body.get("notify_seconds", 0))
+        except (TypeError, ValueError):
+            raise APIError(400, "notify_seconds 必須是整數")
+        if self.core.server_status == "備份":
+            raise APIError(409, "備份進行中")
+        if self.core.update_in_progress:
+            raise APIError(409, "伺服器更新中")
+        
+        self.core.call_later(0, self.core._disable_operation_buttons)
+        if notify_seconds > 0:
+            target = lambda: self.core.perform_backup_with_notification(notify_seconds, False)
+        else:
+            target = self.core._perform_backup
+        threading.Thread(target=target, daemon=True).start()
+        return 202, {"accepted": True}
+    
+    def _api_restore(self, body):
+        """還原備份（伺服器運行中時會先關閉，完成後重新啟動）"""
+        backup_file = self.core.find_backup(body.get("type", "manual"), str(body.get("name", "")))
+        if backup_file is None:
+            raise APIError(404, "找不到備份檔案")
+        self._require_idle_server()
+        if self.core.server_status == "備份":
+            raise APIError(409, "備份進行中")
+        threading.Thread(target=self.core.restore_backup, args=(backup_file,), daemon=True).start()
+        return 202, {"accepted": True}
+    
+    # ========================================================================
+    # 更新端點
+    # ========================================================================
+    
+    def _check_update(self):
+        """同步檢查更新，失敗時回應 502"""
+        if not self.core._check_update(is_auto=False, silent=True):
+            raise APIError(502, "檢查更新失敗")
+        return {
+            "current_version": self.core.server_version,
+            "latest_version": self.core.latest_version,
+            "has_new_version": self.core.has_new_version,
+        }
+    
+    def _api_check_update(self, body):
+        """檢查更新"""
+        return 200, self._check_update()
+    
+    def _api_apply_update(self, body):
+        """執行更新（force 為 true 時即使已是最新版本也重新安裝）"""
+        try:
+            notify_minutes = int(body.get("notify_minutes", self.core.config["update_notify_minutes"]))
+        except (TypeError, ValueError):
+            raise APIError(400, "notify_minutes 必須是整數")
+        if self.core.update_in_progress or self.core.update_notification_active:
+            raise APIError(409, "更新已在進行中")
+        
+        result = self._check_update()
+        if not result["has_new_version"] and not body.get("force", False):
+            raise APIError(409, "已是最新版本")
+        
+        self.core.update_cancel_requested = False
+        self.core.update_in_progress = False
+        self.core.call_later(0, self.core._disable_operation_buttons)
+        if notify_minutes > 0:
+            threading.Thread(target=lambda: self.core.perform_update_with_notification(notify_minutes, False),
+                             daemon=True).start()
+        else:
+            self.core.update_in_progress = True
+            self.core.call_later(0, self.core._lock_update_button)
+            threading.Thread(target=self.core._perform_update, daemon=True).start()
+        return 202, {"accepted": True, **result}
+    
+    def _api_cancel_update(self, body):
+        """取消通知階段中的更新"""
+        if not self.core.update_notification_active or not self.core._cancel_pending_update():
+            raise APIError(409, "沒有可取消的更新")
+        return 200, {"cancelled": True}
+    
+    def _api_list_releases(self, body):
+        """已安裝的版本資料夾與版本庫列表"""
+        return 200, {
+            "installed": self.core.versions.versions(),
+            "rollback_version": self.core.versions.previous(),
+            "releases": self.core.shared.download_cache.versions(),
+        }
+    
+    def _api_install_release(self, body):
+        """安裝已安裝過或版本庫中的版本（立即執行，不經過通知倒數）"""
+        version = str(body.get("version", ""))
+        if (not self.core.versions.has(version)
+                and version not in [release["version"] for release in self.core.shared.download_cache.versions()]):
+            raise APIError(404, "沒有此版本的版本資料夾或安裝檔")
+        if self.core.update_in_progress or self.core.update_notification_active:
+            raise APIError(409, "更新已在進行中")
+        threading.Thread(target=self.core.install_release, args=(version,), daemon=True).start()
+        return 202, {"accepted": True, "version": version}
+    
+    def _api_rollback_release(self, body):
+        """回滾到上一個使用的版本（立即執行，不經過通知倒數）"""
+        version = self.core.versions.previous()
+        if version is None:
+            raise APIError(404, "沒有可回滾的版本")
+        if self.core.update_in_progress or self.core.update_notification_active:
+            raise APIError(409, "更新已在進行中")
+        threading.Thread(target=self.core.install_release, args=(version,), daemon=True).start()
+        return 202, {"accepted": True, "version": version}
+    
+    # ========================================================================
+    # WebSocket 事件串流
+    # ========================================================================
+    
+    def _serve_websocket(self, handler):
+        """
+        升級為 WebSocket 並推送事件（在請求執行緒中執行，直到連線結束）
+        
+        功能:
+            - 連線後先推送 hello 事件（目前狀態）
+            - 寫入執行緒從該連線的佇列取出事件送出；佇列溢出時先送出 dropped 事件
+            - 請求執行緒讀取客戶端訊息：ping/close 與 {"type": "command", "command": ...}
+        """
+        key = handler.headers.get("Sec-WebSocket-Key", "")
+        if handler.headers.get("Upgrade", "").lower() != "websocket" or not key:
+            raise APIError(400, "需要 WebSocket 連線")
+        
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        handler.send_response(101, "Switching Protocols")
+        handler.send_header("Upgrade", "websocket")
+        handler.send_header("Connection", "Upgrade")
+        handler.send_header("Sec-WebSocket-Accept", accept)
+        handler.end_headers()
+        handler.wfile.flush()
+        handler.close_connection = True
+        
+        client = self.hub.subscribe()
+        send_lock = threading.Lock()
+        
+        def send(opcode, payload):
+            with send_lock:
+                handler.wfile.write(encode_websocket_frame(opcode, payload))
+                handler.wfile.flush()
+        
+        def writer():
+            try:
+                while True:
+                    event, dropped = client.get(timeout=1.0)
+                    if client.closed:
+                        break
+                    if dropped:
+                        notice = {"type": "dropped", "count": dropped}
+                        send(WS_OP_TEXT, json.dumps(notice).encode("utf-8"))
+                    if event is not None:
+                        send(WS_OP_TEXT, event[1].encode("utf-8"))
+            except OSError:
+                pass
+            finally:
+                self.hub.unsubscribe(client)
+        
+        hello = {"type": "hello", "status": self.core.status_snapshot()}
+        client.put((hello, json.dumps(hello, ensure_ascii=False)))
+        threading.Thread(target=writer, name="ControlAPIWriter", daemon=True).start()
+        
+        try:
+            while not client.closed:
+                opcode, payload = read_websocket_message(handler.rfile)
+                if opcode == WS_OP_CLOSE:
+                    send(WS_OP_CLOSE, payload[:2])
+                    break
+                if opcode == WS_OP_PING:
+                    send(WS_OP_PONG, payload)
+                elif opcode == WS_OP_TEXT:
+                    self._handle_websocket_message(client, payload)
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            self.hub.unsubscribe(client)
+    
+    def _handle_websocket_message(self, client, payload):
+        """處理客戶端訊息（命令於背景執行，結果以 command 事件推送）"""
+        try:
+            message = json.loads(payload.decode("utf-8"))
+        except ValueError:
+            message = None
+        if not isinstance(message, dict) or message.get("type") != "command" or not message.get("command"):
+            error = {"type": "error", "error": "不支援的訊息"}
+            client.put((error, json.dumps(error, ensure_ascii=False)))
+            return
+        if self.core.server_process is None:
+            error = {"type": "error", "error": "伺服器未運行"}
+            client.put((error, json.dumps(error, ensure_ascii=False)))
+            return
+        
+        command = str(message["command"]).strip()
+        try:
+            timeout = float(message.get("timeout", API_COMMAND_TIMEOUT))
+        except (TypeError, ValueError):
+            timeout = API_COMMAND_TIMEOUT
+        threading.Thread(target=self.execute_command, args=(command, timeout), daemon=True).start()
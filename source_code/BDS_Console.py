@@ -5,29 +5,19 @@ BDS Console - Minecraft Bedrock Dedicated Server 管理工具
 
 import customtkinter as ctk
 from tkinter import scrolledtext
-import subprocess
+from tkinter import filedialog
 import threading
-import json
-import os
-import shutil
-import zipfile
-import requests
 from datetime import datetime, timedelta
 from pathlib import Path
 import time
-import schedule
 import sys
-
-# ============================================================================
-# 全域常數定義
-# ============================================================================
-
-# Windows 平台常數：用於隱藏子進程視窗
-if sys.platform == 'win32':
-    import ctypes
-    CREATE_NO_WINDOW = 0x08000000
-else:
-    CREATE_NO_WINDOW = 0
+from BDS_Core import (
+    BDSCore,
+    InstanceManager,
+    default_base_dir,
+    RESOURCE_SPARKLINE_WIDTH,
+    render_sparkline,
+)
 
 
 # ============================================================================
@@ -198,20 +188,18 @@ class CustomDialog(ctk.CTkToplevel):
 # 主程式類別
 # ============================================================================
 
-class BDSConsole(ctk.CTk):
+class BDSConsole(BDSCore, ctk.CTk):
     """
-    BDS Console 主程式類別
+    BDS Console 主程式類別（圖形介面）
     
     功能:
-        - 伺服器生命週期管理（啟動、關閉、重啟）
         - 即時控制台輸出監控
         - 玩家連線管理與權限控制
-        - 世界備份系統（手動/自動）
-        - 伺服器版本更新系統
-        - 排程任務執行
+        - 備份、更新、定時重啟等設定介面
         - 圖形化使用者介面
     
     用途:
+        以 BDSCore 為管理核心，覆寫其介面回呼以更新畫面，
         提供完整的 Minecraft Bedrock Server 管理解決方案
     """
     
@@ -221,12 +209,11 @@ class BDSConsole(ctk.CTk):
         
         功能:
             - 設定視窗基本屬性
-            - 初始化路徑配置
-            - 載入使用者設定
+            - 初始化管理核心（路徑、狀態、設定）
             - 建立 UI 介面
             - 啟動排程系統
         """
-        super().__init__()
+        ctk.CTk.__init__(self)
         
         # ====================================================================
         # 視窗基礎設定
@@ -235,72 +222,25 @@ class BDSConsole(ctk.CTk):
         self.geometry("1200x700")
         
         # ====================================================================
-        # 路徑配置（支援打包環境）
+        # 其他伺服器實例（data/instances.json），與本視窗的主實例共用排程器、下載快取與工作執行緒池
         # ====================================================================
-        # 處理 PyInstaller 打包後的路徑差異
-        # - 打包成 exe: 使用 sys.executable 的父目錄
-        # - 開發環境: 使用 __file__ 的父目錄
-        if getattr(sys, 'frozen', False):
-            # 打包後的執行環境
-            self.base_dir = Path(sys.executable).parent
-        else:
-            # 開發環境
-            self.base_dir = Path(__file__).parent
-            
-        # 應用程式目錄結構
-        self.app_dir = self.base_dir / "data"              # 應用資料目錄
-        self.server_dir = self.base_dir / "server_files"   # 伺服器檔案目錄
-        self.backup_dir = self.base_dir / "backup"         # 備份目錄
-        self.temp_dir = self.app_dir / "temp"              # 暫存目錄
+        self.instance_manager = InstanceManager(default_base_dir(), log_sink=self._on_instance_log)
+        self.instance_widgets = {}                      # 實例頁面元件 (name -> {status_label, detail_label, toggle_btn})
+        
+        # ====================================================================
+        # 管理核心（路徑配置、伺服器/更新/備份狀態、設定檔、指標）
+        # ====================================================================
+        BDSCore.__init__(self, shared=self.instance_manager.shared)
         
         # 設定視窗圖示
         self._set_window_icon()
         
-        # 建立必要資料夾結構
-        self.create_directories()
-        
-        # ====================================================================
-        # 伺服器狀態變數
-        # ====================================================================
-        self.server_process = None          # 伺服器進程物件
-        self.server_status = "關閉"         # 伺服器狀態
-        self.online_players = 0             # 在線玩家數
-        self.max_players = 10               # 最大玩家數
-        self.server_version = "未知"        # 伺服器版本
-
         # ====================================================================
-        # 玩家管理變數
+        # 玩家管理介面變數
         # ====================================================================
-        self.player_list_file = self.app_dir / "player_list.json"
-        self.player_list = self.load_player_list()     # 玩家列表資料
-        self.online_players_names = []                  # 在線玩家名稱列表
         self.player_ui_vars = {}                        # 玩家 UI 控制變數 (xuid -> {allowlist_var, perm_var})
         self.update_pending = False                     # 防止重複更新標誌
         
-        # ====================================================================
-        # 更新系統狀態變數
-        # ====================================================================
-        self.update_notification_active = False         # 更新通知進行中
-        self.update_remaining_seconds = 0               # 更新倒數剩餘秒數
-        self.update_next_broadcast_seconds = 0          # 下次廣播剩餘秒數
-        self.update_cancel_requested = False            # 取消更新請求標誌
-        self.update_in_progress = False                 # 更新執行中標誌
-        self.update_download_thread = None              # 下載執行緒參考
-        
-        # ====================================================================
-        # 伺服器操作狀態變數
-        # ====================================================================
-        self.server_operation_in_progress = False       # 伺服器操作進行中（啟動/關閉/重啟）
-        self.is_restarting = False                      # 重啟程序進行中
-        
-        # ====================================================================
-        # 備份系統變數
-        # ====================================================================
-        self.last_manual_backup_time = None             # 上次手動備份時間
-        self.last_auto_backup_time = None               # 上次自動備份時間
-        self.backup_time_file = self.app_dir / "backup_time.json"
-        self.load_backup_times()
-        
         # ====================================================================
         # 設定變更追蹤變數
         # ====================================================================
@@ -309,12 +249,6 @@ class BDSConsole(ctk.CTk):
         self.saved_backup_settings = {}                 # 已儲存的備份設定
         self.saved_update_settings = {}                 # 已儲存的更新設定
         
-        # ====================================================================
-        # 載入設定檔
-        # ====================================================================
-        self.config_file = self.app_dir / "config.json"
-        self.load_config()
-        
         # ====================================================================
         # 主題設定
         # ====================================================================
@@ -331,24 +265,22 @@ class BDSConsole(ctk.CTk):
         self._update_command_entry_state()
         
         # ====================================================================
-        # 啟動排程系統
+        # 啟動排程系統與指標匯出端點
         # ====================================================================
-        self.setup_schedules()
-        
-        # 啟動排程檢查執行緒
-        self.schedule_thread = threading.Thread(target=self.run_schedule, daemon=True)
-        self.schedule_thread.start()
+        self.start_services()
         
         # ====================================================================
         # 啟動初始化任務
         # ====================================================================
         self.after(1000, self.start_server)                     # 自動啟動伺服器
+        self.after(1500, self.instance_manager.start_all)       # 啟動其他實例
         self.after(2000, self.auto_check_update_on_startup)     # 檢查更新
         
         # ====================================================================
         # 視窗關閉事件處理
         # ====================================================================
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+
     
     # ========================================================================
     # 系統初始化方法
@@ -382,703 +314,6 @@ class BDSConsole(ctk.CTk):
         except Exception as e:
             # 圖示載入失敗不影響程式執行
             print(f"設定圖示時發生錯誤: {e}")
-        
-    def create_directories(self):
-        """
-        建立必要的資料夾結構
-        
-        功能:
-            建立程式運行所需的所有目錄
-        
-        用途:
-            確保應用程式、伺服器、備份等目錄存在
-        """
-        dirs = [
-            self.app_dir,                           # 應用資料目錄
-            self.server_dir,                        # 伺服器檔案目錄
-            self.backup_dir,                        # 備份根目錄
-            self.temp_dir,                          # 暫存目錄
-            self.backup_dir / "server_settings",    # 伺服器設定備份目錄
-            self.backup_dir / "worlds_manual",      # 手動世界備份目錄
-            self.backup_dir / "worlds_auto"         # 自動世界備份目錄
-        ]
-        for d in dirs:
-            d.mkdir(parents=True, exist_ok=True)
-    
-    def load_config(self):
-        """
-        載入應用程式設定
-        
-        功能:
-            - 從 config.json 載入使用者設定
-            - 若檔案不存在則使用預設值
-            - 支援備份、更新、主題等各項設定
-        
-        用途:
-            初始化應用程式配置參數
-        """
-        default_config = {
-            # 備份設定
-            "auto_backup_enabled": False,           # 自動備份開關（預設關閉）
-            "backup_frequency_type": "hours",       # 備份頻率類型
-            "backup_frequency_value": 6,            # 備份頻率值
-            "backup_time_hour": 3,                  # 備份時間（小時）
-            "backup_time_minute": 0,                # 備份時間（分鐘）
-            "backup_weekday": 0,                    # 備份星期
-            "backup_day": 1,                        # 備份日期
-            "backup_notify_seconds": 5,             # 備份通知秒數
-            "backup_max_size_gb": 10,               # 備份最大容量（GB）
-            
-            # 更新設定
-            "auto_update_enabled": False,           # 自動更新開關（預設關閉）
-            "update_frequency_type": "daily",       # 更新頻率類型
-            "update_frequency_value": 1,            # 更新頻率值
-            "update_time_hour": 4,                  # 更新時間（小時）
-            "update_time_minute": 0,                # 更新時間（分鐘）
-            "update_weekday": 0,                    # 更新星期
-            "update_day": 1,                        # 更新日期
-            "update_notify_minutes": 10,            # 更新通知分鐘數
-            
-            # 介面設定
-            "theme": "system"                       # 主題（system|dark|light）
-        }
-        
-        if self.config_file.exists():
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                loaded_config = json.load(f)
-                self.config = {**default_config, **loaded_config}
-                # 確保備份容量不小於0.5
-                if self.config["backup_max_size_gb"] < 0.5:
-                    self.config["backup_max_size_gb"] = 0.5
-        else:
-            self.config = default_config
-            self.save_config()
-    
-    def save_config(self):
-        """
-        儲存應用程式設定
-        
-        功能:
-            將當前設定寫入 config.json 檔案
-        
-        用途:
-            持久化使用者設定
-        """
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=4, ensure_ascii=False)
-    
-    def load_backup_times(self):
-        """
-        載入備份時間記錄
-        
-        功能:
-            - 從 backup_time.json 讀取上次備份時間
-            - 掃描備份資料夾獲取最新備份時間
-            - 同步更新記錄
-        
-        用途:
-            追蹤手動/自動備份的執行時間
-        """
-        from datetime import datetime
-        
-        # 從檔案載入記錄
-        if self.backup_time_file.exists():
-            try:
-                with open(self.backup_time_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if data.get("last_manual_backup"):
-                        self.last_manual_backup_time = datetime.fromisoformat(data["last_manual_backup"])
-                    if data.get("last_auto_backup"):
-                        self.last_auto_backup_time = datetime.fromisoformat(data["last_auto_backup"])
-            except Exception as e:
-                print(f"載入備份時間記錄失敗: {str(e)}")
-        
-        # 從備份資料夾掃描最新的備份檔案並更新時間
-        self.scan_latest_backups()
-    
-    def scan_latest_backups(self):
-        """
-        掃描備份資料夾並更新最新備份時間
-        
-        功能:
-            - 掃描手動/自動備份資料夾
-            - 從檔名解析備份時間戳
-            - 更新最新備份時間記錄
-        
-        用途:
-            同步檔案系統與記錄資料
-        """
-        from datetime import datetime
-        import re
-        
-        try:
-            # 掃描手動備份資料夾
-            manual_backup_dir = self.backup_dir / "worlds_manual"
-            if manual_backup_dir.exists():
-                manual_backups = list(manual_backup_dir.glob("world_backup_*.zip"))
-                if manual_backups:
-                    # 從檔名提取時間戳並排序
-                    manual_times = []
-                    for backup_file in manual_backups:
-                        # 檔名格式: world_backup_YYYYMMDD_HHMMSS.zip
-                        match = re.search(r'world_backup_(\d{8}_\d{6})\.zip', backup_file.name)
-                        if match:
-                            timestamp_str = match.group(1)
-                            try:
-                                backup_time = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-                                manual_times.append(backup_time)
-                            except ValueError:
-                                continue
-                    
-                    if manual_times:
-                        latest_manual = max(manual_times)
-                        # 如果從檔案掃描到的時間比記錄的時間新，則更新
-                        if not self.last_manual_backup_time or latest_manual > self.last_manual_backup_time:
-                            self.last_manual_backup_time = latest_manual
-                            self.log_message(f"從檔案掃描到最新手動備份時間: {latest_manual.strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            # 掃描自動備份資料夾
-            auto_backup_dir = self.backup_dir / "worlds_auto"
-            if auto_backup_dir.exists():
-                auto_backups = list(auto_backup_dir.glob("world_backup_*.zip"))
-                if auto_backups:
-                    # 從檔名提取時間戳並排序
-                    auto_times = []
-                    for backup_file in auto_backups:
-                        # 檔名格式: world_backup_YYYYMMDD_HHMMSS.zip
-                        match = re.search(r'world_backup_(\d{8}_\d{6})\.zip', backup_file.name)
-                        if match:
-                            timestamp_str = match.group(1)
-                            try:
-                                backup_time = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-                                auto_times.append(backup_time)
-                            except ValueError:
-                                continue
-                    
-                    if auto_times:
-                        latest_auto = max(auto_times)
-                        # 如果從檔案掃描到的時間比記錄的時間新，則更新
-                        if not self.last_auto_backup_time or latest_auto > self.last_auto_backup_time:
-                            self.last_auto_backup_time = latest_auto
-                            self.log_message(f"從檔案掃描到最新自動備份時間: {latest_auto.strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            # 如果有更新，保存到檔案
-            if self.last_manual_backup_time or self.last_auto_backup_time:
-                self.save_backup_times()
-                
-        except Exception as e:
-            self.log_message(f"掃描備份檔案時發生錯誤: {str(e)}")
-    
-    def save_backup_times(self):
-        """
-        儲存備份時間記錄
-        
-        功能:
-            將最新的備份時間寫入 backup_time.json
-        
-        用途:
-            持久化備份時間記錄
-        """
-        try:
-            data = {}
-            if self.last_manual_backup_time:
-                data["last_manual_backup"] = self.last_manual_backup_time.isoformat()
-            if self.last_auto_backup_time:
-                data["last_auto_backup"] = self.last_auto_backup_time.isoformat()
-            
-            with open(self.backup_time_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"儲存備份時間記錄失敗: {str(e)}")
-    
-    # ========================================================================
-    # 排程系統方法
-    # ========================================================================
-    
-    def run_schedule(self):
-        """
-        排程檢查執行迴圈
-        
-        功能:
-            持續檢查並執行待處理的排程任務
-        
-        用途:
-            在背景執行緒中運行，驅動自動備份和更新系統
-        """
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
-    
-    def setup_schedules(self):
-        """
-        設置排程任務
-        
-        功能:
-            - 清除舊有排程
-            - 根據使用者設定建立新排程
-            - 支援多種頻率類型（小時、每日、每週、每月）
-        
-        用途:
-            初始化和更新自動備份/更新排程
-        """
-        schedule.clear()
-        
-        # 設置自動備份
-        if self.config["auto_backup_enabled"]:
-            freq_type = self.config["backup_frequency_type"]
-            if freq_type == "hours":
-                hours = self.config["backup_frequency_value"]
-                schedule.every(hours).hours.do(lambda: threading.Thread(
-                    target=self.scheduled_backup, daemon=True).start())
-            elif freq_type == "daily":
-                time_str = f"{self.config['backup_time_hour']:02d}:{self.config['backup_time_minute']:02d}"
-                schedule.every().day.at(time_str).do(lambda: threading.Thread(
-                    target=self.scheduled_backup, daemon=True).start())
-            elif freq_type == "weekly":
-                weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-                time_str = f"{self.config['backup_time_hour']:02d}:{self.config['backup_time_minute']:02d}"
-                getattr(schedule.every(), weekdays[self.config["backup_weekday"]]).at(time_str).do(
-                    lambda: threading.Thread(target=self.scheduled_backup, daemon=True).start())
-            elif freq_type == "monthly":
-                # 每天檢查是否是指定日期
-                schedule.every().day.at("00:01").do(self.check_monthly_backup)
-        
-        # 設置自動更新
-        if self.config["auto_update_enabled"]:
-            freq_type = self.config["update_frequency_type"]
-            if freq_type == "hours":
-                hours = self.config["update_frequency_value"]
-                schedule.every(hours).hours.do(lambda: threading.Thread(
-                    target=self.scheduled_update_check, daemon=True).start())
-            elif freq_type == "daily":
-                time_str = f"{self.config['update_time_hour']:02d}:{self.config['update_time_minute']:02d}"
-                schedule.every().day.at(time_str).do(lambda: threading.Thread(
-                    target=self.scheduled_update_check, daemon=True).start())
-            elif freq_type == "weekly":
-                weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-                time_str = f"{self.config['update_time_hour']:02d}:{self.config['update_time_minute']:02d}"
-                getattr(schedule.every(), weekdays[self.config["update_weekday"]]).at(time_str).do(
-                    lambda: threading.Thread(target=self.scheduled_update_check, daemon=True).start())
-            elif freq_type == "monthly":
-                schedule.every().day.at("00:01").do(self.check_monthly_update)
-    
-    def check_monthly_backup(self):
-        """檢查是否執行月度備份"""
-        if datetime.now().day == self.config["backup_day"]:
-            hour = self.config["backup_time_hour"]
-            minute = self.config["backup_time_minute"]
-            now = datetime.now()
-            if now.hour == hour and now.minute == minute:
-                threading.Thread(target=self.scheduled_backup, daemon=True).start()
-    
-    def check_monthly_update(self):
-        """檢查是否執行月度更新"""
-        if datetime.now().day == self.config["update_day"]:
-            hour = self.config["update_time_hour"]
-            minute = self.config["update_time_minute"]
-            now = datetime.now()
-            if now.hour == hour and now.minute == minute:
-                threading.Thread(target=self.scheduled_update_check, daemon=True).start()
-    
-    def scheduled_backup(self):
-        """排程備份（帶通知）"""
-        self.log_message("排程備份即將執行...")
-        self.perform_backup_with_notification(
-            self.config["backup_notify_minutes"], 
-            is_auto=True
-        )
-    
-    def _compare_versions(self, version1, version2):
-        """比較兩個版本號
-        
-        Args:
-            version1: 第一個版本號（如 "1.21.113.1"）
-            version2: 第二個版本號（如 "1.21.114.0"）
-        
-        Returns:
-            1: version1 > version2
-            0: version1 == version2
-            -1: version1 < version2
-        """
-        try:
-            # 分割版本號並轉換為整數列表
-            v1_parts = [int(x) for x in version1.split('.')]
-            v2_parts = [int(x) for x in version2.split('.')]
-            
-            # 補齊較短的版本號（用0填充）
-            max_len = max(len(v1_parts), len(v2_parts))
-            v1_parts.extend([0] * (max_len - len(v1_parts)))
-            v2_parts.extend([0] * (max_len - len(v2_parts)))
-            
-            # 逐段比較
-            for v1, v2 in zip(v1_parts, v2_parts):
-                if v1 > v2:
-                    return 1
-                elif v1 < v2:
-                    return -1
-            
-            return 0
-        except Exception as e:
-            self.log_message(f"版本比較錯誤: {str(e)}")
-            return 0
-    
-    def scheduled_update_check(self):
-        """排程更新檢查"""
-        self.log_message("正在檢查更新...")
-        # 先檢查更新（自動模式不顯示彈窗）
-        self._check_update(is_auto=True)
-        # 如果有更新可用且版本較新，執行更新
-        if hasattr(self, 'download_url') and self.download_url and hasattr(self, 'has_new_version') and self.has_new_version:
-            self.log_message("開始自動更新...")
-            self.perform_update_with_notification(
-                self.config["update_notify_minutes"],
-                is_auto=True
-            )
-    
-    def broadcast_message(self, message, log_prefix=None):
-        """發送廣播訊息到遊戲中
-        
-        Args:
-            message: 廣播訊息內容
-            log_prefix: 日誌前綴（如 "備份通知"、"更新通知"、"重啟通知"），None則使用預設格式
-        """
-        if self.server_process:
-            try:
-                command = f'say {message}'
-                self.server_process.stdin.write(command + "\n")
-                self.server_process.stdin.flush()
-                
-                # 根據前綴決定日誌格式
-                if log_prefix:
-                    self.log_message(f"已發送{log_prefix}: {message}")
-                else:
-                    self.log_message(f"廣播: {message}")
-            except Exception as e:
-                self.log_message(f"廣播失敗: {str(e)}")
-    
-    def _format_time_unit(self, value, unit="second"):
-        """格式化時間單位（自動判斷單複數）"""
-        if value == 1:
-            return f"{value} {unit}"
-        else:
-            return f"{value} {unit}s"
-    
-    # ========================================================================
-    # 備份系統方法
-    # ========================================================================
-    
-    def perform_backup_with_notification(self, notify_seconds, is_auto=False):
-        """
-        執行備份（含遊戲內通知）
-        
-        功能:
-            - 發送備份倒數通知到遊戲中
-            - 執行世界備份
-            - 顯示備份完成時間
-            - 禁用/啟用相關按鈕
-        
-        Args:
-            notify_seconds: 提前通知秒數
-            is_auto: 是否為自動備份
-        
-        用途:
-            完整的備份流程，包含玩家通知
-        """
-        try:
-            # 自動備份時需要禁用按鈕（手動備份已在調用前處理）
-            if is_auto:
-                self.after(0, self._disable_operation_buttons)
-            
-            if notify_seconds > 0 and self.server_process:
-                time_str = self._format_time_unit(notify_seconds, "second")
-                message = f"Backup will begin in {time_str}"
-                self.broadcast_message(message, "備份通知")
-                time.sleep(notify_seconds)
-            
-            # 記錄實際備份開始時間（排除等待時間）
-            backup_start_time = time.time()
-            
-            # 執行備份（移除進行中通知）
-            # 注意：_perform_backup 內部也會調用 _disable_operation_buttons，
-            # 但這裡先調用是為了在通知期間就禁用按鈕
-            self._perform_backup(is_auto=is_auto)
-            
-            # 計算實際備份耗時（不包含提前通知等待時間）
-            if self.server_process:
-                elapsed = int(time.time() - backup_start_time)
-                if elapsed < 60:
-                    time_str = self._format_time_unit(elapsed, "second")
-                else:
-                    minutes = elapsed // 60
-                    seconds = elapsed % 60
-                    if seconds == 0:
-                        time_str = self._format_time_unit(minutes, "minute")
-                    else:
-                        time_str = f"{self._format_time_unit(minutes, 'minute')} {self._format_time_unit(seconds, 'second')}"
-                message = f"Backup completed, took {time_str}"
-                self.broadcast_message(message, "備份通知")
-        except Exception as e:
-            self.log_message(f"備份通知流程錯誤: {str(e)}")
-
-    
-    # ========================================================================
-    # 更新系統方法
-    # ========================================================================
-    
-    def perform_update_with_notification(self, notify_minutes, is_auto=False):
-        """
-        執行伺服器更新（含遊戲內通知）
-        
-        功能:
-            - 並行下載更新檔案
-            - 發送更新倒數通知到遊戲中
-            - 關閉伺服器並執行更新
-            - 自動重啟伺服器
-            - 支援取消更新
-        
-        Args:
-            notify_minutes: 提前通知分鐘數
-            is_auto: 是否為自動更新
-        
-        用途:
-            完整的伺服器更新流程，含玩家通知和檔案下載
-        """
-        try:
-            # 自動更新時需要禁用按鈕（手動更新已在調用前處理）
-            if is_auto:
-                self.after(0, self._disable_operation_buttons)
-            
-            download_thread = None
-            
-            # 如果有通知時間，在通知期間並行下載檔案
-            if notify_minutes > 0:
-                self.update_notification_active = True  # 開始更新通知
-                self.update_remaining_seconds = notify_minutes * 60
-                
-                self.log_message("開始並行下載更新檔...")
-                # 啟動下載執行緒並保存引用
-                download_thread = threading.Thread(target=self._download_and_store, daemon=True)
-                self.update_download_thread = download_thread
-                download_thread.start()
-                
-                # 同時進行通知倒數
-                if self.server_process:
-                    total_seconds = notify_minutes * 60
-                    
-                    # 大於 30 分鐘時，每 10 分鐘廣播一次
-                    while total_seconds > 30 * 60:
-                        # 檢查是否請求取消
-                        if self.update_cancel_requested:
-                            self.log_message("更新已取消（通知階段）")
-                            return
-                        
-                        remaining_minutes = total_seconds // 60
-                        time_str = self._format_time_unit(remaining_minutes, "minute")
-                        message = f"Update in {time_str}"
-                        self.broadcast_message(message, "更新通知")
-                        self.update_remaining_seconds = total_seconds
-                        self.update_next_broadcast_seconds = total_seconds - 10 * 60
-                        
-                        # 以1秒為單位更新剩餘時間
-                        for _ in range(10 * 60):
-                            if self.update_cancel_requested:
-                                self.log_message("更新已取消（通知階段）")
-                                return
-                            time.sleep(1)
-                            total_seconds -= 1
-                            self.update_remaining_seconds = total_seconds
-                    
-                    # 30 分鐘內每 5 分鐘一次
-                    while total_seconds > 5 * 60:
-                        # 檢查是否請求取消
-                        if self.update_cancel_requested:
-                            self.log_message("更新已取消（通知階段）")
-                            return
-                        
-                        remaining_minutes = total_seconds // 60
-                        time_str = self._format_time_unit(remaining_minutes, "minute")
-                        message = f"Update in {time_str}"
-                        self.broadcast_message(message, "更新通知")
-                        self.update_remaining_seconds = total_seconds
-                        self.update_next_broadcast_seconds = total_seconds - 5 * 60
-                        
-                        # 以1秒為單位更新剩餘時間
-                        for _ in range(5 * 60):
-                            if self.update_cancel_requested:
-                                self.log_message("更新已取消（通知階段）")
-                                return
-                            time.sleep(1)
-                            total_seconds -= 1
-                            self.update_remaining_seconds = total_seconds
-                    
-                    # 5 分鐘到 1 分鐘之間（2-5分鐘）
-                    if total_seconds > 60:
-                        # 檢查是否請求取消
-                        if self.update_cancel_requested:
-                            self.log_message("更新已取消（通知階段）")
-                            return
-                        
-                        remaining_minutes = total_seconds // 60
-                        time_str = self._format_time_unit(remaining_minutes, "minute")
-                        message = f"Update in {time_str}"
-                        self.broadcast_message(message, "更新通知")
-                        self.update_remaining_seconds = total_seconds
-                        self.update_next_broadcast_seconds = 60
-                        
-                        # 以1秒為單位更新剩餘時間，直到剩下1分鐘
-                        while total_seconds > 60:
-                            if self.update_cancel_requested:
-                                self.log_message("更新已取消（通知階段）")
-                                return
-                            time.sleep(1)
-                            total_seconds -= 1
-                            self.update_remaining_seconds = total_seconds
-                    
-                    # 剩餘 1 分鐘
-                    if total_seconds >= 60:
-                        # 檢查是否請求取消
-                        if self.update_cancel_requested:
-                            self.log_message("更新已取消（通知階段）")
-                            return
-                        
-                        message = "Update in 1 minute"
-                        self.broadcast_message(message, "更新通知")
-                        self.update_remaining_seconds = total_seconds
-                        self.update_next_broadcast_seconds = 30
-                        
-                        # 以1秒為單位更新剩餘時間，直到剩下30秒
-                        while total_seconds > 30:
-                            if self.update_cancel_requested:
-                                self.log_message("更新已取消（通知階段）")
-                                return
-                            time.sleep(1)
-                            total_seconds -= 1
-                            self.update_remaining_seconds = total_seconds
-                    
-                    # 剩餘 30 秒，每 5 秒倒數
-                    while total_seconds > 10:
-                        # 檢查是否請求取消
-                        if self.update_cancel_requested:
-                            self.log_message("更新已取消（通知階段）")
-                            return
-                        
-                        time_str = self._format_time_unit(total_seconds, "second")
-                        message = f"Update in {time_str}"
-                        self.broadcast_message(message, "更新通知")
-                        self.update_remaining_seconds = total_seconds
-                        self.update_next_broadcast_seconds = total_seconds - 5
-                        
-                        # 以1秒為單位更新剩餘時間
-                        for _ in range(5):
-                            if self.update_cancel_requested:
-                                self.log_message("更新已取消（通知階段）")
-                                return
-                            time.sleep(1)
-                            total_seconds -= 1
-                            self.update_remaining_seconds = total_seconds
-                            if total_seconds <= 10:
-                                break
-                    
-                    # 剩餘 10 秒，每秒倒數
-                    while total_seconds > 0:
-                        # 檢查是否請求取消
-                        if self.update_cancel_requested:
-                            self.log_message("更新已取消（通知階段）")
-                            return
-                        
-                        time_str = self._format_time_unit(total_seconds, "second")
-                        message = f"Update in {time_str}"
-                        self.broadcast_message(message, "更新通知")
-                        self.update_remaining_seconds = total_seconds
-                        self.update_next_broadcast_seconds = total_seconds - 1
-                        time.sleep(1)
-                        total_seconds -= 1
-                        self.update_remaining_seconds = total_seconds
-                
-                # 等待下載完成
-                if download_thread:
-                    self.log_message("等待下載完成...")
-                    download_thread.join()
-                
-                # 檢查最後一次是否請求取消
-                if self.update_cancel_requested:
-                    self.log_message("更新已取消（下載後）")
-                    return
-                
-                # 清除更新通知狀態
-                self.update_notification_active = False
-                self.update_remaining_seconds = 0
-                self.update_next_broadcast_seconds = 0
-            
-            # 標記進入更新階段（無法取消）
-            self.update_in_progress = True
-            
-            # 將按鈕改為無效化的反灰狀態
-            if not is_auto:
-                self.after(0, lambda: self.force_update_btn.configure(
-                    text="手動更新",
-                    state="disabled",
-                    fg_color="#6C757D",
-                    hover_color="#6C757D"
-                ))
-            
-            # 執行更新
-            self._perform_update()
-            
-        except Exception as e:
-            self.log_message(f"更新通知流程錯誤: {str(e)}")
-            # 確保清除狀態
-            self.update_notification_active = False
-            self.update_remaining_seconds = 0
-            self.update_next_broadcast_seconds = 0
-    
-    def send_immediate_update_notification(self, player_name):
-        """立即發送更新通知給新上線的玩家（spawned時）"""
-        try:
-            # 檢查是否在更新通知期間
-            if self.update_notification_active and self.update_remaining_seconds > 0:
-                # 計算與下次預定廣播的時間差
-                time_until_next_broadcast = self.update_next_broadcast_seconds
-                
-                # 如果與下次預定廣播相距超過60秒，則發送額外通知
-                if time_until_next_broadcast > 60:
-                    # 計算完整的分秒格式
-                    remaining_seconds = int(self.update_remaining_seconds)
-                    minutes = remaining_seconds // 60
-                    seconds = remaining_seconds % 60
-                    
-                    # 構建訊息
-                    if minutes > 0 and seconds > 0:
-                        message = f"Update in {minutes} minute{'' if minutes == 1 else 's'} {seconds} second{'' if seconds == 1 else 's'}"
-                    elif minutes > 0:
-                        message = f"Update in {minutes} minute{'' if minutes == 1 else 's'}"
-                    else:
-                        message = f"Update in {seconds} second{'' if seconds == 1 else 's'}"
-                    
-                    self.broadcast_message(message, f"更新通知 (for {player_name})")
-                    self.log_message(f"為新上線玩家 {player_name} 發送更新通知 (剩餘 {minutes}分{seconds}秒)")
-        except Exception as e:
-            self.log_message(f"即時通知錯誤: {str(e)}")
-    
-    def _download_and_store(self):
-        """下載並儲存檔案路徑（供並行下載使用）"""
-        temp_zip = self._download_update_file()
-        if temp_zip:
-            self._downloaded_zip = temp_zip
-            self.log_message("並行下載已完成，等待伺服器關閉...")
-        else:
-            # 檢查是否為取消操作
-            if not self.update_cancel_requested:
-                # 只有在非取消情況下才記錄為失敗
-                self.log_message("並行下載失敗！")
-            
-    def load_player_list(self):
-        """載入玩家列表"""
-        return self.load_json_file(self.player_list_file, [])
-    
-    def save_player_list(self):
-        """儲存玩家列表"""
-        self.save_json_file(self.player_list_file, self.player_list)
     
     # ========================================================================
     # UI 創建方法
@@ -1105,7 +340,7 @@ class BDSConsole(ctk.CTk):
         self.nav_frame = ctk.CTkFrame(self, width=220, corner_radius=0, 
                                      fg_color=("#2B5278", "#1A1A2E"))
         self.nav_frame.grid(row=0, column=0, sticky="nsew")
-        self.nav_frame.grid_rowconfigure(6, weight=1)
+        self.nav_frame.grid_rowconfigure(7, weight=1)
         
         # 標題區域
         title_frame = ctk.CTkFrame(self.nav_frame, fg_color="transparent")
@@ -1132,6 +367,7 @@ class BDSConsole(ctk.CTk):
             ("伺服器狀態", "伺服器狀態"),
             ("伺服器設定", "伺服器設定"),
             ("備份與更新", "備份與更新"),
+            ("伺服器實例", "伺服器實例"),
             ("控制面板設定", "控制面板設定")
         ]
         
@@ -1158,7 +394,7 @@ class BDSConsole(ctk.CTk):
             font=ctk.CTkFont(size=10),
             text_color=("#B0B0B0", "#808080")
         )
-        version_label.grid(row=7, column=0, pady=(0,15))
+        version_label.grid(row=8, column=0, pady=(0,15))
         
         # 右側內容區
         self.content_frame = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
@@ -1166,20 +402,20 @@ class BDSConsole(ctk.CTk):
         self.content_frame.grid_rowconfigure(0, weight=1)
         self.content_frame.grid_columnconfigure(0, weight=1)
         
-        # 先載入 server.properties
-        self.load_server_properties()
+        # 確認 server.properties 是否有外部修改（有變更才重新解析）
+        self.file_watcher.check()
         
         # 建立所有頁面
         self.pages = {}
         self.create_status_page()
         self.create_settings_page()
         self.create_backup_page()
+        self.create_instances_page()
         self.create_console_settings_page()
         
         # 顯示第一個頁面
         self.show_page("伺服器狀態")
-
-        
+    
     def show_page(self, page_name):
         """切換頁面"""
         # 檢查當前頁面是否有未保存的設定
@@ -1225,6 +461,7 @@ class BDSConsole(ctk.CTk):
             "伺服器狀態": "伺服器狀態",
             "伺服器設定": "伺服器設定",
             "備份與更新": "備份與更新",
+            "伺服器實例": "伺服器實例",
             "控制面板設定": "控制面板設定"
         }
         
@@ -1244,7 +481,6 @@ class BDSConsole(ctk.CTk):
                     text_color=("#FFFFFF", "#FFFFFF"),
                     hover_color=("#3A6EA5", "#2D2D44")
                 )
-
     
     def create_status_page(self):
         """建立伺服器狀態頁面"""
@@ -1353,6 +589,21 @@ class BDSConsole(ctk.CTk):
         )
         self.version_label.pack(side="left")
         
+        # 運行時間
+        ctk.CTkLabel(
+            version_frame,
+            text="運行:",
+            font=ctk.CTkFont(size=11)
+        ).pack(side="left", padx=(10,3))
+        
+        self.uptime_label = ctk.CTkLabel(
+            version_frame,
+            text="-",
+            font=ctk.CTkFont(size=11, weight="bold")
+        )
+        self.uptime_label.pack(side="left")
+        self.after(1000, self.update_uptime_label)
+        
         # 控制台輸出區
         self.console_output = ctk.CTkTextbox(console_card, font=("Consolas", 11),
                                             fg_color=("#F5F5F5", "#1E1E1E"),
@@ -1379,9 +630,48 @@ class BDSConsole(ctk.CTk):
         self.send_command_btn.grid(row=0, column=2, padx=(10,0))
 
         
+        # 資源監控卡片（CPU / 記憶體 / 磁碟 I/O / 執行緒趨勢圖）
+        resource_card = ctk.CTkFrame(page, corner_radius=15, fg_color=("#E8E8E8", "#2B2B2B"))
+        resource_card.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
+        resource_card.grid_columnconfigure(1, weight=1)
+        
+        resource_header_frame = ctk.CTkFrame(resource_card, fg_color="transparent")
+        resource_header_frame.grid(row=0, column=0, columnspan=3, sticky="ew", padx=15, pady=(15,5))
+        resource_header_frame.grid_columnconfigure(1, weight=1)
+        
+        ctk.CTkLabel(resource_header_frame, text="資源監控", 
+                    font=ctk.CTkFont(size=16, weight="bold")).grid(row=0, column=0, sticky="w")
+        
+        self.resource_time_label = ctk.CTkLabel(
+            resource_header_frame,
+            text="伺服器未運行",
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
+        )
+        self.resource_time_label.grid(row=0, column=2, sticky="e")
+        
+        # 每列：名稱 | 趨勢圖 | 目前數值
+        self.resource_widgets = {}
+        resource_rows = [
+            ("cpu", "CPU"),
+            ("rss_mb", "記憶體"),
+            ("io", "磁碟讀寫"),
+            ("threads", "執行緒/控制代碼"),
+        ]
+        for row_index, (key, title) in enumerate(resource_rows, start=1):
+            pady = (0,15) if row_index == len(resource_rows) else (0,2)
+            ctk.CTkLabel(resource_card, text=title, font=ctk.CTkFont(size=12),
+                        width=110, anchor="w").grid(row=row_index, column=0, sticky="w", padx=(15,5), pady=pady)
+            spark_label = ctk.CTkLabel(resource_card, text="", font=("Consolas", 12), anchor="w")
+            spark_label.grid(row=row_index, column=1, sticky="w", padx=5, pady=pady)
+            value_label = ctk.CTkLabel(resource_card, text="-", font=ctk.CTkFont(size=12, weight="bold"),
+                                      width=180, anchor="e")
+            value_label.grid(row=row_index, column=2, sticky="e", padx=(5,15), pady=pady)
+            self.resource_widgets[key] = (spark_label, value_label)
+        
         # 玩家管理卡片（整合在線和離線玩家）
         players_management_card = ctk.CTkFrame(page, corner_radius=15, fg_color=("#E8E8E8", "#2B2B2B"))
-        players_management_card.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
+        players_management_card.grid(row=2, column=0, sticky="nsew", padx=10, pady=10)
         players_management_card.grid_rowconfigure(1, weight=1)
         players_management_card.grid_columnconfigure(0, weight=1)
         
@@ -1425,6 +715,29 @@ class BDSConsole(ctk.CTk):
         )
         self.players_label.pack(side="left", padx=(0,15))
         
+        # 匯入/匯出按鈕
+        ctk.CTkButton(
+            right_controls,
+            text="匯入",
+            command=self.import_players_file,
+            width=70,
+            height=30,
+            font=ctk.CTkFont(size=12),
+            fg_color="#6C757D",
+            hover_color="#5A6268"
+        ).pack(side="left", padx=(0,5))
+        
+        ctk.CTkButton(
+            right_controls,
+            text="匯出",
+            command=self.export_players_file,
+            width=70,
+            height=30,
+            font=ctk.CTkFont(size=12),
+            fg_color="#6C757D",
+            hover_color="#5A6268"
+        ).pack(side="left", padx=(0,5))
+        
         # 保存按鈕
         ctk.CTkButton(
             right_controls,
@@ -1450,7 +763,6 @@ class BDSConsole(ctk.CTk):
         self.players_management_widgets = []
         
         self.update_players_management_display()
-
     
     def create_settings_page(self):
         """建立伺服器設定頁面（統一風格）"""
@@ -1494,7 +806,7 @@ class BDSConsole(ctk.CTk):
         ctk.CTkLabel(left_frame, text="屬性設定", font=ctk.CTkFont(size=16, weight="bold")).grid(
             row=0, column=0, columnspan=2, padx=10, pady=(10,10)
         )
-        self.load_server_properties()
+        self.file_watcher.check()
         self.settings_vars = {}
         
         # 檢查 server.properties 是否存在
@@ -1571,8 +883,6 @@ class BDSConsole(ctk.CTk):
                 row=row, column=0, columnspan=2, padx=20, pady=(0,8), sticky="w")
             row += 1
     
-    
-
     def create_backup_page(self):
         """建立備份與更新頁面"""
         page = ctk.CTkScrollableFrame(self.content_frame, corner_radius=0, fg_color="transparent")
@@ -1894,25 +1204,349 @@ class BDSConsole(ctk.CTk):
                                                 font=ctk.CTkFont(size=13))
         self.latest_version_label.grid(row=1, column=1, padx=10, pady=8, sticky="w")
         
-        # 初始化控件啟用/禁用狀態
-        self.after(100, lambda: self.toggle_auto_backup())
-        self.after(100, lambda: self.toggle_auto_update())
-
-
-
-
-    def create_console_settings_page(self):
-        """建立控制面板設定頁面"""
-        page = ctk.CTkFrame(self.content_frame, corner_radius=0, fg_color="transparent")
-        page.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
-        page.grid_rowconfigure(2, weight=1)
-        page.grid_columnconfigure(0, weight=1)
-        self.pages["控制面板設定"] = page
-
+        # 版本庫（已安裝的版本資料夾與已下載的版本，可直接重裝或回滾）
+        ctk.CTkLabel(version_info_frame, text="版本庫:", 
+                    font=ctk.CTkFont(size=13, weight="bold")).grid(
+            row=2, column=0, padx=15, pady=8, sticky="w")
+        release_frame = ctk.CTkFrame(version_info_frame, fg_color="transparent")
+        release_frame.grid(row=2, column=1, padx=10, pady=8, sticky="w")
+        
+        self.release_var = ctk.StringVar(value="")
+        self.release_menu = ctk.CTkOptionMenu(release_frame, values=[""],
+                                              variable=self.release_var,
+                                              width=150, height=28)
+        self.release_menu.pack(side="left")
+        
+        self.release_install_btn = ctk.CTkButton(
+            release_frame,
+            text="安裝此版本",
+            command=self.install_cached_release,
+            width=100,
+            height=28,
+            font=ctk.CTkFont(size=12),
+            fg_color="#17A2B8",
+            hover_color="#138496"
+        )
+        self.release_install_btn.pack(side="left", padx=(8,0))
+        
+        self.release_rollback_btn = ctk.CTkButton(
+            release_frame,
+            text="回滾上一版",
+            command=self.rollback_previous_release,
+            width=100,
+            height=28,
+            font=ctk.CTkFont(size=12),
+            fg_color="#17A2B8",
+            hover_color="#138496"
+        )
+        self.release_rollback_btn.pack(side="left", padx=(8,0))
+        self.update_release_cache_display()
+        
+        # 更新前試啟動（canary）
+        self.update_canary_var = ctk.BooleanVar(value=self.config["update_canary_enabled"])
+        ctk.CTkSwitch(version_info_frame, text="替換前先以新版本試啟動（失敗時不更新）",
+                      variable=self.update_canary_var,
+                      command=self.toggle_update_canary,
+                      font=ctk.CTkFont(size=13)).grid(
+            row=3, column=0, columnspan=2, padx=15, pady=8, sticky="w")
+        
+        # ========== 定時重啟區域 ========== 
+        restart_card = ctk.CTkFrame(page, corner_radius=15, fg_color=("#E8E8E8", "#2B2B2B"))
+        restart_card.grid(row=2, column=0, sticky="ew", padx=20, pady=15)
+        restart_card.grid_columnconfigure(1, weight=1)
+        
+        # 標題列（包含提前通知滑條）
+        restart_header_frame = ctk.CTkFrame(restart_card, fg_color="transparent")
+        restart_header_frame.grid(row=0, column=0, columnspan=3, sticky="ew", padx=20, pady=(20,10))
+        restart_header_frame.grid_columnconfigure(1, weight=1)
+        
+        # 左側標題
+        ctk.CTkLabel(restart_header_frame, text="定時重啟", 
+                    font=ctk.CTkFont(size=20, weight="bold")).grid(row=0, column=0, sticky="w")
+        
+        # 右側提前通知滑條
+        restart_notify_container = ctk.CTkFrame(restart_header_frame, fg_color="transparent")
+        restart_notify_container.grid(row=0, column=1, padx=20, sticky="e")
+        
+        ctk.CTkLabel(restart_notify_container, text="提前通知:", 
+                    font=ctk.CTkFont(size=12)).pack(side="left", padx=(0,5))
+        
+        self.restart_notify_var = ctk.IntVar(value=self.config["restart_notify_minutes"])
+        self.restart_notify_slider = ctk.CTkSlider(
+            restart_notify_container, 
+            from_=0, 
+            to=30, 
+            number_of_steps=30,
+            variable=self.restart_notify_var,
+            width=120,
+            command=self.on_restart_notify_change
+        )
+        self.restart_notify_slider.pack(side="left", padx=5)
+        
+        self.restart_notify_label = ctk.CTkLabel(
+            restart_notify_container, 
+            text=f"{self.restart_notify_var.get()}分",
+            font=ctk.CTkFont(size=12),
+            width=40
+        )
+        self.restart_notify_label.pack(side="left")
+        
+        # 定時重啟開關
+        self.auto_restart_var = ctk.BooleanVar(value=self.config["auto_restart_enabled"])
+        auto_restart_switch = ctk.CTkSwitch(restart_card, text="啟用每日定時重啟", 
+                                           variable=self.auto_restart_var,
+                                           command=self.toggle_auto_restart,
+                                           font=ctk.CTkFont(size=13))
+        auto_restart_switch.grid(row=1, column=0, columnspan=3, padx=20, pady=8, sticky="w")
+        
+        # 重啟時間
+        ctk.CTkLabel(restart_card, text="重啟時間:", 
+                    font=ctk.CTkFont(size=13)).grid(
+            row=2, column=0, padx=20, pady=8, sticky="w")
+        restart_time_frame = ctk.CTkFrame(restart_card, fg_color="transparent")
+        restart_time_frame.grid(row=2, column=1, padx=10, pady=8, sticky="w")
+        
+        ctk.CTkLabel(restart_time_frame, text="每天").grid(row=0, column=0, padx=5)
+        self.restart_hour_var = ctk.StringVar(value=str(self.config["restart_time_hour"]))
+        self.restart_minute_var = ctk.StringVar(value=str(self.config["restart_time_minute"]))
+        self.restart_hour_menu = ctk.CTkOptionMenu(restart_time_frame, variable=self.restart_hour_var,
+                                                   values=[str(i) for i in range(24)], width=70,
+                                                   command=self.on_restart_time_change)
+        self.restart_hour_menu.grid(row=0, column=1, padx=5)
+        ctk.CTkLabel(restart_time_frame, text="時").grid(row=0, column=2, padx=5)
+        self.restart_minute_menu = ctk.CTkOptionMenu(restart_time_frame, variable=self.restart_minute_var,
+                                                     values=["0", "15", "30", "45"], width=70,
+                                                     command=self.on_restart_time_change)
+        self.restart_minute_menu.grid(row=0, column=3, padx=5)
+        ctk.CTkLabel(restart_time_frame, text="分").grid(row=0, column=4, padx=5)
+        
+        # 維護時段：有玩家在線時延後
+        self.maintenance_defer_var = ctk.BooleanVar(value=self.config["maintenance_defer_enabled"])
+        self.maintenance_defer_switch = ctk.CTkSwitch(restart_card, text="有玩家在線時延後重啟/自動更新", 
+                                                      variable=self.maintenance_defer_var,
+                                                      command=self.toggle_maintenance_defer,
+                                                      font=ctk.CTkFont(size=13))
+        self.maintenance_defer_switch.grid(row=3, column=0, columnspan=3, padx=20, pady=8, sticky="w")
+        
+        # 最長延後時間
+        ctk.CTkLabel(restart_card, text="最長延後:", 
+                    font=ctk.CTkFont(size=13)).grid(
+            row=4, column=0, padx=20, pady=8, sticky="w")
+        defer_frame = ctk.CTkFrame(restart_card, fg_color="transparent")
+        defer_frame.grid(row=4, column=1, padx=10, pady=8, sticky="w")
+        self.maintenance_max_defer_var = ctk.StringVar(value=str(self.config["maintenance_max_defer_minutes"]))
+        self.maintenance_max_defer_menu = ctk.CTkOptionMenu(defer_frame, variable=self.maintenance_max_defer_var,
+                                                            values=["15", "30", "60", "120", "240"], width=80,
+                                                            command=self.on_maintenance_defer_change)
+        self.maintenance_max_defer_menu.grid(row=0, column=0, padx=5)
+        ctk.CTkLabel(defer_frame, text="分鐘（超過後帶倒數通知執行）").grid(row=0, column=1, padx=5)
+        
+        # 下次重啟時間
+        restart_info_frame = ctk.CTkFrame(restart_card, corner_radius=10, 
+                                         fg_color=("#D0D0D0", "#1E1E1E"))
+        restart_info_frame.grid(row=5, column=0, columnspan=3, padx=20, pady=10, sticky="ew")
+        restart_info_frame.grid_columnconfigure(1, weight=1)
+        
+        ctk.CTkLabel(restart_info_frame, text="下次重啟:", 
+                    font=ctk.CTkFont(size=13, weight="bold")).grid(
+            row=0, column=0, padx=15, pady=8, sticky="w")
+        self.next_restart_label = ctk.CTkLabel(restart_info_frame, text="未啟用",
+                                              font=ctk.CTkFont(size=13))
+        self.next_restart_label.grid(row=0, column=1, padx=10, pady=8, sticky="w")
+        
+        # 初始化控件啟用/禁用狀態
+        self.after(100, lambda: self.toggle_auto_backup())
+        self.after(100, lambda: self.toggle_auto_update())
+        self.after(100, lambda: self.toggle_auto_restart())
+    
+    def create_instances_page(self):
+        """建立伺服器實例頁面（data/instances.json 中的其他實例）"""
+        page = ctk.CTkScrollableFrame(self.content_frame, corner_radius=0, fg_color="transparent")
+        page.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        page.grid_columnconfigure(0, weight=1)
+        self.pages["伺服器實例"] = page
+        
+        main_card = ctk.CTkFrame(page, corner_radius=15, fg_color=("#E8E8E8", "#2B2B2B"))
+        main_card.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        main_card.grid_columnconfigure(0, weight=1)
+        
+        ctk.CTkLabel(main_card, text="伺服器實例", 
+                    font=ctk.CTkFont(size=22, weight="bold")).grid(
+            row=0, column=0, padx=20, pady=(20,15), sticky="w"
+        )
+        
+        if not self.instance_manager.instances:
+            hint_text = (
+                "目前沒有其他伺服器實例。\n\n"
+                f"在 {self.instance_manager.instances_file} 建立實例清單即可在同一個控制台管理多個伺服器，例如：\n\n"
+                '{\n'
+                '    "instances": [\n'
+                '        {"name": "creative", "base_dir": "instances/creative"},\n'
+                '        {"name": "events", "base_dir": "instances/events"}\n'
+                '    ]\n'
+                '}\n\n'
+                "各實例有獨立的伺服器檔案、設定、排程與備份，請在各自的 server.properties 設定不同的連接埠。\n"
+                "修改後需重新啟動 BDS Console。"
+            )
+            ctk.CTkLabel(main_card, text=hint_text, justify="left",
+                        font=ctk.CTkFont(size=13)).grid(
+                row=1, column=0, padx=20, pady=(0,20), sticky="w")
+            return
+        
+        for i, (name, instance) in enumerate(self.instance_manager.instances.items()):
+            row_card = ctk.CTkFrame(main_card, corner_radius=12, 
+                                   fg_color=("#D8D8D8", "#1E1E1E"))
+            row_card.grid(row=i+1, column=0, sticky="ew", padx=20, pady=(0,10))
+            row_card.grid_columnconfigure(2, weight=1)
+            
+            status_label = ctk.CTkLabel(row_card, text="●", 
+                                        font=ctk.CTkFont(size=18),
+                                        text_color="#DC3545")
+            status_label.grid(row=0, column=0, padx=(20,8), pady=15)
+            
+            ctk.CTkLabel(row_card, text=name, 
+                        font=ctk.CTkFont(size=16, weight="bold")).grid(
+                row=0, column=1, pady=15, sticky="w")
+            
+            detail_label = ctk.CTkLabel(row_card, text="", 
+                                        font=ctk.CTkFont(size=12),
+                                        text_color="gray70")
+            detail_label.grid(row=0, column=2, padx=20, pady=15, sticky="w")
+            
+            button_frame = ctk.CTkFrame(row_card, fg_color="transparent")
+            button_frame.grid(row=0, column=3, padx=(0,15), pady=10, sticky="e")
+            
+            toggle_btn = ctk.CTkButton(
+                button_frame, 
+                text="啟動", 
+                command=lambda n=name: self.toggle_instance_server(n), 
+                width=80, 
+                height=32,
+                font=ctk.CTkFont(size=13, weight="bold"),
+                fg_color="#28A745", 
+                hover_color="#218838"
+            )
+            toggle_btn.pack(side="left", padx=2)
+            
+            ctk.CTkButton(
+                button_frame, 
+                text="重新啟動", 
+                command=lambda n=name: self.restart_instance_server(n), 
+                width=100, 
+                height=32,
+                font=ctk.CTkFont(size=13, weight="bold"),
+                fg_color="#17A2B8", 
+                hover_color="#138496"
+            ).pack(side="left", padx=2)
+            
+            ctk.CTkButton(
+                button_frame, 
+                text="立即備份", 
+                command=lambda n=name: self.backup_instance(n), 
+                width=100, 
+                height=32,
+                font=ctk.CTkFont(size=13, weight="bold"),
+                fg_color="#17A2B8", 
+                hover_color="#138496"
+            ).pack(side="left", padx=2)
+            
+            ctk.CTkLabel(row_card, text=str(instance.base_dir), 
+                        font=ctk.CTkFont(size=11),
+                        text_color="gray60").grid(
+                row=1, column=1, columnspan=3, padx=0, pady=(0,10), sticky="w")
+            
+            self.instance_widgets[name] = {
+                "status_label": status_label,
+                "detail_label": detail_label,
+                "toggle_btn": toggle_btn,
+            }
+        
+        self.update_instances_display()
+    
+    def update_instances_display(self):
+        """每 2 秒更新實例頁面的狀態燈號與摘要"""
+        color_map = {
+            "運行": "#28A745",
+            "啟動": "#FFC107",
+            "重啟": "#FFC107",
+            "備份": "#FFC107",
+        }
+        for name, widgets in self.instance_widgets.items():
+            instance = self.instance_manager.get(name)
+            running = instance.server_process is not None
+            status = instance.server_status if running else "關閉"
+            widgets["status_label"].configure(text_color=color_map.get(status, "#DC3545"))
+            
+            detail = f"{status}  |  版本 {instance.server_version}  |  玩家 {len(instance.online_players_names)}"
+            if running:
+                detail += f"  |  運行 {instance._format_duration(int(instance.supervisor.uptime_seconds()))}"
+            widgets["detail_label"].configure(text=detail)
+            
+            if running:
+                widgets["toggle_btn"].configure(text="關閉", fg_color="#DC3545", hover_color="#C82333")
+            else:
+                widgets["toggle_btn"].configure(text="啟動", fg_color="#28A745", hover_color="#218838")
+        
+        if self.instance_widgets:
+            self.after(2000, self.update_instances_display)
+    
+    def toggle_instance_server(self, name):
+        """啟動/關閉指定實例的伺服器"""
+        instance = self.instance_manager.get(name)
+        if instance.server_operation_in_progress:
+            self.show_warning("警告", f"實例 {name} 正在執行其他伺服器操作")
+            return
+        if instance.server_process is None:
+            instance.submit_task(instance.start_server)
+            return
+        if self.ask_yes_no("確認", f"確定要關閉實例 {name} 的伺服器嗎？"):
+            instance.submit_task(instance._do_stop_server)
+    
+    def restart_instance_server(self, name):
+        """重新啟動指定實例的伺服器"""
+        instance = self.instance_manager.get(name)
+        if instance.server_process is None:
+            self.show_warning("警告", f"實例 {name} 的伺服器未運行")
+            return
+        if instance.server_operation_in_progress:
+            self.show_warning("警告", f"實例 {name} 正在執行其他伺服器操作")
+            return
+        if self.ask_yes_no("確認", f"確定要重新啟動實例 {name} 的伺服器嗎？"):
+            instance.is_restarting = True
+            instance.submit_task(instance._do_restart_server)
+    
+    def backup_instance(self, name):
+        """立即備份指定實例（使用該實例設定的通知秒數）"""
+        instance = self.instance_manager.get(name)
+        if instance.server_status == "備份" or instance.update_in_progress:
+            self.show_warning("警告", f"實例 {name} 正在備份或更新")
+            return
+        instance.submit_task(instance.perform_backup_with_notification,
+                             instance.config["backup_notify_seconds"], False)
+    
+    def _on_instance_log(self, name, message):
+        """其他實例的日誌寫入控制面板記錄（可能由背景執行緒呼叫）"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        log_entry = f"[{timestamp}] [{name}] {message}\n"
+        
+        def append():
+            if hasattr(self, 'log_text'):
+                self.log_text.insert("end", log_entry)
+                self.log_text.see("end")
+        self.after(0, append)
+    
+    def create_console_settings_page(self):
+        """建立控制面板設定頁面"""
+        page = ctk.CTkFrame(self.content_frame, corner_radius=0, fg_color="transparent")
+        page.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        page.grid_rowconfigure(2, weight=1)
+        page.grid_columnconfigure(0, weight=1)
+        self.pages["控制面板設定"] = page
+
         # 主卡片
         main_card = ctk.CTkFrame(page, corner_radius=15, fg_color=("#E8E8E8", "#2B2B2B"))
         main_card.grid(row=0, column=0, rowspan=3, sticky="nsew", padx=10, pady=10)
-        main_card.grid_rowconfigure(2, weight=1)
+        main_card.grid_rowconfigure(3, weight=1)
         main_card.grid_columnconfigure(0, weight=1)
 
         # 標題
@@ -1944,10 +1578,38 @@ class BDSConsole(ctk.CTk):
         )
         theme_menu.grid(row=0, column=1, padx=20, pady=15, sticky="w")
 
+        # 崩潰監控卡片
+        crash_card = ctk.CTkFrame(main_card, corner_radius=12, 
+                                 fg_color=("#D8D8D8", "#1E1E1E"))
+        crash_card.grid(row=2, column=0, sticky="ew", padx=20, pady=10)
+        crash_card.grid_columnconfigure(2, weight=1)
+        
+        ctk.CTkLabel(crash_card, text="崩潰監控", 
+                    font=ctk.CTkFont(size=16, weight="bold")).grid(
+            row=0, column=0, padx=20, pady=15, sticky="w"
+        )
+        self.crash_auto_restart_var = ctk.BooleanVar(value=self.config["crash_auto_restart_enabled"])
+        ctk.CTkSwitch(
+            crash_card,
+            text="伺服器崩潰時自動重啟",
+            variable=self.crash_auto_restart_var,
+            command=self.toggle_crash_auto_restart,
+            font=ctk.CTkFont(size=13)
+        ).grid(row=0, column=1, padx=20, pady=15, sticky="w")
+        
+        self.crash_stats_label = ctk.CTkLabel(
+            crash_card,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="gray70"
+        )
+        self.crash_stats_label.grid(row=0, column=2, padx=20, pady=15, sticky="e")
+        self.update_crash_stats_label()
+
         # 控制面板記錄卡片
         log_card = ctk.CTkFrame(main_card, corner_radius=12, 
                                fg_color=("#D8D8D8", "#1E1E1E"))
-        log_card.grid(row=2, column=0, sticky="nsew", padx=20, pady=10)
+        log_card.grid(row=3, column=0, sticky="nsew", padx=20, pady=10)
         log_card.grid_rowconfigure(1, weight=1)
         log_card.grid_columnconfigure(0, weight=1)
         
@@ -1963,7 +1625,7 @@ class BDSConsole(ctk.CTk):
         # 資訊卡片
         info_card = ctk.CTkFrame(main_card, corner_radius=12, 
                                 fg_color=("#D8D8D8", "#1E1E1E"))
-        info_card.grid(row=3, column=0, sticky="ew", padx=20, pady=(10,20))
+        info_card.grid(row=4, column=0, sticky="ew", padx=20, pady=(10,20))
         info_card.grid_columnconfigure(0, weight=1)
         
         info_text = (
@@ -1978,85 +1640,35 @@ class BDSConsole(ctk.CTk):
         ctk.CTkLabel(info_card, text=info_text, justify="left",
                     font=ctk.CTkFont(size=13)).grid(
             row=0, column=0, padx=20, pady=15, sticky="w")
-
-    
-    def load_server_properties(self):
-        """載入 server.properties"""
-        properties_file = self.server_dir / "server.properties"
-        self.server_properties = {}
-        
-        if properties_file.exists():
-            with open(properties_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        self.server_properties[key] = value
-        else:
-            # 檢查伺服器是否存在
-            server_exe = self.server_dir / "bedrock_server.exe"
-            if server_exe.exists():
-                # 伺服器存在但缺少 server.properties，這是錯誤
-                self.log_message("錯誤：找不到 server.properties 檔案")
-            # 如果伺服器不存在，將在啟動時處理
     
     def save_server_settings(self):
-        """儲存伺服器設定"""
+        """儲存伺服器設定（可即時套用的設定不重啟，其餘詢問立即重啟或等待維護時段）"""
         try:
-            # 備份舊設定
-            self.backup_server_settings()
+            result = self.apply_server_settings({key: var.get() for key, var in self.settings_vars.items()})
             
-            # 更新設定
-            for key, var in self.settings_vars.items():
-                self.server_properties[key] = var.get()
+            if not result["changed"]:
+                self.show_info("提示", "設定沒有變更")
+                return
             
-            # 寫入檔案
-            properties_file = self.server_dir / "server.properties"
-            with open(properties_file, 'w', encoding='utf-8') as f:
-                f.write("# Minecraft Bedrock Server Properties\n")
-                for key, value in self.server_properties.items():
-                    f.write(f"{key}={value}\n")
+            if not result["restart"]:
+                if result["live"]:
+                    self.show_info("成功", "設定已儲存並立即套用，不需要重新啟動伺服器")
+                else:
+                    self.show_info("成功", "設定已儲存，將於下次啟動伺服器時生效")
+                return
             
-            self.show_info("成功", "設定已儲存,伺服器將重新啟動")
-            self._do_restart_server()
+            restart_now = self.ask_yes_no("需要重新啟動",
+                "設定已儲存，下列設定需要重新啟動伺服器才會生效：\n"
+                f"{', '.join(result['restart'])}\n\n"
+                "是：立即重新啟動\n否：等待維護時段（玩家全部離線後或延後期限到達時）重新啟動")
+            if restart_now:
+                self._do_restart_server()
+            else:
+                self.schedule_settings_restart()
             
         except Exception as e:
             self.show_error("錯誤", f"儲存設定失敗: {str(e)}")
     
-    def backup_server_settings(self):
-        """備份伺服器設定檔"""
-        backup_folder = self.backup_dir / "server_settings"
-        
-        # 刪除舊備份
-        for file in backup_folder.glob("*"):
-            file.unlink()
-        
-        # 建立新備份
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        files_to_backup = ["server.properties", "allowlist.json", "permissions.json"]
-        
-        for filename in files_to_backup:
-            src = self.server_dir / filename
-            if src.exists():
-                dst = backup_folder / f"{timestamp}_{filename}"
-                shutil.copy2(src, dst)
-    
-    
-    def load_json_file(self, filepath, default=None):
-        """載入JSON檔案"""
-        if filepath.exists():
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return default if default is not None else {}
-        return default if default is not None else {}
-    
-    def save_json_file(self, filepath, data):
-        """儲存JSON檔案"""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-    
     def _disable_server_operation_buttons(self):
         """禁用伺服器操作按鈕（啟動/關閉/重啟）"""
         if hasattr(self, 'toggle_server_btn'):
@@ -2121,142 +1733,6 @@ class BDSConsole(ctk.CTk):
     # 伺服器控制方法
     # ========================================================================
     
-    def start_server(self):
-        """
-        啟動 Bedrock 伺服器
-        
-        功能:
-            - 檢查伺服器檔案是否存在
-            - 執行啟動前備份（若需要）
-            - 啟動伺服器進程
-            - 建立輸出監控執行緒
-            - 更新 UI 狀態
-        
-        用途:
-            啟動 Minecraft Bedrock Dedicated Server
-        """
-        if self.server_process is not None:
-            self.show_warning("警告", "伺服器已在運行中")
-            return
-        
-        try:
-            # 設置操作進行中狀態
-            self.server_operation_in_progress = True
-            self._disable_server_operation_buttons()
-            
-            self.update_status("啟動", "yellow")
-            self.log_message("正在啟動伺服器...")
-            
-            server_exe = self.server_dir / "bedrock_server.exe"
-            if not server_exe.exists():
-                # 詢問是否自動下載
-                result = self.ask_yes_no(
-                    "找不到伺服器檔案",
-                    "找不到 bedrock_server.exe\n\n是否自動下載最新版本的 Bedrock Server？\n\n點擊「是」將自動下載並安裝\n點擊「否」將退出程式"
-                )
-                
-                if result:
-                    # 使用者選擇下載
-                    self.log_message("自動下載伺服器...")
-                    threading.Thread(target=self._auto_download_and_install_server, daemon=True).start()
-                else:
-                    # 使用者選擇不下載，退出程式
-                    self.log_message("找不到伺服器檔案，程式即將退出...")
-                    self.show_info("提示", "程式將退出")
-                    self.destroy()
-                
-                self.update_status("關閉", "red")
-                return
-            
-            # 檢查是否需要執行啟動前備份
-            if self._check_and_perform_startup_backup():
-                self.log_message("啟動前備份已完成，繼續啟動伺服器...")
-            
-            # 啟動伺服器進程
-            # 在 Windows 上設定 CREATE_NO_WINDOW 來隱藏命令提示字元視窗
-            creation_flags = CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-            
-            self.server_process = subprocess.Popen(
-                [str(server_exe)],
-                cwd=str(self.server_dir),
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                creationflags=creation_flags
-            )
-            
-            # 啟動輸出讀取執行緒
-            threading.Thread(target=self.read_server_output, daemon=True).start()
-            
-            self.update_toggle_button()
-            self._update_command_entry_state()
-            
-            # 啟動後同步難度顯示（延遲執行，確保伺服器已初始化）
-            self.after(5000, self.sync_difficulty_after_restart)
-            
-            # 注意：狀態將由 parse_server_output 檢測到 "Server started" 時更新
-            
-        except Exception as e:
-            self.show_error("錯誤", f"啟動失敗: {str(e)}")
-            self.server_operation_in_progress = False
-            self._enable_server_operation_buttons()
-            self.update_status("關閉", "red")
-            self.update_toggle_button()
-    
-    def _check_and_perform_startup_backup(self):
-        """檢查是否需要在啟動前執行備份
-        如果上次備份時間已超過設定週期，則立即執行備份（忽略提前通知）
-        
-        Returns:
-            bool: 是否執行了備份
-        """
-        if not self.config["auto_backup_enabled"]:
-            return False
-        
-        if not self.last_auto_backup_time:
-            # 如果從未執行過自動備份，執行一次
-            self.log_message("從未執行自動備份，執行首次備份...")
-            self._perform_backup(is_auto=True)
-            return True
-        
-        from datetime import datetime, timedelta
-        
-        now = datetime.now()
-        freq_type = self.config["backup_frequency_type"]
-        time_since_last = now - self.last_auto_backup_time
-        
-        needs_backup = False
-        
-        if freq_type == "hours":
-            hours = self.config["backup_frequency_value"]
-            if time_since_last >= timedelta(hours=hours):
-                self.log_message(f"上次備份距今已超過 {hours} 小時，啟動前執行備份...")
-                needs_backup = True
-        
-        elif freq_type == "daily":
-            if time_since_last >= timedelta(days=1):
-                self.log_message("上次備份距今已超過 1 天，啟動前執行備份...")
-                needs_backup = True
-        
-        elif freq_type == "weekly":
-            if time_since_last >= timedelta(weeks=1):
-                self.log_message("上次備份距今已超過 1 週，啟動前執行備份...")
-                needs_backup = True
-        
-        elif freq_type == "monthly":
-            # 粗略計算，30天為一個月
-            if time_since_last >= timedelta(days=30):
-                self.log_message("上次備份距今已超過 1 個月，啟動前執行備份...")
-                needs_backup = True
-        
-        if needs_backup:
-            self._perform_backup(is_auto=True)
-            return True
-        
-        return False
-    
     def _disable_operation_buttons(self):
         """禁用操作按鈕（執行期間）"""
         if hasattr(self, 'manual_backup_btn'):
@@ -2297,66 +1773,6 @@ class BDSConsole(ctk.CTk):
         # 使用執行緒避免 UI 阻塞
         threading.Thread(target=self._do_stop_server, daemon=True).start()
     
-    def _do_stop_server(self):
-        """
-        實際執行關閉伺服器操作
-        
-        功能:
-            - 發送 stop 命令到伺服器
-            - 等待進程結束
-            - 清理資源
-            - 更新 UI 狀態
-        
-        用途:
-            內部方法，執行實際的關閉流程
-        """
-        if self.server_process is None:
-            return
-        
-        try:
-            # 設置操作進行中狀態
-            self.server_operation_in_progress = True
-            self.after(0, self._disable_server_operation_buttons)
-            
-            self.after(0, lambda: self.update_status("關閉", "yellow"))
-            self.log_message("正在關閉伺服器...")
-            
-            # 發送stop命令
-            self.server_process.stdin.write("stop\n")
-            self.server_process.stdin.flush()
-            
-            # 等待進程結束
-            self.server_process.wait(timeout=30)
-            self.server_process = None
-            
-            # 清空在線玩家列表
-            self.online_players_names.clear()
-            self.after(0, self.update_players_management_display)
-            self.after(0, self.update_player_count)
-            
-            self.after(0, self.update_toggle_button)
-            self.after(0, self._update_command_entry_state)
-            # 注意：狀態和按鈕將由 parse_server_output 檢測到 "Quit correctly" 時更新
-            
-        except Exception as e:
-            # 強制終止
-            if self.server_process:
-                self.server_process.kill()
-                self.server_process = None
-            
-            # 清空在線玩家列表
-            self.online_players_names.clear()
-            self.after(0, self.update_players_management_display)
-            self.after(0, self.update_player_count)
-            
-            self.server_operation_in_progress = False
-            self.after(0, self._enable_server_operation_buttons)
-            self.after(0, lambda: self.update_status("關閉", "red"))
-            self.after(0, self.update_toggle_button)
-            self.after(0, self._update_command_entry_state)
-            self.log_message(f"伺服器已強制關閉: {str(e)}")
-
-    
     def restart_server(self):
         """
         重新啟動伺服器
@@ -2385,215 +1801,106 @@ class BDSConsole(ctk.CTk):
         # 使用線程執行重啟操作，避免UI阻塞
         threading.Thread(target=self._do_restart_server, daemon=True).start()
     
-    def _do_restart_server(self):
-        """實際執行重啟操作"""
-        try:
-            self.log_message("重新啟動伺服器...")
-            # 調用內部關閉方法（不帶確認框）
-            self._do_stop_server()
-            time.sleep(2)
-            self.start_server()
-            # start_server() 會自動同步難度顯示
-            # 啟動完成後清除重啟標誌（延遲執行，確保 Server started 已處理）
-            self.after(10000, self._clear_restarting_flag)
-        except Exception as e:
-            self.log_message(f"重啟過程出錯: {str(e)}")
-            self.after(0, self._clear_restarting_flag)
-    
-    def _clear_restarting_flag(self):
-        """清除重啟標誌"""
-        self.is_restarting = False
-        self.log_message("重啟流程結束")
-    
     def sync_difficulty_after_restart(self):
         """啟動/重啟後同步難度顯示（不發送命令）"""
-        # 重新讀取 server.properties 的難度，並同步到介面顯示
-        self.load_server_properties()
+        # 確認 server.properties 的難度，並同步到介面顯示
+        super().sync_difficulty_after_restart()
         difficulty = self.server_properties.get("difficulty", "normal")
         self.difficulty_var.set(difficulty)
     
-    def read_server_output(self):
-        """讀取伺服器輸出"""
-        try:
-            for line in iter(self.server_process.stdout.readline, ''):
-                if not line:
-                    break
-                
-                line = line.strip()
-                self.console_output.insert("end", line + "\n")
-                self.console_output.see("end")
-                
-                # 解析輸出
-                self.parse_server_output(line)
-                
-        except Exception as e:
-            self.log_message(f"讀取輸出錯誤: {str(e)}")
+    def on_server_properties_changed(self, changed):
+        """server.properties 被外部修改：只更新有變動的欄位，不重建頁面"""
+        if not self.settings_vars and self.server_properties:
+            # 設定頁面原本顯示「未找到 server.properties」，重新建立
+            self.on_server_installed()
+        else:
+            for key, value in changed.items():
+                if key in self.settings_vars:
+                    self.settings_vars[key].set(value)
+        
+        if "difficulty" in changed:
+            self.difficulty_var.set(changed["difficulty"])
+        if "max-players" in changed:
+            self.update_player_count()
     
-    def parse_server_output(self, line):
-        """解析伺服器輸出"""
-        # 檢測伺服器狀態變化
-        if "Starting Server" in line:
-            # 伺服器開始啟動
-            self.server_operation_in_progress = True
-            self.after(0, self._disable_server_operation_buttons)
-            self.after(0, lambda: self.update_status("啟動", "yellow"))
-        
-        elif "Server started" in line or "Server running" in line:
-            # 伺服器啟動完成
-            self.server_operation_in_progress = False
-            self.is_restarting = False  # 清除重啟標誌
-            self.after(0, self._enable_server_operation_buttons)
-            self.after(0, self._update_command_entry_state)
-            self.after(0, lambda: self.update_status("運行", "green"))
-            self.log_message("已啟動伺服器")
-        
-        elif "Stopping server" in line or "Stopping Server" in line:
-            # 伺服器開始關閉
-            self.server_operation_in_progress = True
-            self.after(0, self._disable_server_operation_buttons)
-            self.after(0, lambda: self.update_status("關閉", "yellow"))
-        
-        elif "Quit correctly" in line:
-            # 伺服器正確退出
-            if not self.is_restarting:
-                # 如果不是重啟過程，則結束操作狀態
-                self.server_operation_in_progress = False
-                self.after(0, self._enable_server_operation_buttons)
-                self.after(0, self._update_command_entry_state)
-                self.after(0, lambda: self.update_status("關閉", "red"))
-                self.log_message("已關閉伺服器")
+    def on_player_access_changed(self, xuids):
+        """白名單/權限被外部修改：只更新有變動玩家的勾選框與權限選單"""
+        for xuid in xuids:
+            ui_vars = self.player_ui_vars.get(xuid)
+            if ui_vars is None:
+                continue
+            ui_vars["allowlist_var"].set(xuid in self.allowlisted_xuids)
+            ui_vars["perm_var"].set(self.player_permissions.get(xuid, "member"))
+    
+    def update_uptime_label(self):
+        """定期更新運行時間標籤"""
+        if hasattr(self, 'uptime_label'):
+            if self.server_process is not None:
+                total_minutes = int(self.supervisor.uptime_seconds()) // 60
+                hours, minutes = divmod(total_minutes, 60)
+                days, hours = divmod(hours, 24)
+                if days > 0:
+                    text = f"{days}天{hours}時{minutes}分"
+                else:
+                    text = f"{hours}時{minutes}分"
             else:
-                # 重啟過程中，保持操作狀態，保持黃色燈號
-                self.after(0, lambda: self.update_status("重啟", "yellow"))
-        
-        # 檢測版本 - 格式: [2025-10-12 21:48:08:511 INFO] Version: 1.21.113.1
-        if "Version:" in line or "Version :" in line:
-            import re
-            # 匹配版本號格式 (例如: 1.21.113.1)
-            version_pattern = r'Version[:\s]+(\d+\.\d+\.\d+\.\d+)'
-            match = re.search(version_pattern, line)
-            if match:
-                self.server_version = match.group(1)
-                self.version_label.configure(text=self.server_version)
-                self.current_version_label.configure(text=self.server_version)
-                self.log_message(f"伺服器版本: {self.server_version}")
-        
-        # 檢測玩家加入/離開
-        if "Player connected" in line or "Player disconnected" in line:
-            
-            # 提取玩家資訊 - 格式: Player connected: PlayerName, xuid: 1234567890
-            if "Player connected" in line:
-                try:
-                    import re
-                    # 提取玩家名稱
-                    name_match = re.search(r'Player connected:\s*([^,]+)', line)
-                    # 提取 XUID
-                    xuid_match = re.search(r'xuid:\s*(\d+)', line, re.IGNORECASE)
-                    
-                    if name_match and xuid_match:
-                        name = name_match.group(1).strip()
-                        xuid = xuid_match.group(1).strip()
-                        
-                        # 獲取當前時間
-                        from datetime import datetime
-                        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        
-                        # 添加到在線玩家列表（確保添加成功）
-                        if name not in self.online_players_names:
-                            self.online_players_names.append(name)
-                        
-                        player_exists = False
-                        for player in self.player_list:
-                            if player.get("xuid") == xuid:
-                                player["last_online"] = current_time
-                                player_exists = True
-                                break
-                        
-                        if not player_exists:
-                            self.player_list.append({
-                                "name": name,
-                                "xuid": xuid,
-                                "last_online": current_time
-                            })
-                            self.log_message(f"新玩家加入: {name} (XUID: {xuid})")
-                            self.auto_add_to_allowlist(name, xuid)
-                        
-                        self.save_player_list()
-                        self.update_player_count()
-                        self.update_players_management_display()
-                except Exception as e:
-                    self.log_message(f"解析玩家資訊失敗: {str(e)}")
-            
-            # 玩家離開
-            if "Player disconnected" in line:
-                try:
-                    import re
-                    name_match = re.search(r'Player disconnected:\s*([^,]+)', line)
-                    if name_match:
-                        name = name_match.group(1).strip()
-                        self.log_message(f"玩家離開: {name}")
-                        
-                        if name in self.online_players_names:
-                            self.online_players_names.remove(name)
-                            self.update_player_count()
-                            self.update_players_management_display()
-                except Exception as e:
-                    # 忽略解析錯誤，記錄並繼續處理其他訊息
-                    self.log_message(f"解析玩家離開訊息失敗: {str(e)}")
-            
-            self.update_player_count()
-        
-        # 檢測玩家 spawned（完全進入遊戲）
-        if "Player Spawned" in line or "spawned" in line.lower():
-            try:
-                import re
-                # 嘗試多種格式匹配玩家名稱
-                # 格式可能是: "Player Spawned: PlayerName" 或 "PlayerName spawned"
-                name_match = re.search(r'(?:Player Spawned:\s*|spawned:\s*)([^,\s]+)', line, re.IGNORECASE)
-                if not name_match:
-                    # 嘗試另一種格式: "PlayerName spawned"
-                    name_match = re.search(r'([^\s]+)\s+spawned', line, re.IGNORECASE)
-                
-                if name_match:
-                    name = name_match.group(1).strip()
-                    
-                    # 檢查是否在更新通知期間，如果是則立即發送通知
-                    if self.update_notification_active and self.update_remaining_seconds > 0:
-                        threading.Thread(
-                            target=self.send_immediate_update_notification,
-                            args=(name,),
-                            daemon=True
-                        ).start()
-            except Exception as e:
-                self.log_message(f"解析 spawned 訊息失敗: {str(e)}")
-
+                text = "-"
+            self.uptime_label.configure(text=text)
+        self.after(30000, self.update_uptime_label)
     
-    def auto_add_to_allowlist(self, name, xuid):
-        """自動添加玩家到白名單"""
-        try:
-            allowlist_file = self.server_dir / "allowlist.json"
-            allowlist = self.load_json_file(allowlist_file, [])
-            
-            if not any(p.get("xuid") == xuid for p in allowlist):
-                allowlist.append({
-                    "ignoresPlayerLimit": False,
-                    "name": name,
-                    "xuid": xuid
-                })
-                self.save_json_file(allowlist_file, allowlist)
-            
-            permissions_file = self.server_dir / "permissions.json"
-            permissions = self.load_json_file(permissions_file, [])
-            
-            if not any(p.get("xuid") == xuid for p in permissions):
-                permissions.append({
-                    "permission": "member",
-                    "xuid": xuid
-                })
-                self.save_json_file(permissions_file, permissions)
-                
-        except Exception as e:
-            self.log_message(f"自動添加白名單失敗: {str(e)}")
+    def update_resource_display(self):
+        """
+        更新狀態頁的資源監控趨勢圖（主執行緒）
+        
+        功能:
+            - 以環狀緩衝區的歷史資料繪製 CPU、記憶體、磁碟 I/O、執行緒趨勢圖
+            - 顯示最新數值與記憶體峰值
+            - 伺服器未運行時保留最後的趨勢圖並標示已停止
+        """
+        if not hasattr(self, 'resource_widgets'):
+            return
+        sampler = self.resource_sampler
+        latest = sampler.latest()
+        width = RESOURCE_SPARKLINE_WIDTH
+        
+        if latest is None:
+            for spark_label, value_label in self.resource_widgets.values():
+                spark_label.configure(text="")
+                value_label.configure(text="-")
+        else:
+            rss_series = sampler.series("rss_mb")
+            io_series = [(s["read_kbps"] or 0) + (s["write_kbps"] or 0) for s in list(sampler.samples)]
+            thread_key = "threads" if latest["threads"] is not None else "handles"
+            
+            def format_rate(kbps):
+                if kbps is None:
+                    return "-"
+                return f"{kbps / 1024:.1f} MB/s" if kbps >= 1024 else f"{kbps:.0f} KB/s"
+            
+            charts = {
+                "cpu": (render_sparkline(sampler.series("cpu"), width, max_value=100),
+                        f"{latest['cpu']:.1f}%"),
+                "rss_mb": (render_sparkline(rss_series, width),
+                           f"{latest['rss_mb']:.0f} MB（峰值 {max(rss_series):.0f} MB）"),
+                "io": (render_sparkline(io_series, width),
+                       f"讀 {format_rate(latest['read_kbps'])} / 寫 {format_rate(latest['write_kbps'])}"),
+                "threads": (render_sparkline(sampler.series(thread_key), width),
+                            f"{latest['threads'] if latest['threads'] is not None else '-'}"
+                            f" / {latest['handles'] if latest['handles'] is not None else '-'}"),
+            }
+            for key, (spark, value) in charts.items():
+                spark_label, value_label = self.resource_widgets[key]
+                spark_label.configure(text=spark)
+                value_label.configure(text=value)
+        
+        if sampler.running:
+            self.resource_time_label.configure(
+                text=f"每 {self.config['resource_sample_interval']} 秒取樣 · 最後更新 {latest['timestamp'] if latest else '-'}"
+            )
+        elif latest is not None:
+            self.resource_time_label.configure(text=f"已停止 · 最後取樣 {latest['timestamp']}")
+        else:
+            self.resource_time_label.configure(text="伺服器未運行")
     
     def update_player_count(self):
         """更新玩家數量"""
@@ -2633,9 +1940,6 @@ class BDSConsole(ctk.CTk):
             self.players_management_widgets.clear()
             self.player_ui_vars.clear()
             
-            allowlist = self.load_json_file(self.server_dir / "allowlist.json", [])
-            permissions = self.load_json_file(self.server_dir / "permissions.json", [])
-            
             header_frame = ctk.CTkFrame(self.players_management_frame, fg_color="transparent")
             header_frame.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
             header_frame.grid_columnconfigure(0, weight=2, minsize=150)
@@ -2724,7 +2028,8 @@ class BDSConsole(ctk.CTk):
                     )
                     last_online_label.grid(row=0, column=2, padx=10, pady=8, sticky="w")
                     
-                    in_allowlist = any(p.get("xuid") == xuid for p in allowlist)
+                    # 白名單與權限使用記憶體副本（檔案監看保持最新）
+                    in_allowlist = xuid in self.allowlisted_xuids
                     allowlist_var = ctk.BooleanVar(value=in_allowlist)
                     allowlist_check = ctk.CTkCheckBox(
                         player_frame,
@@ -2734,11 +2039,7 @@ class BDSConsole(ctk.CTk):
                     )
                     allowlist_check.grid(row=0, column=3, padx=10, pady=8)
                     
-                    perm_level = "member"
-                    for p in permissions:
-                        if p.get("xuid") == xuid:
-                            perm_level = p.get("permission", "member")
-                            break
+                    perm_level = self.player_permissions.get(xuid, "member")
                     
                     perm_var = ctk.StringVar(value=perm_level)
                     perm_menu = ctk.CTkOptionMenu(
@@ -2766,48 +2067,130 @@ class BDSConsole(ctk.CTk):
             self.update_pending = False
     
     def save_players_permissions(self):
-        """儲存玩家權限設定（只使用 self.player_list）"""
+        """儲存玩家權限設定（只使用 self.player_list，伺服器運行中時即時套用）"""
         try:
-            # 備份
-            self.backup_server_settings()
-            
-            # 建立 allowlist 和 permissions
-            allowlist = []
-            permissions = []
-            
             # 遍歷 self.player_list 並使用 self.player_ui_vars 獲取 UI 狀態
-            for player in self.player_list:
+            desired = {}
+            with self.player_access_lock:
+                players = list(self.player_list)
+            for player in players:
                 xuid = player.get("xuid", "")
-                name = player.get("name", "")
                 
                 # 🔧 從單獨的 UI 變數字典中獲取值
                 if xuid in self.player_ui_vars:
                     ui_vars = self.player_ui_vars[xuid]
+                    desired[xuid] = {
+                        "name": player.get("name", ""),
+                        "allowlisted": ui_vars["allowlist_var"].get(),
+                        "permission": ui_vars["perm_var"].get()
+                    }
                     
-                    # 檢查白名單
-                    if ui_vars["allowlist_var"].get():
-                        allowlist.append({
-                            "ignoresPlayerLimit": False,
-                            "name": name,
-                            "xuid": xuid
-                        })
+            # 備份後只寫入有變更的檔案，並以命令即時套用
+            self.backup_server_settings()
+            result = self.apply_player_access(desired)
                     
-                    # 添加權限
-                    permissions.append({
-                        "permission": ui_vars["perm_var"].get(),
-                        "xuid": xuid
-                    })
-            
-            # 儲存檔案
-            self.save_json_file(self.server_dir / "allowlist.json", allowlist)
-            self.save_json_file(self.server_dir / "permissions.json", permissions)
+            if not any(result.values()):
+                self.show_info("提示", "玩家權限沒有變更")
+                return
             
-            self.show_info("成功", "玩家權限已儲存")
+            applied = "，已即時套用" if self.server_process is not None else ""
+            self.show_info(
+                "成功",
+                f"玩家權限已儲存{applied}\n"
+                f"白名單新增 {len(result['allowlist_added'])} 位、移除 {len(result['allowlist_removed'])} 位\n"
+                f"權限變更 {len(result['permission_changed'])} 位"
+            )
             self.log_message("已儲存玩家權限設定")
             
         except Exception as e:
             self.show_error("錯誤", f"儲存權限失敗: {str(e)}")
-
+    
+    def import_players_file(self):
+        """選擇 CSV / JSON Lines 檔案，預覽後批次匯入玩家名單（讀取與套用在背景執行）"""
+        path = filedialog.askopenfilename(
+            title="匯入玩家名單",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl *.ndjson"), ("所有檔案", "*.*")]
+        )
+        if not path:
+            return
+        
+        self.log_message(f"正在讀取玩家名單: {path}")
+        self.submit_task(self._run_import_players, path, True)
+    
+    def _run_import_players(self, path, dry_run):
+        """
+        匯入玩家名單（工作執行緒）
+        
+        Args:
+            path: 檔案路徑
+            dry_run: True 為預覽（完成後詢問是否套用），False 為實際套用
+        """
+        try:
+            report = self.import_players(path, dry_run=dry_run)
+        except Exception as e:
+            message = f"{'讀取' if dry_run else '匯入'}玩家名單失敗: {str(e)}"
+            self.call_later(0, lambda: self.show_error("錯誤", message))
+            return
+        
+        if dry_run:
+            self.call_later(0, lambda: self._confirm_import_players(path, report))
+        else:
+            self.call_later(0, lambda: self._show_import_result(report))
+    
+    def _confirm_import_players(self, path, preview):
+        """顯示匯入預覽，確認後在背景套用"""
+        summary = self._format_import_report(preview)
+        if not preview["players"]:
+            self.show_warning("匯入玩家名單", f"沒有可匯入的玩家\n\n{summary}")
+            return
+        if not self.ask_yes_no("確認匯入", f"{summary}\n\n確定要套用嗎？"):
+            return
+        
+        self.submit_task(self._run_import_players, path, False)
+    
+    def _show_import_result(self, report):
+        """顯示匯入結果"""
+        applied = report["applied"]
+        if applied is None:
+            self.show_warning("匯入玩家名單", "沒有可匯入的玩家")
+            return
+        self.show_info(
+            "匯入完成",
+            f"已匯入 {report['players']} 位玩家（新增 {report['new_players']} 位）\n"
+            f"白名單新增 {applied['allowlist_added']} 位、移除 {applied['allowlist_removed']} 位\n"
+            f"權限變更 {applied['permission_changed']} 位"
+        )
+    
+    def _format_import_report(self, report):
+        """將匯入報告整理成對話框文字"""
+        lines = [
+            f"讀取 {report['rows']} 行，可匯入 {report['players']} 位玩家（新玩家 {report['new_players']} 位）",
+            f"重複 {report['duplicates']}、衝突 {report['conflicts']}、錯誤 {report['errors']}",
+        ]
+        if report["samples"]:
+            lines.append("")
+            lines.extend(report["samples"])
+            remaining = report["conflicts"] + report["errors"] - len(report["samples"])
+            if remaining > 0:
+                lines.append(f"...另有 {remaining} 筆")
+        return "\n".join(lines)
+    
+    def export_players_file(self):
+        """匯出玩家名單為 CSV / JSON Lines"""
+        path = filedialog.asksaveasfilename(
+            title="匯出玩家名單",
+            defaultextension=".csv",
+            initialfile="players.csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")]
+        )
+        if not path:
+            return
+        
+        try:
+            count = self.export_players(path)
+            self.show_info("匯出完成", f"已匯出 {count} 位玩家\n{path}")
+        except Exception as e:
+            self.show_error("錯誤", f"匯出玩家名單失敗: {str(e)}")
     
     def send_command(self):
         """發送命令到伺服器"""
@@ -2827,33 +2210,9 @@ class BDSConsole(ctk.CTk):
         except Exception as e:
             self.show_error("錯誤", f"發送命令失敗: {str(e)}")
     
-    def change_difficulty(self, difficulty):
-        """修改遊戲難度"""
-        if self.server_process is not None:
-            command = f"difficulty {difficulty}"
-            try:
-                self.server_process.stdin.write(command + "\n")
-                self.server_process.stdin.flush()
-                self.log_message(f"難度已更改為: {difficulty}")
-            except Exception as e:
-                self.log_message(f"更改難度失敗: {str(e)}")
-        else:
-            self.log_message(f"伺服器未運行，難度選擇僅顯示，不會生效")
-    
-    def save_server_properties_file(self):
-        """單獨儲存 server.properties 檔案（不重啟伺服器）"""
-        try:
-            properties_file = self.server_dir / "server.properties"
-            with open(properties_file, 'w', encoding='utf-8') as f:
-                f.write("# Minecraft Bedrock Server Properties\n")
-                for key, value in self.server_properties.items():
-                    f.write(f"{key}={value}\n")
-        except Exception as e:
-            self.log_message(f"儲存設定檔失敗: {str(e)}")
-    
     def update_status(self, status, color):
         """更新伺服器狀態顯示（圓圈燈號）"""
-        self.server_status = status
+        super().update_status(status, color)
         color_map = {
             "green": "#28A745",   # 綠色 = 運行中
             "yellow": "#FFC107",  # 黃色 = 啟動中
@@ -2861,8 +2220,6 @@ class BDSConsole(ctk.CTk):
         }
         indicator_color = color_map.get(color, "#808080")  # 預設灰色
         self.status_indicator.configure(text_color=indicator_color)
-
-    
     
     def update_backup_frequency_ui(self, freq_type):
         """更新備份頻率設定介面"""
@@ -3098,7 +2455,6 @@ class BDSConsole(ctk.CTk):
                     self.config["backup_day"] = int(self.backup_day_var.get())
             
             self.save_config()
-            self.setup_schedules()
             
             self.log_message("已儲存備份設定")
             
@@ -3221,7 +2577,6 @@ class BDSConsole(ctk.CTk):
                     self.config["update_day"] = int(self.update_day_var.get())
             
             self.save_config()
-            self.setup_schedules()
             
             self.log_message("已儲存更新設定")
             
@@ -3412,7 +2767,6 @@ class BDSConsole(ctk.CTk):
         
         self.config["auto_backup_enabled"] = enabled
         self.save_config()
-        self.setup_schedules()
         status = "啟用" if enabled else "停用"
         self.log_message(f"自動備份已{status}")
         
@@ -3492,7 +2846,6 @@ class BDSConsole(ctk.CTk):
         
         self.config["auto_update_enabled"] = enabled
         self.save_config()
-        self.setup_schedules()
         status = "啟用" if enabled else "停用"
         self.log_message(f"自動更新已{status}")
         
@@ -3546,6 +2899,84 @@ class BDSConsole(ctk.CTk):
             if hasattr(self, 'update_save_settings_btn'):
                 self.update_save_settings_btn.configure(state="disabled", fg_color="#6C757D", hover_color="#6C757D")
     
+    def toggle_auto_restart(self):
+        """切換每日定時重啟"""
+        enabled = self.auto_restart_var.get()
+        
+        if enabled != self.config["auto_restart_enabled"]:
+            self.config["auto_restart_enabled"] = enabled
+            self.save_config()
+            status = "啟用" if enabled else "停用"
+            self.log_message(f"定時重啟已{status}")
+        
+        # 停用時取消進行中的重啟倒數
+        if not enabled and self.restart_countdown:
+            self.restart_countdown.cancel()
+        
+        # 控制相關控件的啟用/禁用狀態和顏色
+        if enabled:
+            for menu in (self.restart_hour_menu, self.restart_minute_menu):
+                menu.configure(state="normal", fg_color=["#3B8ED0", "#1F6AA5"], button_color=["#3B8ED0", "#1F6AA5"], button_hover_color=["#36719F", "#144870"])
+        else:
+            for menu in (self.restart_hour_menu, self.restart_minute_menu):
+                menu.configure(state="disabled", fg_color="#6C757D", button_color="#6C757D", button_hover_color="#6C757D")
+        
+        self.update_next_restart_time()
+    
+    def on_restart_time_change(self, value):
+        """重啟時間改變時自動儲存並重設排程"""
+        self.config["restart_time_hour"] = int(self.restart_hour_var.get())
+        self.config["restart_time_minute"] = int(self.restart_minute_var.get())
+        self.save_config()
+        self.update_next_restart_time()
+        self.log_message(f"定時重啟時間已設為 {self.config['restart_time_hour']:02d}:{self.config['restart_time_minute']:02d}")
+    
+    def on_restart_notify_change(self, value):
+        """重啟通知時間改變時自動儲存"""
+        int_value = int(float(value))
+        self.restart_notify_label.configure(text=f"{int_value}分")
+        self.config["restart_notify_minutes"] = int_value
+        self.save_config()
+    
+    def toggle_maintenance_defer(self):
+        """切換維護時段的玩家在線延後"""
+        enabled = self.maintenance_defer_var.get()
+        self.config["maintenance_defer_enabled"] = enabled
+        self.save_config()
+        status = "啟用" if enabled else "停用"
+        self.log_message(f"維護延後已{status}")
+    
+    def on_maintenance_defer_change(self, value):
+        """最長延後時間改變時自動儲存"""
+        self.config["maintenance_max_defer_minutes"] = int(value)
+        self.save_config()
+        self.log_message(f"維護最長延後時間已設為 {value} 分鐘")
+    
+    def toggle_update_canary(self):
+        """切換更新前試啟動"""
+        enabled = self.update_canary_var.get()
+        self.config["update_canary_enabled"] = enabled
+        self.save_config()
+        status = "啟用" if enabled else "停用"
+        self.log_message(f"更新前試啟動已{status}")
+    
+    def update_next_restart_time(self):
+        """更新下次重啟時間標籤"""
+        if not hasattr(self, 'next_restart_label'):
+            return
+        
+        if not self.config["auto_restart_enabled"]:
+            self.next_restart_label.configure(text="未啟用")
+            return
+        
+        now = datetime.now()
+        next_time = now.replace(hour=self.config["restart_time_hour"],
+                                minute=self.config["restart_time_minute"],
+                                second=0, microsecond=0)
+        if next_time <= now:
+            next_time += timedelta(days=1)
+        self.next_restart_label.configure(text=next_time.strftime("%Y-%m-%d %H:%M:%S"))
+    
     def auto_save_backup_settings(self):
         """自動儲存備份設定（不顯示訊息）"""
         try:
@@ -3568,7 +2999,6 @@ class BDSConsole(ctk.CTk):
                     self.config["backup_day"] = int(self.backup_day_var.get())
             
             self.save_config()
-            self.setup_schedules()
             
             # 更新下次備份時間顯示
             self.update_next_backup_time()
@@ -3596,7 +3026,6 @@ class BDSConsole(ctk.CTk):
                     self.config["update_day"] = int(self.update_day_var.get())
             
             self.save_config()
-            self.setup_schedules()
         except Exception as e:
             self.log_message(f"自動儲存更新設定時發生錯誤: {str(e)}")
     
@@ -3688,14 +3117,71 @@ class BDSConsole(ctk.CTk):
         else:
             # 沒有通知時間，直接進入更新階段
             self.update_in_progress = True
-            self.force_update_btn.configure(
-                text="手動更新",
-                state="disabled",
-                fg_color="#6C757D",
-                hover_color="#6C757D"
-            )
+            self._lock_update_button()
             threading.Thread(target=self._perform_update, daemon=True).start()
     
+    def update_release_cache_display(self):
+        """更新版本庫下拉選單（已安裝的版本資料夾在前，其次為已快取的安裝檔）與回滾按鈕"""
+        if not hasattr(self, 'release_menu'):
+            return
+        versions = [release["version"] for release in self.versions.versions()]
+        versions += [release["version"] for release in self.shared.download_cache.versions()
+                     if release["version"] not in versions]
+        
+        previous = self.versions.previous()
+        if previous:
+            self.release_rollback_btn.configure(text=f"回滾至 {previous}", state="normal",
+                                                fg_color="#17A2B8", hover_color="#138496")
+        else:
+            self.release_rollback_btn.configure(text="回滾上一版", state="disabled",
+                                                fg_color="#6C757D", hover_color="#6C757D")
+        
+        if versions:
+            self.release_menu.configure(values=versions, state="normal")
+            if self.release_var.get() not in versions:
+                self.release_var.set(versions[0])
+            self.release_install_btn.configure(state="normal", fg_color="#17A2B8", hover_color="#138496")
+        else:
+            self.release_menu.configure(values=["（尚無版本）"], state="disabled")
+            self.release_var.set("（尚無版本）")
+            self.release_install_btn.configure(state="disabled", fg_color="#6C757D", hover_color="#6C757D")
+    
+    def install_cached_release(self):
+        """從版本庫安裝選取的版本（重裝或回滾）"""
+        version = self.release_var.get()
+        if not version or version == "（尚無版本）":
+            return
+        if self.update_in_progress or self.update_notification_active:
+            self.show_warning("警告", "更新進行中，請稍後再試")
+            return
+        
+        result = self.ask_yes_no("確認",
+            f"將伺服器安裝為版本 {version}（目前版本：{self.server_version}）。\n\n"
+            "伺服器會被關閉，世界與設定檔會保留。\n確定要繼續嗎？")
+        if not result:
+            return
+        
+        self.release_install_btn.configure(state="disabled", fg_color="#6C757D", hover_color="#6C757D")
+        threading.Thread(target=self.install_release, args=(version,), daemon=True).start()
+    
+    def rollback_previous_release(self):
+        """回滾到上一個使用的版本（版本資料夾已存在，只需切換並重新啟動）"""
+        previous = self.versions.previous()
+        if not previous:
+            return
+        if self.update_in_progress or self.update_notification_active:
+            self.show_warning("警告", "更新進行中，請稍後再試")
+            return
+        
+        result = self.ask_yes_no("確認",
+            f"將伺服器回滾至版本 {previous}（目前版本：{self.server_version}）。\n\n"
+            "伺服器會被關閉後立即以舊版本重新啟動，世界與設定檔會保留。\n確定要繼續嗎？")
+        if not result:
+            return
+        
+        self.release_rollback_btn.configure(state="disabled", fg_color="#6C757D", hover_color="#6C757D")
+        threading.Thread(target=self.rollback_release, daemon=True).start()
+    
     def cancel_update(self):
         """取消更新"""
         if self.update_in_progress:
@@ -3705,70 +3191,24 @@ class BDSConsole(ctk.CTk):
         
         # 顯示確認對話框
         result = self.ask_yes_no("確認", 
-            "確定要取消更新嗎？\n\n已下載的檔案將被刪除。")
+            "確定要取消更新嗎？\n\n已下載的部分會保留，下次更新時從中斷處續傳。")
         if not result:
             # 用戶選擇不取消
             return
         
-        # 設置取消標誌
-        self.update_cancel_requested = True
-        self.update_notification_active = False
-        
-        self.log_message("用戶取消了更新")
-        
-        # 不等待下載線程，讓它自己清理
-        # 啟動一個異步清理線程來處理
-        if self.update_download_thread and self.update_download_thread.is_alive():
-            self.log_message("正在停止下載...")
-            threading.Thread(target=self._async_cleanup_after_cancel, daemon=True).start()
-        else:
-            # 如果沒有下載線程或已結束，直接清理
-            self._cleanup_update_temp_files()
-            self._reset_update_buttons()
+        # 中止倒數、停止下載並清理暫存檔
+        self._cancel_pending_update()
         
         self.show_info("取消更新", "更新已取消，正在清理臨時檔案...")
     
-    def _async_cleanup_after_cancel(self):
-        """異步清理：等待下載線程結束後清理（不阻塞UI）"""
-        try:
-            # 在背景線程中等待下載線程結束（使用短超時循環，最多3秒）
-            max_wait_time = 3.0
-            wait_interval = 0.1
-            elapsed = 0.0
-            
-            if self.update_download_thread and self.update_download_thread.is_alive():
-                while elapsed < max_wait_time and self.update_download_thread.is_alive():
-                    time.sleep(wait_interval)
-                    elapsed += wait_interval
-                
-                if self.update_download_thread.is_alive():
-                    # 下載線程仍在運行，但會在下一個chunk檢查時自動停止
-                    self.log_message("下載線程仍在運行，等待其自動停止...")
-            
-            # 延遲一下再清理，確保下載線程已釋放文件
-            time.sleep(0.5)
-            
-            # 清理臨時檔案
-            self._cleanup_update_temp_files()
-            
-            # 恢復按鈕狀態（必須在主線程執行）
-            self.after(0, self._reset_update_buttons)
-            
-            # 通知用戶清理完成
-            self.after(0, lambda: self.log_message("清理完成"))
-        except Exception as e:
-            self.log_message(f"異步清理時發生錯誤: {str(e)}")
-    
-    def _cleanup_update_temp_files(self):
-        """清理更新臨時檔案"""
-        try:
-            if hasattr(self, '_downloaded_zip') and self._downloaded_zip:
-                if self._downloaded_zip.exists():
-                    self._downloaded_zip.unlink()
-                    self.log_message(f"已刪除臨時檔案: {self._downloaded_zip.name}")
-                delattr(self, '_downloaded_zip')
-        except Exception as e:
-            self.log_message(f"清理臨時檔案時發生錯誤: {str(e)}")
+    def _lock_update_button(self):
+        """更新進入執行階段：手動更新按鈕反灰（無法再取消）"""
+        self.force_update_btn.configure(
+            text="手動更新",
+            state="disabled",
+            fg_color="#6C757D",
+            hover_color="#6C757D"
+        )
     
     def _reset_update_buttons(self):
         """重置更新相關按鈕狀態"""
@@ -3785,6 +3225,7 @@ class BDSConsole(ctk.CTk):
             self.manual_backup_btn.configure(state="normal", fg_color="#17A2B8", hover_color="#138496")
         if hasattr(self, 'check_update_btn'):
             self.check_update_btn.configure(state="normal", fg_color="#17A2B8", hover_color="#138496")
+        self.update_release_cache_display()
     
     def manual_backup_with_prompt(self):
         """手動備份，使用滑條設定的通知時間"""
@@ -3797,120 +3238,6 @@ class BDSConsole(ctk.CTk):
         else:
             threading.Thread(target=self._perform_backup, daemon=True).start()
     
-    def _perform_backup(self, is_auto=False):
-        """執行備份"""
-        backup_start_time = None
-        backup_file = None
-        backup_success = False
-        
-        try:
-            # 僅在自動備份時禁用操作按鈕（手動備份已在外層處理）
-            if is_auto:
-                self.after(0, self._disable_operation_buttons)
-            
-            # 記錄開始時間
-            from datetime import datetime
-            backup_start_time = datetime.now()
-            
-            self.log_message("開始備份世界...")
-            self.update_status("備份", "yellow")
-            
-                       
-            # 暫停伺服器自動儲存
-            if self.server_process:
-                self.server_process.stdin.write("save hold\n")
-                self.server_process.stdin.flush()
-                time.sleep(2)
-            
-            # 壓縮worlds資料夾
-            worlds_dir = self.server_dir / "worlds"
-            if not worlds_dir.exists():
-                self.log_message("找不到worlds資料夾")
-                return
-            
-            timestamp = backup_start_time.strftime("%Y%m%d_%H%M%S")
-            # 根據是否為自動備份選擇不同的資料夾
-            backup_folder = "worlds_auto" if is_auto else "worlds_manual"
-            backup_file = self.backup_dir / backup_folder / f"world_backup_{timestamp}.zip"
-            
-            # 確保備份資料夾存在
-            backup_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with zipfile.ZipFile(backup_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(worlds_dir):
-                    for file in files:
-                        file_path = Path(root) / file
-                        arcname = file_path.relative_to(worlds_dir.parent)
-                        zipf.write(file_path, arcname)
-            
-            # 恢復自動儲存
-            if self.server_process:
-               
-                self.server_process.stdin.write("save resume\n")
-                self.server_process.stdin.flush()
-            
-            # 計算耗時和備份大小
-            backup_end_time = datetime.now()
-            elapsed_time = backup_end_time - backup_start_time
-            backup_size_bytes = backup_file.stat().st_size
-            backup_size_mb = backup_size_bytes / (1024 * 1024)
-            
-            backup_success = True
-            
-            # 更新備份時間
-            if is_auto:
-                self.last_auto_backup_time = backup_start_time
-                self.update_last_auto_backup_label()
-                # 自動備份後，同步更新自動更新檢查時間
-                if hasattr(self, 'last_auto_update_check_time'):
-                    self.last_auto_update_check_time = backup_start_time
-                    self.log_message("已同步自動更新檢查時間與備份時間")
-            else:
-                self.last_manual_backup_time = backup_start_time
-                self.update_last_manual_backup_label()
-            
-            # 保存備份時間到文件
-            self.save_backup_times()
-            
-            self.log_message(f"備份完成: {backup_file.name}")
-            self.update_status("運行", "green")
-            
-            # 清理舊備份
-            self.cleanup_old_backups()
-            
-            # 更新容量進度條
-            self.update_backup_capacity_bar()
-            
-            # 只在手動備份時顯示備份完成回報窗口
-            if not is_auto:
-                self.after(100, lambda: self.show_backup_result(
-                    backup_start_time,
-                    elapsed_time,
-                    backup_size_mb,
-                    backup_file.name,
-                    success=True
-                ))
-            
-            # 重新啟用操作按鈕
-            self.after(0, self._enable_operation_buttons)
-            
-        except Exception as e:
-            self.log_message(f"備份失敗: {str(e)}")
-            if self.server_process:
-                self.server_process.stdin.write("save resume\n")
-                self.server_process.stdin.flush()
-            self.update_status("運行", "green")
-            
-            # 只在手動備份時顯示備份失敗回報窗口
-            if not is_auto:
-                self.after(100, lambda: self.show_error(
-                    "備份失敗",
-                    f"備份過程中發生錯誤：\n\n{str(e)}"
-                ))
-            
-            # 重新啟用操作按鈕
-            self.after(0, self._enable_operation_buttons)
-    
     def show_backup_result(self, start_time, elapsed_time, size_mb, filename, success=True):
         """顯示備份結果窗口"""
         if success:
@@ -3943,36 +3270,6 @@ class BDSConsole(ctk.CTk):
                 f"檔案名稱：{filename}"
             )
     
-    def cleanup_old_backups(self):
-        """清理舊備份（只清理自動備份資料夾，手動備份不受容量限制）"""
-        try:
-            max_size_gb = float(self.backup_size_var.get())
-            max_size_bytes = max_size_gb * 1024 * 1024 * 1024
-            
-            # 只清理自動備份資料夾，手動備份永久保留
-            backup_folder = self.backup_dir / "worlds_auto"
-            if not backup_folder.exists():
-                self.update_backup_capacity_bar()
-                return
-            
-            backups = sorted(backup_folder.glob("*.zip"), key=lambda x: x.stat().st_mtime)
-            
-            # 計算該資料夾的總大小
-            folder_total_size = sum(f.stat().st_size for f in backups)
-            
-            # 只在超過容量時清理自動備份
-            while folder_total_size > max_size_bytes and backups:
-                old_backup = backups.pop(0)
-                folder_total_size -= old_backup.stat().st_size
-                old_backup.unlink()
-                self.log_message(f"已刪除舊備份: {old_backup.name} (自動備份)")
-            
-            # 更新容量進度條
-            self.update_backup_capacity_bar()
-                
-        except Exception as e:
-            self.log_message(f"清理備份失敗: {str(e)}")
-    
     def update_backup_capacity_bar(self):
         """更新備份容量進度條（計算手動和自動備份的總和）"""
         try:
@@ -4105,280 +3402,40 @@ class BDSConsole(ctk.CTk):
             self.log_message(f"更新下次備份時間失敗: {str(e)}")
             self.next_backup_label.configure(text="計算錯誤")
     
-    def _auto_download_and_install_server(self):
-        """自動下載並安裝伺服器（在找不到 bedrock_server.exe 時使用）"""
-        try:
-            self.log_message("=" * 60)
-            self.log_message("開始自動下載並安裝 Bedrock Server...")
-            self.log_message("=" * 60)
-            
-            # 步驟 1: 獲取下載連結
-            self.log_message("步驟 1/3: 獲取最新版本下載連結...")
-            
-            download_api = "https://net-secondary.web.minecraft-services.net/api/v1.0/download/links"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-            }
-            
-            response = requests.get(download_api, headers=headers, timeout=30)
-            if response.status_code != 200:
-                raise Exception(f"API 回應錯誤: {response.status_code}")
-            
-            data = response.json()
-            links = data.get("result", {}).get("links", [])
-            
-            target_link = None
-            for link in links:
-                if link.get("downloadType") == "serverBedrockWindows":
-                    target_link = link
-                    break
-            
-            if not target_link:
-                raise Exception("找不到 'serverBedrockWindows' 對應的下載連結")
-            
-            download_url = target_link.get("downloadUrl", "")
-            if not download_url:
-                raise Exception("下載連結為空")
-            
-            # 提取版本號
-            import re
-            version_match = re.search(r'bedrock-server-([\d\.]+)\.zip', download_url)
-            if not version_match:
-                raise Exception(f"無法從連結中提取版本號: {download_url}")
-            
-            version = version_match.group(1)
-            self.log_message(f"最新版本：{version}")
-            self.log_message(f"下載連結：{download_url}")
-            self.log_message("-" * 60)
-            
-            # 步驟 2: 下載伺服器檔案
-            self.log_message("步驟 2/3: 下載伺服器檔案...")
-            
-            temp_zip = self.temp_dir / f"bedrock-server-{version}.zip"
-            
-            response = requests.get(download_url, headers=headers, stream=True, timeout=300)
-            total_size = int(response.headers.get('content-length', 0))
-            
-            downloaded = 0
-            with open(temp_zip, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            percent = int((downloaded / total_size) * 100)
-                            if percent % 20 == 0 and percent != getattr(self, '_last_progress', -1):
-                                self.log_message(f"下載進度：{percent}%")
-                                self._last_progress = percent
-            
-            self.log_message(f"下載完成：{temp_zip.name}")
-            self.log_message("-" * 60)
-            
-            # 步驟 3: 解壓縮到 server_files
-            self.log_message("步驟 3/3: 安裝伺服器檔案...")
-            
-            # 確保 server_files 資料夾存在
-            self.server_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 解壓縮
-            with zipfile.ZipFile(temp_zip, 'r') as zipf:
-                zipf.extractall(self.server_dir)
-            
-            self.log_message("伺服器檔案已解壓縮完成")
-            
-            # 清理暫存檔
-            if temp_zip.exists():
-                temp_zip.unlink()
-                self.log_message("暫存檔已清理")
-            
-            self.log_message("-" * 60)
-            self.log_message("✓ 伺服器安裝完成！")
-            self.log_message(f"版本：{version}")
-            self.log_message("=" * 60)
-            
-            # 更新伺服器版本資訊
-            self.server_version = version
-            if hasattr(self, 'version_label'):
-                self.version_label.configure(text=version)
-            
-            # 重新讀取 server.properties（安裝後會生成）
-            self.load_server_properties()
-            self.log_message("已重新載入伺服器配置檔案")
-            
-            # 重新創建設定頁面以顯示新載入的配置
-            if "伺服器設定" in self.pages:
-                # 記住使用者當前所在的頁面
-                current_page = None
-                for name, page in self.pages.items():
-                    if page.winfo_ismapped():
-                        current_page = name
-                        break
-                
-                # 移除舊的設定頁面
-                old_page = self.pages["伺服器設定"]
-                old_page.destroy()
-                # 重新創建設定頁面
-                self.create_settings_page()
-                self.log_message("已更新伺服器設定介面")
-                
-                # 如果使用者原本不在伺服器設定頁面,切換回原本的頁面
-                if current_page and current_page != "伺服器設定" and current_page in self.pages:
-                    self.show_page(current_page)
-            
-            # 提示使用者並詢問是否立即啟動
-            self.after(100, lambda: self._prompt_start_after_install())
-            
-        except Exception as e:
-            self.log_message("=" * 60)
-            self.log_message(f"✗ 自動安裝失敗: {str(e)}")
-            self.log_message("=" * 60)
-            self.show_error("安裝失敗", f"自動安裝伺服器失敗: {str(e)}\n\n請手動從官網下載：\nhttps://www.minecraft.net/download/server/bedrock")
-    
-    def _prompt_start_after_install(self):
-        """安裝完成後詢問是否啟動伺服器"""
-        result = self.ask_yes_no(
-            "安裝完成",
-            "Bedrock Server 安裝完成！\n\n是否立即啟動伺服器？"
-        )
-        if result:
-            self.start_server()
-    
-    def auto_check_update_on_startup(self):
-        """啟動時自動檢查更新（靜默模式，只在有新版本時彈窗）"""
-        threading.Thread(target=lambda: self._check_update(is_auto=True), daemon=True).start()
+    def on_server_installed(self):
+        """首次自動安裝完成後重新建立設定頁面以顯示新載入的配置"""
+        if "伺服器設定" not in self.pages:
+            return
+        
+        # 記住使用者當前所在的頁面
+        current_page = None
+        for name, page in self.pages.items():
+            if page.winfo_ismapped():
+                current_page = name
+                break
+        
+        # 移除舊的設定頁面
+        old_page = self.pages["伺服器設定"]
+        old_page.destroy()
+        # 重新創建設定頁面
+        self.create_settings_page()
+        self.log_message("已更新伺服器設定介面")
+        
+        # 如果使用者原本不在伺服器設定頁面,切換回原本的頁面
+        if current_page and current_page != "伺服器設定" and current_page in self.pages:
+            self.show_page(current_page)
     
-    def check_update(self):
-        """檢查伺服器更新"""
-        threading.Thread(target=self._check_update, daemon=True).start()
+    def update_version_display(self):
+        """更新狀態頁與更新頁的伺服器版本標籤"""
+        if hasattr(self, 'version_label'):
+            self.version_label.configure(text=self.server_version)
+        if hasattr(self, 'current_version_label'):
+            self.current_version_label.configure(text=self.server_version)
     
-    def _check_update(self, is_auto=False, silent=False):
-        """檢查更新（執行緒）- 使用官方 API
-        
-        Args:
-            is_auto: 是否為自動檢查（影響按鈕禁用和提示框顯示）
-            silent: 是否為靜默模式（不顯示提示框，僅獲取下載連結）
-        """
-        try:
-            # 僅在手動檢查且非靜默模式時禁用操作按鈕
-            if not is_auto and not silent:
-                self.after(0, self._disable_operation_buttons)
-            
-            self.log_message("正在檢查更新...")
-            
-            # 使用官方 API
-            download_api = "https://net-secondary.web.minecraft-services.net/api/v1.0/download/links"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-            }
-            
-            # 步驟 1: 取得 JSON 並篩選對應下載連結
-            response = requests.get(download_api, headers=headers, timeout=30)
-            
-            if response.status_code != 200:
-                raise Exception(f"API 回應錯誤: {response.status_code}")
-            
-            data = response.json()
-            
-            # 尋找 serverBedrockWindows 類型的下載連結
-            links = data.get("result", {}).get("links", [])
-            target_link = None
-            
-            for link in links:
-                if link.get("downloadType") == "serverBedrockWindows":
-                    target_link = link
-                    break
-            
-            if not target_link:
-                raise Exception("找不到 'serverBedrockWindows' 對應的下載連結")
-            
-            download_url = target_link.get("downloadUrl", "")
-            
-            if not download_url:
-                raise Exception("下載連結為空")
-            
-            # 從下載連結中提取版本號 (例如：1.21.113.1)
-            import re
-            version_match = re.search(r'bedrock-server-([\d\.]+)\.zip', download_url)
-            
-            if not version_match:
-                raise Exception(f"無法從連結中提取版本號: {download_url}")
-            
-            latest_version = version_match.group(1)
-            
-            # 更新介面
-            self.latest_version_label.configure(text=latest_version)
-            
-            # 儲存下載資訊
-            self.download_url = download_url
-            self.latest_version = latest_version
-            
-            # 比較版本並記錄
-            self.has_new_version = False  # 預設沒有新版本
-            
-            if self.server_version == "未知":
-                self.log_message(f"已是最新版本: {latest_version}（當前版本未知，無法比較）")
-                
-                # 只在手動模式且非靜默模式下顯示回報窗口
-                if not is_auto and not silent:
-                    self.after(100, lambda: self.show_info(
-                        "檢查更新",
-                        f"目前版本：未知\n"
-                        f"最新版本：{latest_version}\n\n"
-                        f"無法比較版本，建議檢查伺服器是否正常運行。"
-                    ))
-            else:
-                # 使用版本比較函數
-                comparison = self._compare_versions(latest_version, self.server_version)
-                
-                if comparison > 0:
-                    # 最新版本較新
-                    self.has_new_version = True
-                    self.log_message(f"找到最新版本: {latest_version}")
-                    
-                    # 只在手動模式且非靜默模式下詢問是否立即更新
-                    if not is_auto and not silent:
-                        self.after(100, lambda: self.ask_for_immediate_update(latest_version))
-                elif comparison == 0:
-                    # 版本相同
-                    self.log_message(f"已是最新版本: {latest_version}")
-                    
-                    # 只在手動模式且非靜默模式下顯示已是最新版本的回報窗口
-                    if not is_auto and not silent:
-                        self.after(100, lambda: self.show_update_check_result(
-                            self.server_version, 
-                            latest_version, 
-                            is_latest=True
-                        ))
-                else:
-                    # 最新版本較舊（不應該發生，但以防萬一）
-                    self.log_message(f"已是最新版本: {self.server_version}（檢測版本: {latest_version}）")
-                    
-                    # 只在手動模式且非靜默模式下顯示回報窗口
-                    if not is_auto and not silent:
-                        self.after(100, lambda: self.show_update_check_result(
-                            self.server_version, 
-                            latest_version, 
-                            is_latest=True
-                        ))
-
-                
-        except Exception as e:
-            self.log_message(f"檢查更新錯誤: {str(e)}")
-            # 只在錯誤時記錄下載連結
-            if hasattr(self, 'download_url') and self.download_url:
-                self.log_message(f"下載連結：{self.download_url}")
-            self.latest_version_label.configure(text="檢查失敗")
-            
-            # 只在手動模式且非靜默模式下顯示錯誤回報窗口
-            if not is_auto and not silent:
-                self.after(100, lambda: self.show_error(
-                    "檢查更新失敗",
-                    f"檢查更新時發生錯誤：\n\n{str(e)}"
-                ))
-        finally:
-            # 僅在手動檢查且非靜默模式時重新啟用操作按鈕
-            if not is_auto and not silent:
-                self.after(0, self._enable_operation_buttons)
+    def update_latest_version_display(self, text):
+        """更新最新版本標籤"""
+        if hasattr(self, 'latest_version_label'):
+            self.latest_version_label.configure(text=text)
     
     def show_update_check_result(self, current_version, latest_version, is_latest=True):
         """顯示檢查更新結果窗口"""
@@ -4418,223 +3475,6 @@ class BDSConsole(ctk.CTk):
         
         threading.Thread(target=self._perform_update, daemon=True).start()
     
-    def _download_update_file(self):
-        """下載更新檔案（可獨立執行）"""
-        try:
-            if not hasattr(self, 'download_url') or not hasattr(self, 'latest_version'):
-                self.log_message("錯誤：缺少下載資訊")
-                return None
-            
-            self.log_message(f"正在下載版本 {self.latest_version} 中...")
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-            }
-            
-            temp_zip = self.temp_dir / f"bedrock-server-{self.latest_version}.zip"
-            
-            # 下載檔案（帶進度）
-            response = requests.get(self.download_url, headers=headers, stream=True, timeout=300)
-            total_size = int(response.headers.get('content-length', 0))
-            
-            downloaded = 0
-            with open(temp_zip, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    # 檢查是否請求取消
-                    if self.update_cancel_requested:
-                        self.log_message("下載已取消")
-                        # 關閉文件並刪除不完整的下載
-                        f.close()
-                        if temp_zip.exists():
-                            temp_zip.unlink()
-                        return None
-                    
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            percent = int((downloaded / total_size) * 100)
-                            # 只在每個新的整數倍20%時顯示一次進度
-                            if percent % 20 == 0 and percent != getattr(self, '_last_progress', -1):
-                                self.log_message(f"下載進度：{percent}%")
-                                self._last_progress = percent
-            
-            # 再次檢查是否在下載完成時請求取消
-            if self.update_cancel_requested:
-                self.log_message("下載已取消")
-                if temp_zip.exists():
-                    temp_zip.unlink()
-                return None
-            
-            self.log_message(f"下載完成：{temp_zip.name}")
-            return temp_zip
-            
-        except Exception as e:
-            self.log_message(f"下載失敗: {str(e)}")
-            return None
-    
-    def _perform_update(self):
-        """執行更新（執行緒）- 優化版本"""
-        try:
-            # 注意：按鈕禁用已在調用前處理，這裡不需要重複調用
-            
-            if not hasattr(self, 'download_url') or not hasattr(self, 'latest_version'):
-                self.log_message("錯誤：缺少下載資訊")
-                # 缺少資訊時重新啟用按鈕
-                self.update_in_progress = False
-                self.after(0, self._reset_update_buttons)
-                return
-            
-            self.log_message("=" * 60)
-            self.log_message(f"進行伺服器更新，目標版本：{self.latest_version}")
-            self.log_message("=" * 60)
-            
-            # 步驟 1/5: 下載更新檔（如果還沒下載）
-            temp_zip = getattr(self, '_downloaded_zip', None)
-            if not temp_zip or not temp_zip.exists():
-                self.log_message(f"正在下載版本 {self.latest_version} 中...")
-                temp_zip = self._download_update_file()
-                if not temp_zip:
-                    # 檢查是否為取消操作
-                    if self.update_cancel_requested:
-                        # 取消時不記錄為失敗，靜默返回
-                        return
-                    else:
-                        raise Exception("下載失敗")
-            else:
-                self.log_message("使用已下載的版本更新")
-
-            self.log_message("-" * 60)
-            
-            # 步驟 2/5: 關閉伺服器
-            
-            if self.server_process:
-                self._do_stop_server()
-                time.sleep(3)
-            
-            self.log_message("已關閉伺服器，開始更新")
-            self.log_message("-" * 60)
-            
-            # 步驟 3/5: 將舊的 server_files 改名為 server_old
-            
-            server_old = self.base_dir / "server_old"
-            
-            # 如果 server_old 已存在，先刪除
-            if server_old.exists():
-                self.log_message("已刪除 server_old 資料夾舊檔...")
-                shutil.rmtree(server_old)
-            
-            # 將 server_files 改名為 server_old（作為唯一備份）
-            if self.server_dir.exists():
-                self.log_message("將目前版本備份至 server_old...")
-                self.server_dir.rename(server_old)
-            
-            self.log_message("舊版本備份完成")
-            self.log_message("-" * 60)
-            
-            # 步驟 4/5: 建立新的 server_files 並解壓縮
-            
-            # 建立新的 server_files 資料夾
-            self.server_dir.mkdir(exist_ok=True)
-            
-            # 直接解壓縮到 server_files
-            self.log_message(f"正在安裝版本 {self.latest_version} 中...")
-            with zipfile.ZipFile(temp_zip, 'r') as zipf:
-                zipf.extractall(self.server_dir)
-            
-            self.log_message("新版本安裝完成")
-            self.log_message("-" * 60)
-            
-            # 步驟 5/5: 從 server_old 恢復設定與世界
-            
-            important_items = ["worlds", "allowlist.json", "permissions.json", "server.properties"]
-            
-            for item in important_items:
-                src = server_old / item
-                if src.exists():
-                    dst = self.server_dir / item
-                    try:
-                        # 先刪除新版本中的同名檔案（避免內容衝突）
-                        if dst.exists():
-                            if dst.is_dir():
-                                shutil.rmtree(dst)
-                            else:
-                                dst.unlink()
-                        
-                        # 從 server_old 複製
-                        if src.is_dir():
-                            shutil.copytree(src, dst)
-                        else:
-                            shutil.copy2(src, dst)
-                        self.log_message(f"已恢復: {item}")
-                    except Exception as e:
-                        self.log_message(f"恢復 {item} 失敗: {str(e)}")
-            
-            self.log_message("設定檔和世界資料恢復完成")
-            self.log_message("-" * 60)
-            
-            # 清理暫存檔
-            self.log_message("清理暫存檔...")
-            try:
-                if temp_zip.exists():
-                    temp_zip.unlink()
-                # 清除下載標記
-                if hasattr(self, '_downloaded_zip'):
-                    delattr(self, '_downloaded_zip')
-                self.log_message("暫存檔已清理")
-            except Exception as e:
-                self.log_message(f"清理暫存檔時發生錯誤: {str(e)}")
-            
-            self.log_message("-" * 60)
-            self.log_message(f"伺服器已更新至版本：{self.latest_version}")
-            self.log_message("=" * 60)
-            
-            # 重新啟動伺服器
-            time.sleep(2)
-            self.log_message("正在重新啟動伺服器...")
-            self.start_server()
-            
-            # 更新當前版本
-            self.server_version = self.latest_version
-            self.version_label.configure(text=self.server_version)
-            
-            # 重置更新狀態
-            self.update_in_progress = False
-            self.update_cancel_requested = False
-            
-            # 重新啟用操作按鈕
-            self.after(0, self._reset_update_buttons)
-            
-        except Exception as e:
-            self.log_message("=" * 60)
-            self.log_message(f"✗ 更新失敗: {str(e)}")
-            self.log_message("=" * 60)
-            self.show_error("錯誤", f"更新失敗: {str(e)}\n\n您可以嘗試從 server_old 恢復伺服器。")
-            
-            # 嘗試恢復 server_old
-            try:
-                server_old = self.base_dir / "server_old"
-                if server_old.exists() and not self.server_dir.exists():
-                    self.log_message("嘗試從 server_old 恢復...")
-                    server_old.rename(self.server_dir)
-                    self.log_message("已恢復舊版本伺服器")
-            except Exception as restore_error:
-                self.log_message(f"恢復失敗: {str(restore_error)}")
-            
-            # 嘗試啟動伺服器
-            try:
-                time.sleep(2)
-                self.start_server()
-            except Exception as e:
-                self.log_message(f"自動重啟伺服器失敗: {str(e)}")
-            
-            # 重置更新狀態
-            self.update_in_progress = False
-            self.update_cancel_requested = False
-            
-            # 重新啟用操作按鈕
-            self.after(0, self._reset_update_buttons)
-    
     # ========================================================================
     # 工具方法
     # ========================================================================
@@ -4659,6 +3499,26 @@ class BDSConsole(ctk.CTk):
         self.save_config()
         self.log_message(f"主題已切換為: {theme}")
     
+    def update_crash_stats_label(self):
+        """更新崩潰統計標籤"""
+        if hasattr(self, 'crash_stats_label'):
+            history = self.supervisor.history
+            self.crash_stats_label.configure(
+                text=f"累計啟動 {history['start_count']} 次 / 崩潰 {history['crash_count']} 次 / "
+                     f"自動重啟 {history['auto_restart_count']} 次"
+            )
+    
+    def toggle_crash_auto_restart(self):
+        """切換崩潰後自動重啟"""
+        enabled = self.crash_auto_restart_var.get()
+        self.config["crash_auto_restart_enabled"] = enabled
+        self.save_config()
+        # 停用時取消等待中的自動重啟
+        if not enabled:
+            self.crash_restart_pending = False
+        status = "啟用" if enabled else "停用"
+        self.log_message(f"崩潰自動重啟已{status}")
+    
     def log_message(self, message):
         """
         添加日誌訊息到控制台
@@ -4680,6 +3540,20 @@ class BDSConsole(ctk.CTk):
         if hasattr(self, 'log_text'):
             self.log_text.insert("end", log_entry)
             self.log_text.see("end")
+        self.publish_event("log", message=message)
+    
+    def on_console_line(self, line):
+        """將伺服器輸出寫入控制台輸出區"""
+        self.console_output.insert("end", line + "\n")
+        self.console_output.see("end")
+    
+    def call_later(self, delay_ms, callback):
+        """延遲執行回呼（Tk 主執行緒）"""
+        self.after(delay_ms, callback)
+    
+    def quit_application(self):
+        """關閉視窗並結束程式"""
+        self.destroy()
     
     def on_closing(self):
         """
@@ -4694,15 +3568,22 @@ class BDSConsole(ctk.CTk):
         用途:
             確保程式安全退出
         """
-        if self.server_process is not None:
+        if self.server_process is not None or self.instance_manager.running_count():
             result = self.ask_yes_no("確認", "伺服器正在運行中，確定要關閉嗎？")
-            if result:
-                self.log_message("正在關閉伺服器...")
+            if not result:
+                return
+            self.log_message("正在關閉伺服器...")
+            if self.server_process is not None:
                 self._do_stop_server()
                 time.sleep(2)
-                self.destroy()
-        else:
-            self.destroy()
+        
+        # 其他實例並行關閉
+        self.instance_manager.shutdown_all()
+        self.file_watcher.stop()
+        self.flush_settings()
+        self.metrics_exporter.stop()
+        self.api_server.stop()
+        self.destroy()
 
 
 # ============================================================================
@@ -4715,6 +3596,11 @@ if __name__ == "__main__":
     
     功能:
         啟動 BDS Console 應用程式
+        加上 --headless 參數時改以無介面模式執行（參數同 BDS_Core.py）
     """
-    app = BDSConsole()
-    app.mainloop()
+    if "--headless" in sys.argv[1:]:
+        from BDS_Core import main
+        main([arg for arg in sys.argv[1:] if arg != "--headless"])
+    else:
+        app = BDSConsole()
+        app.mainloop()
@@ -0,0 +1,6880 @@
+"""
+BDS Console - 伺服器管理核心
+
+不依賴圖形介面的伺服器管理引擎：生命週期、備份、更新、排程、崩潰監控、指標匯出與本機控制 API。
+圖形介面（BDS_Console.py）繼承此核心並覆寫介面回呼；亦可單獨以無介面模式執行：
+    
+    python BDS_Core.py [--base-dir 路徑] [--no-start] [--no-update-check] [--instances]
+
+加上 --instances 時依 data/instances.json 在同一個進程中管理多個伺服器實例，
+各實例有獨立的目錄、設定、排程與備份，共用排程執行緒、下載快取與工作執行緒池。
+
+"""
+
+import subprocess
+import threading
+import json
+import os
+import shutil
+import zipfile
+import requests
+from datetime import datetime, timedelta
+from pathlib import Path
+import time
+import schedule
+import sys
+import heapq
+import itertools
+import math
+import http.server
+import signal
+import argparse
+import secrets
+import hashlib
+import re
+import errno
+import socket
+import zlib
+import csv
+import select
+import ctypes
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from BDS_API import ControlAPIServer
+
+
+# ============================================================================
+# 全域常數定義
+# ============================================================================
+
+# 平台常數：隱藏子進程視窗（Windows）、BDS 執行檔名稱與官方下載類型
+if sys.platform == 'win32':
+    CREATE_NO_WINDOW = 0x08000000
+    SERVER_EXECUTABLE = "bedrock_server.exe"
+    SERVER_DOWNLOAD_TYPE = "serverBedrockWindows"
+    SERVER_PLATFORM = "win"
+else:
+    CREATE_NO_WINDOW = 0
+    SERVER_EXECUTABLE = "bedrock_server"
+    SERVER_DOWNLOAD_TYPE = "serverBedrockLinux"
+    SERVER_PLATFORM = "linux"
+
+# 強制終止伺服器時，送出終止訊號後等待進程結束的秒數（Linux）
+SERVER_TERMINATE_TIMEOUT = 10
+
+# 伺服器進程結束後，等待輸出讀取執行緒處理完剩餘輸出的最長秒數（判斷是否為崩潰前）
+SERVER_OUTPUT_DRAIN_TIMEOUT = 3
+
+# 更新時保留的伺服器項目（已存在時不會被新版本覆蓋）
+PRESERVED_SERVER_ITEMS = ("worlds", "allowlist.json", "permissions.json", "server.properties")
+
+# 版本化安裝：每個版本完整保存於 versions/<版本>/，預設保留的版本數（含使用中的版本）
+INSTALLED_VERSIONS_KEEP = 3
+
+# 安裝檔解壓縮：並行解壓縮的最大執行緒數（不超過 CPU 核心數）與每次寫入的區塊大小
+EXTRACT_MAX_WORKERS = 8
+EXTRACT_BUFFER_SIZE = 1024 * 1024
+
+# 伺服器輸出中表示啟動完成的訊息
+SERVER_STARTED_MARKERS = ("Server started", "Server running")
+
+# server.properties 中可在運行中以命令即時套用的設定（其餘設定需重新啟動才會生效）
+LIVE_PROPERTY_COMMANDS = {
+    "difficulty": lambda value: f"difficulty {value}",
+    "gamemode": lambda value: f"defaultgamemode {value}",
+    "allow-list": lambda value: "allowlist on" if value == "true" else "allowlist off",
+}
+
+# 設定檔存放：連續儲存（例如拖動滑桿）在此秒數內合併為一次寫入
+CONFIG_SAVE_DEBOUNCE = 0.5
+
+# 變更後需要重建排程的設定
+SCHEDULE_CONFIG_KEYS = frozenset({
+    "auto_backup_enabled", "backup_frequency_type", "backup_frequency_value",
+    "backup_time_hour", "backup_time_minute", "backup_weekday",
+    "auto_update_enabled", "update_frequency_type", "update_frequency_value",
+    "update_time_hour", "update_time_minute", "update_weekday",
+    "auto_restart_enabled", "restart_time_hour", "restart_time_minute",
+})
+
+# 檔案監看：Linux 以 inotify 即時偵測外部修改，此間隔為輪詢（或 inotify 的備援檢查）秒數
+FILE_WATCH_INTERVAL = 5
+FILE_WATCH_DEBOUNCE = 0.3               # 偵測到變動後等待連續寫入結束的秒數
+INOTIFY_WATCH_MASK = 0x08 | 0x80 | 0x100 | 0x200  # IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# 玩家名單批次匯入/匯出（CSV / JSON Lines）
+PLAYER_RECORD_FIELDS = ("name", "xuid", "permission", "allowlisted")
+PLAYER_PERMISSION_LEVELS = ("visitor", "member", "operator")
+PLAYER_IMPORT_REPORT_LIMIT = 20         # 匯入報告保留的衝突/錯誤範例筆數（其餘只計數）
+
+# 更新前試啟動（canary）：以設定檔副本與替代連接埠啟動新版本，確認能完成啟動後才替換
+CANARY_CONFIG_FILES = ("server.properties", "allowlist.json", "permissions.json")
+CANARY_LEVEL_NAME = "canary"            # 試啟動使用的世界名稱（不載入正式世界）
+CANARY_STOP_TIMEOUT = 30                # 送出 stop 後等待試啟動伺服器結束的秒數
+CANARY_OUTPUT_TAIL_LINES = 20           # 試啟動失敗時記錄的輸出行數
+
+# 倒數廣播排程：(門檻秒數, 間隔秒數)，剩餘時間大於門檻時依該間隔廣播
+# 每一段都會在門檻處補發一次，確保「5 分鐘」「30 秒」等整點提示不會被跳過
+UPDATE_BROADCAST_SCHEDULE = (
+    (30 * 60, 10 * 60),     # 大於 30 分鐘：每 10 分鐘
+    (5 * 60, 5 * 60),       # 大於 5 分鐘：每 5 分鐘
+    (60, 4 * 60),           # 大於 1 分鐘：直接跳到剩餘 1 分鐘時
+    (30, 30),               # 大於 30 秒：剩餘 30 秒時
+    (10, 5),                # 大於 10 秒：每 5 秒
+    (0, 1),                 # 最後 10 秒：每秒
+)
+RESTART_BROADCAST_SCHEDULE = UPDATE_BROADCAST_SCHEDULE
+BACKUP_BROADCAST_SCHEDULE = (
+    (10, 60 * 60),          # 大於 10 秒：開始時與剩餘 10 秒時
+    (0, 5),                 # 最後 10 秒：每 5 秒
+)
+# 維護時段延後期間，檢查玩家是否已全部離線的最長間隔（秒）
+MAINTENANCE_CHECK_INTERVAL = 60
+
+# 崩潰自動重啟：指數退避（基礎延遲 × 2^(連續崩潰次數-1)，有上限）
+CRASH_RESTART_BASE_DELAY = 5            # 首次崩潰後的重啟延遲（秒）
+CRASH_RESTART_MAX_DELAY = 300           # 重啟延遲上限（秒）
+CRASH_LOOP_WINDOW = 600                 # 崩潰循環判定視窗（秒）
+CRASH_STABLE_UPTIME = 600               # 運行超過此秒數後崩潰視為新的崩潰序列
+CRASH_REPORT_TAIL_LINES = 200           # 崩潰報告保留的輸出行數
+SERVER_HISTORY_MAX_SESSIONS = 200       # 運行歷史保留筆數
+
+# 資源取樣：預設每 5 秒一筆，保留 120 筆（約 10 分鐘）
+RESOURCE_SAMPLE_INTERVAL = 5            # 取樣間隔（秒）
+RESOURCE_HISTORY_SIZE = 120             # 環狀緩衝區筆數
+RESOURCE_SPARKLINE_WIDTH = 60           # 狀態頁趨勢圖寬度（字元）
+RESOURCE_THREAD_COUNT_EVERY = 12        # Windows 每幾次取樣重新計算一次執行緒數（全系統快照成本較高）
+
+# 指標直方圖區間
+BACKUP_DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800)
+BACKUP_SIZE_BUCKETS = tuple(mb * 1024 * 1024 for mb in (1, 10, 50, 100, 250, 500, 1024, 2048, 5120, 10240))
+
+# 多實例：共用的工作執行緒池大小與 BDS 版本庫（下載快取）容量
+WORKER_POOL_SIZE = 8                    # 預設工作執行緒數（實例較多時依實例數放大）
+RELEASE_CACHE_MAX_GB = 2                # 版本庫容量上限（GB），超過時淘汰最久未使用的版本
+
+# 官方下載連結 API（清單快取於版本庫資料夾，過期後以條件式請求重新驗證）
+DOWNLOAD_LINKS_API = "https://net-secondary.web.minecraft-services.net/api/v1.0/download/links"
+HTTP_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+MANIFEST_TTL_SECONDS = 600              # 排程檢查在此時間內直接使用快取的清單（秒）
+
+# 可續傳下載：未完成的檔案保留在快取中，下次以 Range 請求接續
+DOWNLOAD_CHUNK_MIN = 64 * 1024          # 最小讀取區塊（位元組）
+DOWNLOAD_CHUNK_MAX = 4 * 1024 * 1024    # 最大讀取區塊（位元組）
+DOWNLOAD_CHUNK_TARGET_SECONDS = 0.5     # 每個區塊的目標讀取時間（依實際速度調整區塊大小）
+DOWNLOAD_MAX_RETRIES = 5                # 連線中斷時的重試次數
+DOWNLOAD_RETRY_BASE_DELAY = 2           # 重試等待基礎秒數（指數退避）
+DOWNLOAD_RETRY_MAX_DELAY = 60           # 重試等待上限（秒）
+DOWNLOAD_PARTIAL_MAX_AGE_DAYS = 7       # 未完成下載保留天數
+
+# 主機層級的重負載工作（備份、更新、還原）協調：同時執行數量與排程工作的錯開間隔
+MAX_CONCURRENT_JOBS = 1                 # 同時執行的重負載工作數
+JOB_STAGGER_SECONDS = 30                # 排程工作之間的最短啟動間隔（秒）
+JOB_TYPE_NAMES = {
+    "backup": "備份",
+    "update": "更新",
+    "restore": "還原",
+}
+
+# 狀態頁顯示文字對應的指標狀態名稱
+SERVER_STATUS_NAMES = {
+    "關閉": "stopped",
+    "啟動": "starting",
+    "運行": "running",
+    "備份": "backup",
+    "重啟": "restarting",
+}
+
+
+# ============================================================================
+# 倒數通知引擎
+# ============================================================================
+
+class Countdown:
+    """
+    單一倒數計時
+    
+    功能:
+        - 依廣播排程預先計算所有廣播時間點
+        - 提供剩餘秒數與距離下次廣播秒數查詢
+        - 支援以事件立即取消並喚醒等待者
+    
+    用途:
+        由 CountdownScheduler 建立與驅動，代表一次更新/重啟/備份倒數
+    """
+    def __init__(self, scheduler, total_seconds, broadcast_schedule, on_broadcast, on_finish=None, name=""):
+        """
+        初始化倒數
+        
+        Args:
+            scheduler: 所屬的 CountdownScheduler
+            total_seconds: 倒數總秒數
+            broadcast_schedule: 廣播排程 ((門檻秒數, 間隔秒數), ...)
+            on_broadcast: 廣播回呼，參數為剩餘秒數
+            on_finish: 倒數正常結束時的回呼（可為 None）
+            name: 倒數名稱（用於日誌）
+        """
+        self.name = name
+        self.total_seconds = int(total_seconds)
+        self.deadline = time.monotonic() + self.total_seconds
+        self.points = self._build_points(self.total_seconds, broadcast_schedule)
+        self._scheduler = scheduler
+        self._on_broadcast = on_broadcast
+        self._on_finish = on_finish
+        self._index = 0
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+    
+    @staticmethod
+    def _build_points(total_seconds, broadcast_schedule):
+        """依排程計算廣播時間點（以剩餘秒數表示，遞減並以 0 結尾）"""
+        points = []
+        remaining = total_seconds
+        while remaining > 0:
+            points.append(remaining)
+            for threshold, interval in broadcast_schedule:
+                if remaining > threshold:
+                    remaining = max(remaining - interval, threshold)
+                    break
+            else:
+                remaining = 0
+        points.append(0)
+        return points
+    
+    @property
+    def cancelled(self):
+        """是否已取消"""
+        return self._cancel_event.is_set()
+    
+    @property
+    def finished(self):
+        """是否已結束（正常結束或取消）"""
+        return self._done_event.is_set()
+    
+    def remaining(self):
+        """剩餘秒數（無條件進位）"""
+        if self.finished:
+            return 0
+        return max(0, math.ceil(self.deadline - time.monotonic()))
+    
+    def seconds_until_next_broadcast(self):
+        """距離下一次預定廣播的秒數"""
+        if self.finished or self._index >= len(self.points):
+            return 0
+        next_at = self.deadline - self.points[self._index]
+        return max(0, math.ceil(next_at - time.monotonic()))
+    
+    def cancel(self):
+        """取消倒數（立即喚醒所有等待者）"""
+        if self.finished:
+            return
+        self._cancel_event.set()
+        self._done_event.set()
+        self._scheduler._wakeup()
+    
+    def wait(self, timeout=None):
+        """
+        等待倒數結束
+        
+        Returns:
+            bool: 正常倒數完畢為 True，取消或逾時為 False
+        """
+        self._done_event.wait(timeout)
+        return self._done_event.is_set() and not self._cancel_event.is_set()
+    
+    def _next_fire_time(self):
+        """下一個時間點的絕對時間（monotonic）"""
+        return self.deadline - self.points[self._index]
+    
+    def _fire(self):
+        """
+        執行目前時間點（由計時執行緒呼叫）
+        
+        Returns:
+            bool: 是否還有下一個時間點需要排程
+        """
+        if self.finished:
+            return False
+        remaining = self.points[self._index]
+        self._index += 1
+        if remaining > 0:
+            try:
+                self._on_broadcast(remaining)
+            except Exception as e:
+                print(f"倒數廣播錯誤 ({self.name}): {e}")
+            return self._index < len(self.points)
+        
+        # 剩餘 0 秒：倒數完成
+        self._done_event.set()
+        if self._on_finish:
+            try:
+                self._on_finish()
+            except Exception as e:
+                print(f"倒數結束回呼錯誤 ({self.name}): {e}")
+        return False
+
+
+class CountdownScheduler:
+    """
+    倒數排程器
+    
+    功能:
+        - 以單一計時執行緒驅動所有倒數的廣播
+        - 同時執行多個互不影響的倒數（重啟、更新、備份）
+        - 取消時立即喚醒計時執行緒，不需輪詢
+    
+    用途:
+        取代逐秒 sleep 與輪詢取消旗標的倒數迴圈
+    """
+    def __init__(self):
+        """初始化排程器（計時執行緒於第一次使用時啟動）"""
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self.last_lag = 0.0         # 最近一次廣播相對預定時間的延遲（秒）
+    
+    def start_countdown(self, total_seconds, broadcast_schedule, on_broadcast, on_finish=None, name=""):
+        """
+        開始新的倒數
+        
+        Args:
+            total_seconds: 倒數總秒數
+            broadcast_schedule: 廣播排程 ((門檻秒數, 間隔秒數), ...)
+            on_broadcast: 廣播回呼，參數為剩餘秒數
+            on_finish: 倒數正常結束時的回呼
+            name: 倒數名稱
+        
+        Returns:
+            Countdown: 倒數物件（可 wait / cancel）
+        """
+        countdown = Countdown(self, total_seconds, broadcast_schedule, on_broadcast, on_finish, name)
+        with self._condition:
+            self._push(countdown)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="CountdownScheduler", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return countdown
+    
+    def schedule_once(self, delay, callback, name=""):
+        """
+        在指定秒數後呼叫一次回呼（不廣播，回呼在計時執行緒上執行，不可阻塞）
+        
+        Args:
+            delay: 延遲秒數
+            callback: 回呼函數
+            name: 名稱（用於日誌）
+        
+        Returns:
+            Countdown: 倒數物件（可 cancel 取消）
+        """
+        return self.start_countdown(delay, (), lambda remaining: None, callback, name)
+    
+    def _push(self, countdown):
+        """將倒數的下一個時間點放入佇列（需持有鎖）"""
+        heapq.heappush(self._heap, (countdown._next_fire_time(), next(self._sequence), countdown))
+    
+    def _wakeup(self):
+        """喚醒計時執行緒（取消倒數時使用）"""
+        with self._condition:
+            self._condition.notify()
+    
+    def _run(self):
+        """計時執行緒主迴圈"""
+        while True:
+            with self._condition:
+                # 丟棄已取消的倒數
+                while self._heap and self._heap[0][2].finished:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                fire_time, _, countdown = self._heap[0]
+                delay = fire_time - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                self.last_lag = -delay
+            
+            # 在鎖外執行回呼，避免廣播阻塞其他倒數的排程
+            if countdown._fire():
+                with self._condition:
+                    self._push(countdown)
+
+
+# ============================================================================
+# 平台支援（Windows / Linux 原生伺服器）
+# ============================================================================
+
+def server_popen_options(server_dir):
+    """
+    取得啟動 BDS 進程的平台對應參數
+    
+    - Windows: 隱藏命令提示字元視窗
+    - Linux: 以 LD_LIBRARY_PATH=. 載入伺服器目錄內的共用函式庫，
+      並放到獨立的進程群組，終端機的 Ctrl+C 不會直接中斷伺服器（由控制台送出 stop 安全關閉）
+    
+    Args:
+        server_dir: 伺服器資料夾
+    
+    Returns:
+        dict: subprocess.Popen 的額外參數
+    """
+    if sys.platform == 'win32':
+        return {"creationflags": CREATE_NO_WINDOW}
+    env = os.environ.copy()
+    library_path = env.get("LD_LIBRARY_PATH")
+    env["LD_LIBRARY_PATH"] = f".{os.pathsep}{library_path}" if library_path else "."
+    return {"env": env, "start_new_session": True}
+
+
+def extract_server_archive(zip_path, target_dir, max_workers=None):
+    """
+    解壓縮 BDS 安裝檔並還原執行權限（多執行緒）
+    
+    功能:
+        - 各檔案由執行緒池並行解壓縮（zlib 解壓縮時釋放 GIL，多核心主機可同時處理），大檔案優先
+        - 寫入前預先配置檔案大小
+        - 目的資料夾中已有大小與 CRC 相同的檔案時略過（不重新解壓縮）
+        - 依壓縮檔記錄的權限還原 Unix 權限位元（zipfile 不保留），並確保伺服器執行檔可執行
+    
+    Args:
+        zip_path: 安裝檔 zip 路徑
+        target_dir: 解壓縮目的資料夾
+        max_workers: 執行緒數（None 則依 CPU 核心數，最多 EXTRACT_MAX_WORKERS）
+    
+    Returns:
+        tuple: (解壓縮的檔案數, 略過的檔案數)
+    """
+    target_dir = Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(zip_path, 'r') as zipf:
+        members = zipf.infolist()
+    
+    # 檢查路徑（不允許絕對路徑或跳出目的資料夾）並先建立資料夾
+    for info in members:
+        parts = Path(info.filename).parts
+        if Path(info.filename).is_absolute() or ".." in parts:
+            raise Exception(f"安裝檔包含不安全的路徑: {info.filename}")
+        if info.is_dir():
+            (target_dir / info.filename).mkdir(parents=True, exist_ok=True)
+    files = sorted((info for info in members if not info.is_dir()), key=lambda info: info.file_size, reverse=True)
+    
+    # 每個執行緒使用自己的 ZipFile，避免共用檔案位置
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+    
+    def extract_member(info):
+        zipf = getattr(local, "zipf", None)
+        if zipf is None:
+            zipf = local.zipf = zipfile.ZipFile(zip_path, 'r')
+            with handles_lock:
+                handles.append(zipf)
+        
+        target = target_dir / info.filename
+        if target.is_file() and target.stat().st_size == info.file_size and file_crc32(target) == info.CRC:
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            # 可能是其他版本資料夾的硬連結，先刪除再寫入，不可就地覆寫
+            target.unlink()
+        with zipf.open(info) as source, open(target, 'wb') as dest:
+            preallocate_file(dest, info.file_size)
+            shutil.copyfileobj(source, dest, EXTRACT_BUFFER_SIZE)
+        
+        mode = (info.external_attr >> 16) & 0o777
+        if mode and sys.platform != 'win32':
+            os.chmod(target, mode)
+        return True
+    
+    workers = max_workers or min(EXTRACT_MAX_WORKERS, os.cpu_count() or 1)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(extract_member, files))
+    finally:
+        for zipf in handles:
+            zipf.close()
+    
+    server_exe = target_dir / SERVER_EXECUTABLE
+    if sys.platform != 'win32' and server_exe.exists():
+        server_exe.chmod(server_exe.stat().st_mode | 0o755)
+    return results.count(True), results.count(False)
+
+
+def preallocate_file(file, size):
+    """預先配置檔案大小（減少寫入時的空間配置與檔案碎片，不支援時略過）"""
+    if size <= 0:
+        return
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(file.fileno(), 0, size)
+        else:
+            file.truncate(size)
+    except OSError:
+        pass
+
+
+def force_stop_process(process, timeout=SERVER_TERMINATE_TIMEOUT):
+    """
+    強制結束伺服器進程
+    
+    Windows 直接終止；Linux 先送出 SIGTERM 讓伺服器有機會儲存世界，逾時才送出 SIGKILL
+    
+    Args:
+        process: subprocess.Popen 物件
+        timeout: Linux 等待 SIGTERM 生效的秒數
+    """
+    if process.poll() is not None:
+        return
+    if sys.platform == 'win32':
+        process.kill()
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# ============================================================================
+# 原子寫入（先寫暫存檔再取代，避免中途中斷留下寫到一半的檔案）
+# ============================================================================
+
+def write_text_atomic(path, text):
+    """
+    以原子方式寫入文字檔
+    
+    寫入同資料夾的暫存檔並 fsync 後才以 os.replace 取代原檔，
+    伺服器或其他程式讀取時只會看到完整的舊檔或新檔
+    
+    Args:
+        path: 目標檔案路徑
+        text: 檔案內容（換行字元原樣寫入）
+    """
+    path = Path(path)
+    temp_file = path.with_name(path.name + ".tmp")
+    with open(temp_file, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, path)
+
+
+def write_json_atomic(path, data, indent=4):
+    """
+    以原子方式寫入 JSON 檔案
+    
+    Args:
+        path: 目標檔案路徑
+        data: 要寫入的資料
+        indent: JSON 縮排
+    """
+    write_text_atomic(path, json.dumps(data, indent=indent, ensure_ascii=False))
+
+
+# ============================================================================
+# 設定檔存放（延遲合併寫入、最後可用副本、變更通知）
+# ============================================================================
+
+class ConfigStore:
+    """
+    JSON 設定檔存放
+    
+    功能:
+        - save() 延遲合併寫入：短時間內多次儲存（例如拖動滑桿）只寫入一次，內容未變時不寫檔
+        - 以原子方式寫入（暫存檔 + fsync + 改名），寫入後另存 .bak 作為最後可用的副本
+        - 讀取時檔案損毀則保留損毀檔（.corrupt）並改用 .bak（檔案遺失時也改用 .bak）
+        - 儲存時比對上次的內容，將變更的設定通知訂閱者（例如只在排程設定變更時重建排程）
+    """
+    
+    def __init__(self, path, debounce=CONFIG_SAVE_DEBOUNCE, log=print, on_write=None):
+        """
+        初始化設定檔存放
+        
+        Args:
+            path: 設定檔路徑
+            debounce: 延遲合併寫入的秒數（0 為立即寫入）
+            log: 日誌函數
+            on_write: 寫入完成後的回呼 on_write(path)（例如通知檔案監看這是自身寫入）
+        """
+        self.path = Path(path)
+        self.backup_path = self.path.with_name(self.path.name + ".bak")
+        self.debounce = debounce
+        self.log = log
+        self.on_write = on_write
+        self.data = {}
+        self._written = None            # 上次寫入（或讀取）的 JSON 文字
+        self._pending = None            # save() 時取得的快照（等待延遲寫入的 JSON 文字）
+        self._notified = {}             # 上次通知時的設定複本
+        self._listeners = []
+        self._timer = None
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """
+        讀取設定檔（遺失或損毀時改用最後可用的副本）
+        
+        Returns:
+            dict: 設定內容（設定檔與副本都不存在或無法讀取時為 None）
+        """
+        problem = None
+        for path in (self.path, self.backup_path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("內容不是物件")
+            except FileNotFoundError:
+                if path == self.path:
+                    problem = "不存在"
+                continue
+            except (OSError, ValueError) as e:
+                self.log(f"{path.name} 無法讀取: {str(e)}")
+                if path == self.path:
+                    problem = "無法讀取"
+                    if isinstance(e, ValueError):
+                        shutil.copy2(path, path.with_name(path.name + ".corrupt"))
+                        problem = f"已損毀（保留為 {path.name}.corrupt）"
+                continue
+            
+            text = json.dumps(data, indent=4, ensure_ascii=False)
+            if path == self.backup_path:
+                # 以最後可用的副本還原設定檔
+                write_text_atomic(self.path, text)
+                self.log(f"{self.path.name} {problem}，已以最後可用的副本還原")
+            self._written = text
+            return data
+        return None
+    
+    def attach(self, data):
+        """設定要儲存的 dict（呼叫端直接修改此 dict 後呼叫 save）"""
+        self.data = data
+        self._notified = json.loads(json.dumps(data))
+    
+    def subscribe(self, callback):
+        """訂閱設定變更 callback(changed_keys)（於呼叫 save 的執行緒呼叫）"""
+        self._listeners.append(callback)
+    
+    def save(self, immediate=False):
+        """
+        儲存設定：通知變更的設定，並延遲合併寫入
+        
+        Args:
+            immediate: 立即寫入（不延遲）
+        
+        Returns:
+            set: 變更的設定
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            # 在修改設定的執行緒取得快照，計時器執行緒只寫入快照，不讀取可能正被修改的 dict
+            self._pending = json.dumps(self.data, indent=4, ensure_ascii=False)
+            if not immediate and self.debounce > 0:
+                self._timer = threading.Timer(self.debounce, self._write_pending)
+                self._timer.daemon = True
+                self._timer.start()
+        if immediate or self.debounce <= 0:
+            self._write_pending()
+        return self.notify_changes()
+    
+    def notify_changes(self):
+        """
+        比對上次通知後的變更並通知訂閱者
+        
+        Returns:
+            set: 變更的設定
+        """
+        snapshot = json.loads(json.dumps(self.data))
+        changed = {key for key in snapshot.keys() | self._notified.keys()
+                   if snapshot.get(key) != self._notified.get(key)}
+        self._notified = snapshot
+        if changed:
+            for callback in self._listeners:
+                callback(changed)
+        return changed
+    
+    def flush(self):
+        """
+        立即寫入目前的設定（於修改設定的執行緒呼叫，例如結束程式前；內容與上次寫入相同時不寫檔）
+        
+        Returns:
+            bool: 是否有寫入
+        """
+        with self._lock:
+            self._pending = json.dumps(self.data, indent=4, ensure_ascii=False)
+        return self._write_pending()
+    
+    def _write_pending(self):
+        """
+        寫入 save() 取得的快照（延遲計時器呼叫）
+        
+        Returns:
+            bool: 是否有寫入
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            text, self._pending = self._pending, None
+            if text is None or text == self._written:
+                return False
+            try:
+                write_text_atomic(self.path, text)
+                write_text_atomic(self.backup_path, text)
+            except OSError as e:
+                self.log(f"寫入 {self.path.name} 失敗: {str(e)}")
+                return False
+            self._written = text
+        if self.on_write is not None:
+            self.on_write(self.path)
+        return True
+
+
+# ============================================================================
+# server.properties 文件模型（保留註解、空行與順序）
+# ============================================================================
+
+class ServerProperties:
+    """
+    server.properties 文件模型
+    
+    功能:
+        - 逐行保存原始內容，註解、空行與設定順序原樣保留（包含 Mojang 附帶的設定說明）
+        - set() 只改寫該設定所在的行並記錄為已變更，值相同時不視為變更；新設定附加在檔案末尾
+        - save() 只在有已變更的設定時才以原子寫入輸出，沒有變更時不寫檔
+        - diff() 比較兩份文件的設定（例如新版本附帶的預設值與目前的設定）
+    """
+    
+    def __init__(self, path):
+        """
+        初始化空文件
+        
+        Args:
+            path: server.properties 路徑
+        """
+        self.path = Path(path)
+        self.lines = []                 # 每行: [設定名稱（註解/空行為 None）, 原始文字]
+        self.values = {}                # 設定名稱 -> 值
+        self.line_of = {}               # 設定名稱 -> 行號（重複出現時以最後一行為準）
+        self.dirty = set()              # 尚未寫入的已變更設定
+        self.newline = "\n"
+        self.exists = False
+    
+    @classmethod
+    def load(cls, path):
+        """讀取並解析檔案（檔案不存在時為空文件）"""
+        document = cls(path)
+        document.reload()
+        return document
+    
+    def reload(self):
+        """從檔案重新解析，捨棄尚未寫入的變更"""
+        try:
+            with open(self.path, 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+            self.exists = True
+        except FileNotFoundError:
+            text = ""
+            self.exists = False
+        
+        self.newline = "\r\n" if "\r\n" in text else "\n"
+        self.lines, self.values, self.line_of = [], {}, {}
+        self.dirty = set()
+        for raw in text.splitlines():
+            line = raw.strip()
+            key = None
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                self.values[key] = value
+                self.line_of[key] = len(self.lines)
+            self.lines.append([key, raw])
+    
+    def get(self, key, default=None):
+        """取得設定值"""
+        return self.values.get(key, default)
+    
+    def as_dict(self):
+        """所有設定的複本（key -> value）"""
+        return dict(self.values)
+    
+    def set(self, key, value):
+        """
+        修改設定值（只改寫該行）
+        
+        Returns:
+            bool: 值是否有變更
+        """
+        value = str(value)
+        if self.values.get(key) == value:
+            return False
+        if key in self.line_of:
+            self.lines[self.line_of[key]][1] = f"{key}={value}"
+        else:
+            self.line_of[key] = len(self.lines)
+            self.lines.append([key, f"{key}={value}"])
+        self.values[key] = value
+        self.dirty.add(key)
+        return True
+    
+    def update(self, properties):
+        """
+        批次修改設定值
+        
+        Returns:
+            list: 值有變更的設定名稱
+        """
+        return [key for key, value in properties.items() if self.set(key, value)]
+    
+    def save(self):
+        """
+        寫入檔案（只在有已變更的設定時寫入，先寫暫存檔再取代）
+        
+        Returns:
+            bool: 是否有寫入
+        """
+        if not self.dirty:
+            return False
+        text = self.newline.join(raw for key, raw in self.lines) + self.newline
+        write_text_atomic(self.path, text)
+        self.dirty.clear()
+        self.exists = True
+        return True
+    
+    def diff(self, other):
+        """
+        比較兩份文件的設定
+        
+        Args:
+            other: 另一份 ServerProperties（例如新版本附帶的預設值）
+        
+        Returns:
+            dict: {"added": 只在 other 中的設定, "removed": 只在本文件中的設定,
+                   "changed": {設定: (本文件的值, other 的值)}}
+        """
+        return {
+            "added": [key for key in other.values if key not in self.values],
+            "removed": [key for key in self.values if key not in other.values],
+            "changed": {key: (value, other.values[key]) for key, value in self.values.items()
+                        if key in other.values and other.values[key] != value},
+        }
+
+
+# ============================================================================
+# 檔案監看（偵測外部工具對設定檔的修改）
+# ============================================================================
+
+class FileWatcher:
+    """
+    監看檔案的外部修改
+    
+    功能:
+        - Linux 以 inotify 監看檔案所在資料夾，有變動時立即檢查；其他平台或 inotify 無法使用時定期輪詢
+        - 先比對修改時間與大小，有變動時才計算 SHA-256，內容真的不同才呼叫回呼重新解析
+        - 自身寫入後呼叫 sync() 只記錄新的修改時間與大小，不會觸發重新解析
+        - 以萬用字元監看資料夾時，之後新建立的檔案也會被偵測
+    """
+    
+    def __init__(self, interval=FILE_WATCH_INTERVAL, log=print):
+        """
+        初始化監看器
+        
+        Args:
+            interval: 輪詢（或 inotify 備援檢查）間隔秒數
+            log: 日誌函數
+        """
+        self.interval = interval
+        self.log = log
+        self._files = {}                # 路徑 -> [(修改時間, 大小), SHA-256, 回呼]
+        self._globs = []                # (資料夾, 萬用字元, 回呼)
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._inotify_fd = None
+    
+    @staticmethod
+    def _stat_key(path):
+        """修改時間與大小（檔案不存在時為 None）"""
+        try:
+            stat = os.stat(path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _digest(path):
+        """檔案內容雜湊（檔案不存在時為 None）"""
+        try:
+            return file_sha256(path)
+        except OSError:
+            return None
+    
+    def watch(self, path, callback):
+        """
+        監看單一檔案
+        
+        Args:
+            path: 檔案路徑（可尚未存在）
+            callback: 內容變更時於監看執行緒呼叫 callback(path)
+        """
+        path = Path(path)
+        with self._lock:
+            self._files[path] = [self._stat_key(path), self._digest(path), callback]
+    
+    def watch_glob(self, directory, pattern, callback):
+        """
+        監看資料夾中符合萬用字元的檔案（包含之後新建立的檔案）
+        
+        Args:
+            directory: 資料夾路徑
+            pattern: 萬用字元，例如 *.json
+            callback: 內容變更時於監看執行緒呼叫 callback(path)
+        """
+        with self._lock:
+            self._globs.append((Path(directory), pattern, callback))
+            self._scan_globs(initial=True)
+    
+    def _scan_globs(self, initial=False):
+        """加入萬用字元比對到的新檔案（啟動後才出現的檔案視為變更）"""
+        for directory, pattern, callback in self._globs:
+            for path in directory.glob(pattern):
+                if path not in self._files:
+                    if initial:
+                        self._files[path] = [self._stat_key(path), self._digest(path), callback]
+                    else:
+                        self._files[path] = [None, None, callback]
+    
+    def sync(self, path):
+        """
+        自身寫入後更新紀錄（只記錄修改時間與大小，不觸發回呼）
+        
+        Args:
+            path: 剛寫入的檔案路徑
+        """
+        path = Path(path)
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None:
+                entry[0] = self._stat_key(path)
+                entry[1] = None
+    
+    def check(self):
+        """
+        檢查所有監看中的檔案，內容有變更者呼叫回呼
+        
+        修改時間與大小未變動時只需一次 stat；變動時才計算雜湊，
+        雜湊相同（例如只是 touch）時不呼叫回呼
+        
+        Returns:
+            list: 內容有變更的檔案路徑
+        """
+        changed = []
+        with self._lock:
+            self._scan_globs()
+            for path, entry in self._files.items():
+                stat_key = self._stat_key(path)
+                if stat_key == entry[0]:
+                    continue
+                entry[0] = stat_key
+                digest = self._digest(path) if stat_key is not None else None
+                if digest is not None and digest == entry[1]:
+                    continue
+                entry[1] = digest
+                changed.append((path, entry[2]))
+            
+        # 回呼在鎖外執行：回呼可能等待其他鎖（例如玩家列表鎖），
+        # 而持有那些鎖的執行緒寫檔後會呼叫 sync，兩邊互等會死結
+        for path, callback in changed:
+            try:
+                callback(path)
+            except Exception as e:
+                self.log(f"重新載入 {path.name} 失敗: {str(e)}")
+        return [path for path, callback in changed]
+    
+    def start(self):
+        """啟動監看執行緒（Linux 優先使用 inotify）"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._inotify_fd = self._open_inotify()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止監看執行緒"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+    
+    def _open_inotify(self):
+        """
+        為監看中檔案所在的資料夾建立 inotify
+        
+        Returns:
+            int: inotify 檔案描述元（非 Linux 或無法使用時為 None，改用輪詢）
+        """
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                return None
+            with self._lock:
+                directories = {path.parent for path in self._files}
+                directories.update(directory for directory, pattern, callback in self._globs)
+            for directory in directories:
+                if directory.is_dir():
+                    libc.inotify_add_watch(fd, os.fsencode(str(directory)), INOTIFY_WATCH_MASK)
+            return fd
+        except (OSError, AttributeError) as e:
+            self.log(f"inotify 無法使用，改為每 {self.interval} 秒輪詢: {str(e)}")
+            return None
+    
+    def _run(self):
+        """監看迴圈：inotify 有事件時稍候合併連續寫入後檢查，逾時則做一次備援檢查"""
+        while not self._stop_event.is_set():
+            if self._inotify_fd is not None:
+                try:
+                    ready, _, _ = select.select([self._inotify_fd], [], [], self.interval)
+                except (OSError, ValueError):
+                    break
+                if ready:
+                    self._stop_event.wait(FILE_WATCH_DEBOUNCE)
+                    self._drain_inotify()
+            elif self._stop_event.wait(self.interval):
+                break
+            if self._stop_event.is_set():
+                break
+            self.check()
+    
+    def _drain_inotify(self):
+        """讀出所有待處理的 inotify 事件（事件內容不需解析，之後統一以 stat 比對）"""
+        while True:
+            try:
+                if not os.read(self._inotify_fd, 65536):
+                    return
+            except (BlockingIOError, OSError):
+                return
+
+
+# ============================================================================
+# 玩家名單批次匯入/匯出（CSV / JSON Lines 串流讀寫）
+# ============================================================================
+
+def player_file_format(path):
+    """依副檔名判斷玩家名單格式（.csv 為 CSV，其餘視為 JSON Lines）"""
+    return "csv" if Path(path).suffix.lower() == ".csv" else "jsonl"
+
+
+def parse_player_record(raw):
+    """
+    驗證並正規化一筆玩家資料
+    
+    Args:
+        raw: 從 CSV 或 JSON Lines 讀出的 dict
+    
+    Returns:
+        dict: {"name", "xuid", "permission", "allowlisted"}，
+              權限/白名單欄位留空時為 None（匯入時保持不變）
+    
+    Raises:
+        ValueError: XUID、權限或白名單欄位格式錯誤
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("資料不是物件")
+    
+    xuid = str(raw.get("xuid") or "").strip()
+    if not xuid.isdigit():
+        raise ValueError(f"XUID 格式錯誤: {xuid or '（空白）'}")
+    
+    permission = str(raw.get("permission") or "").strip().lower() or None
+    if permission is not None and permission not in PLAYER_PERMISSION_LEVELS:
+        raise ValueError(f"未知的權限等級: {permission}")
+    
+    allowlisted = raw.get("allowlisted")
+    if isinstance(allowlisted, str):
+        value = allowlisted.strip().lower()
+        if not value:
+            allowlisted = None
+        elif value in ("true", "1", "yes", "y"):
+            allowlisted = True
+        elif value in ("false", "0", "no", "n"):
+            allowlisted = False
+        else:
+            raise ValueError(f"白名單欄位格式錯誤: {allowlisted}")
+    elif allowlisted is not None:
+        if not isinstance(allowlisted, (bool, int)):
+            raise ValueError(f"白名單欄位格式錯誤: {allowlisted}")
+        allowlisted = bool(allowlisted)
+    
+    return {
+        "name": str(raw.get("name") or "").strip(),
+        "xuid": xuid,
+        "permission": permission,
+        "allowlisted": allowlisted,
+    }
+
+
+def iter_player_records(path):
+    """
+    逐筆讀取玩家名單檔案（串流處理，不會一次載入整個檔案）
+    
+    Args:
+        path: 檔案路徑
+    
+    Yields:
+        tuple: (行號, 正規化後的資料或 None, 錯誤訊息或 None)
+    
+    Raises:
+        ValueError: CSV 缺少 xuid 欄位
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if player_file_format(path) == "csv":
+            reader = csv.DictReader(f)
+            if "xuid" not in (reader.fieldnames or ()):
+                raise ValueError("CSV 缺少 xuid 欄位")
+            for row in reader:
+                try:
+                    yield reader.line_num, parse_player_record(row), None
+                except ValueError as e:
+                    yield reader.line_num, None, str(e)
+        else:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, parse_player_record(json.loads(line)), None
+                except ValueError as e:
+                    yield line_no, None, str(e)
+
+
+def write_player_records(path, records):
+    """
+    逐筆寫出玩家名單（先寫暫存檔再取代）
+    
+    Args:
+        path: 輸出檔案路徑（.csv 為 CSV，其餘為 JSON Lines）
+        records: 可迭代的玩家資料 dict
+    
+    Returns:
+        int: 寫出的筆數
+    """
+    path = Path(path)
+    temp_file = path.with_name(path.name + ".tmp")
+    count = 0
+    with open(temp_file, 'w', encoding='utf-8', newline='') as f:
+        if player_file_format(path) == "csv":
+            writer = csv.DictWriter(f, fieldnames=PLAYER_RECORD_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+                count += 1
+        else:
+            for record in records:
+                f.write(json.dumps({key: record.get(key) for key in PLAYER_RECORD_FIELDS}, ensure_ascii=False) + "\n")
+                count += 1
+    os.replace(temp_file, path)
+    return count
+
+
+# ============================================================================
+# 差異更新（只替換版本間有變更的檔案）
+# ============================================================================
+
+def move_path(src, dst):
+    """
+    搬移檔案或資料夾（同一磁碟區內為原子改名，跨磁碟區時才退回複製後刪除）
+    
+    Args:
+        src: 來源路徑
+        dst: 目的路徑（檔案已存在時會被取代）
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        if Path(dst).is_file():
+            Path(dst).unlink()
+        shutil.move(str(src), str(dst))
+
+
+class DeltaUpdate:
+    """
+    BDS 差異更新
+    
+    功能:
+        - 以硬連結將新版本的版本資料夾複製到暫存資料夾，依大小與 SHA-256 比對已安裝的檔案
+        - 只替換有變更的執行檔與資源包，世界與設定檔完全不動，停機時間與世界大小無關
+        - 被替換或移除的舊檔案移到 server_old（同一磁碟區內只是改名），失敗時可搬回還原
+        - 上一版安裝的檔案清單記錄於 data/installed_release.json，用來找出新版本已移除的檔案
+        - 搬移前寫入更新日誌（data/update_journal.json），程式在搬移途中中斷時，
+          下次啟動依日誌狀態確定地還原（搬移未完成）或完成收尾（搬移已完成）
+    
+    用途:
+        解壓縮與比對在關閉伺服器前完成，關閉後只剩下檔案搬移
+    """
+    
+    def __init__(self, server_dir, staging_dir, backup_dir, manifest_file, journal_file,
+                 preserved=PRESERVED_SERVER_ITEMS):
+        """
+        初始化差異更新
+        
+        Args:
+            server_dir: 已安裝的伺服器資料夾
+            staging_dir: 新版本解壓縮的暫存資料夾
+            backup_dir: 被替換檔案的備份資料夾（server_old）
+            manifest_file: 已安裝檔案清單
+            journal_file: 更新日誌
+            preserved: 保留的頂層項目（已存在時不覆蓋、不移除）
+        """
+        self.server_dir = Path(server_dir)
+        self.staging_dir = Path(staging_dir)
+        self.backup_dir = Path(backup_dir)
+        self.manifest_file = Path(manifest_file)
+        self.journal_file = Path(journal_file)
+        self.preserved = set(preserved)
+        self.added = []                     # 新增的檔案（相對路徑）
+        self.changed = []                   # 內容變更的檔案
+        self.removed = []                   # 新版本已移除的檔案
+        self.unchanged = 0                  # 未變更的檔案數
+        self.release_files = {}             # 新版本檔案清單: 相對路徑 -> SHA-256
+        self.entries = []                   # 搬移計畫: [相對路徑, 是否有舊檔, "install"/"remove"]
+    
+    @classmethod
+    def recover(cls, journal_file, log=print):
+        """
+        處理上次中斷的更新（依日誌狀態還原或完成收尾）
+        
+        Args:
+            journal_file: 更新日誌
+            log: 日誌輸出函數
+        
+        Returns:
+            str: "rolled_back" / "rolled_forward"，沒有中斷的更新時返回 None
+        """
+        journal_file = Path(journal_file)
+        if not journal_file.exists():
+            return None
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            journal = json.load(f)
+        
+        delta = cls(journal["server_dir"], journal["staging_dir"], journal["backup_dir"],
+                    journal["manifest_file"], journal_file)
+        delta.entries = journal["entries"]
+        delta.release_files = journal.get("files", {})
+        
+        if journal.get("state") == "applied":
+            # 所有檔案已搬移完成，只差寫入安裝清單與清理
+            log(f"偵測到上次更新至 {journal['version']} 時中斷（檔案已全部替換），完成收尾")
+            delta.finish(journal["version"])
+            return "rolled_forward"
+        
+        log(f"偵測到上次更新至 {journal['version']} 時中斷（檔案替換未完成），還原為更新前的檔案")
+        delta.rollback()
+        journal_file.unlink()
+        delta.cleanup()
+        return "rolled_back"
+    
+    def stage(self, release_dir):
+        """
+        以硬連結將版本資料夾複製到暫存資料夾
+        
+        搬移到伺服器資料夾的是暫存資料夾中的連結，版本資料夾本身保持完整，可供日後回滾；
+        保留項目（設定檔範本等）一律複製，避免在伺服器中修改時連帶改到版本資料夾
+        """
+        if self.staging_dir.exists():
+            shutil.rmtree(self.staging_dir)
+        link_tree(release_dir, self.staging_dir, copy_items=self.preserved)
+    
+    def _is_preserved(self, relative_path):
+        """是否為保留項目且伺服器中已存在"""
+        top = relative_path.split("/", 1)[0]
+        return top in self.preserved and (self.server_dir / top).exists()
+    
+    def plan(self):
+        """
+        比對暫存資料夾與已安裝的伺服器，計算需要新增/替換/移除的檔案
+        
+        Returns:
+            int: 需要變更的檔案總數
+        """
+        self.added, self.changed, self.removed = [], [], []
+        self.unchanged = 0
+        self.release_files = {}
+        
+        for path in sorted(self.staging_dir.rglob("*")):
+            if not path.is_file():
+                continue
+            relative_path = path.relative_to(self.staging_dir).as_posix()
+            digest = file_sha256(path)
+            self.release_files[relative_path] = digest
+            if self._is_preserved(relative_path):
+                continue
+            
+            installed = self.server_dir / relative_path
+            if not installed.is_file():
+                self.added.append(relative_path)
+            elif installed.stat().st_size != path.stat().st_size or file_sha256(installed) != digest:
+                self.changed.append(relative_path)
+            else:
+                self.unchanged += 1
+        
+        # 上一版安裝、新版本已不存在的檔案（使用者自行加入的檔案不在清單中，不會被移除）
+        for relative_path in sorted(self._load_manifest()):
+            if (relative_path not in self.release_files and not self._is_preserved(relative_path)
+                    and (self.server_dir / relative_path).is_file()):
+                self.removed.append(relative_path)
+        
+        return len(self.added) + len(self.changed) + len(self.removed)
+    
+    def _load_manifest(self):
+        """讀取上一版安裝的檔案清單"""
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError):
+            return {}
+    
+    def apply(self, version):
+        """
+        套用變更（伺服器需已關閉）
+        
+        先寫入更新日誌，舊檔案移到 backup_dir，再將新檔案從暫存資料夾移入；
+        任一步驟失敗時依日誌還原已搬移的檔案後再拋出例外
+        
+        Args:
+            version: 安裝的版本（寫入日誌）
+        """
+        if self.backup_dir.exists():
+            shutil.rmtree(self.backup_dir)
+        self.entries = [[path, (self.server_dir / path).exists(), "install"] for path in self.added + self.changed]
+        self.entries += [[path, True, "remove"] for path in self.removed]
+        self._write_journal(version, "applying")
+        
+        try:
+            for relative_path, had_old, action in self.entries:
+                target = self.server_dir / relative_path
+                if had_old:
+                    backup = self.backup_dir / relative_path
+                    backup.parent.mkdir(parents=True, exist_ok=True)
+                    move_path(target, backup)
+                if action == "install":
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    move_path(self.staging_dir / relative_path, target)
+        except Exception:
+            self.rollback()
+            self.journal_file.unlink()
+            raise
+    
+        self._write_journal(version, "applied")
+    
+    def _write_journal(self, version, state):
+        """寫入更新日誌（先寫暫存檔再取代，確保日誌本身不會只寫一半）"""
+        journal = {
+            "version": version,
+            "state": state,
+            "server_dir": str(self.server_dir),
+            "staging_dir": str(self.staging_dir),
+            "backup_dir": str(self.backup_dir),
+            "manifest_file": str(self.manifest_file),
+            "entries": self.entries,
+            "files": self.release_files,
+        }
+        temp_file = self.journal_file.with_name(self.journal_file.name + ".tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(journal, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.journal_file)
+    
+    def rollback(self):
+        """
+        依搬移計畫還原（可在任何中斷點執行，結果確定）
+        
+        - 舊檔案已移到備份資料夾 → 搬回（覆蓋已移入的新檔案）
+        - 新增的檔案已移入（暫存資料夾中已不存在）→ 刪除
+        """
+        for relative_path, had_old, action in reversed(self.entries):
+            target = self.server_dir / relative_path
+            backup = self.backup_dir / relative_path
+            if had_old:
+                if backup.exists():
+                    move_path(backup, target)
+            elif target.exists() and not (self.staging_dir / relative_path).exists():
+                target.unlink()
+        self.entries = []
+    
+    def finish(self, version):
+        """更新完成：寫入安裝檔案清單（原子寫入）、刪除更新日誌與暫存資料夾"""
+        write_json_atomic(self.manifest_file, {"version": version, "files": self.release_files}, indent=2)
+        if self.journal_file.exists():
+            self.journal_file.unlink()
+        self.cleanup()
+    
+    def cleanup(self):
+        """刪除暫存資料夾"""
+        if self.staging_dir.exists():
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+# ============================================================================
+# 版本化安裝（versions/<版本>/ 與使用中版本的指標）
+# ============================================================================
+
+def link_tree(source_dir, target_dir, copy_items=()):
+    """
+    以硬連結複製資料夾（不複製檔案內容；檔案系統不支援硬連結時退回一般複製）
+    
+    Args:
+        source_dir: 來源資料夾
+        target_dir: 目的資料夾
+        copy_items: 一律複製（不建立連結）的頂層項目
+    """
+    source_dir, target_dir = Path(source_dir), Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    for path in sorted(source_dir.rglob("*")):
+        relative_path = path.relative_to(source_dir)
+        target = target_dir / relative_path
+        if path.is_dir():
+            target.mkdir(parents=True, exist_ok=True)
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if relative_path.parts[0] in copy_items:
+            shutil.copy2(path, target)
+            continue
+        try:
+            os.link(path, target)
+        except OSError:
+            shutil.copy2(path, target)
+
+
+class VersionStore:
+    """
+    版本化安裝資料夾
+    
+    功能:
+        - 每個安裝過的版本完整解壓縮保存在 versions/<版本>/，世界與設定檔留在 server_files，不隨版本移動
+        - 使用中的版本記錄於 data/installed_versions.json（指標），切換版本時由差異更新
+          以硬連結替換 server_files 中的執行檔與資源包，不需重新下載或解壓縮
+        - 回滾只是把指標切回上一個使用的版本並重新啟動
+        - 依保留數量刪除最久未使用的版本（使用中與上一個版本不刪除）
+    
+    用途:
+        取代只保留一份舊檔案的 server_old，讓最近幾個版本都能立即回滾
+    """
+    
+    def __init__(self, versions_dir, index_file):
+        """
+        初始化版本資料夾管理
+        
+        Args:
+            versions_dir: 版本資料夾根目錄（versions/）
+            index_file: 版本記錄檔（使用中的版本與各版本的安裝/使用時間）
+        """
+        self.versions_dir = Path(versions_dir)
+        self.index_file = Path(index_file)
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+    
+    def _load_index(self):
+        """載入版本記錄"""
+        index = {"active": None, "versions": {}}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return index
+    
+    def _save_index(self):
+        """寫入版本記錄（原子寫入）"""
+        write_json_atomic(self.index_file, self.index, indent=2)
+    
+    def path(self, version):
+        """版本資料夾路徑"""
+        return self.versions_dir / version
+    
+    def has(self, version):
+        """版本資料夾是否存在"""
+        return self.path(version).is_dir()
+    
+    @property
+    def active(self):
+        """使用中的版本（尚未以版本資料夾安裝過時為 None）"""
+        return self.index.get("active")
+    
+    def previous(self):
+        """上一個使用的版本（回滾目標，沒有時返回 None）"""
+        for release in self.versions():
+            if not release["active"] and release["activated_at"]:
+                return release["version"]
+        return None
+    
+    def add(self, version, zip_path):
+        """
+        解壓縮安裝檔為版本資料夾
+        
+        先以硬連結複製使用中的版本，解壓縮時略過大小與 CRC 相同的檔案（版本間大多數資源不變），
+        再刪除新版本已沒有的檔案；解壓縮到 <版本>.partial 後才改名，中斷時不會留下不完整的版本資料夾
+        
+        Args:
+            version: 版本號
+            zip_path: 安裝檔路徑
+        
+        Returns:
+            tuple: (解壓縮的檔案數, 沿用使用中版本的檔案數)
+        """
+        target = self.path(version)
+        partial = self.versions_dir / f"{version}.partial"
+        if partial.exists():
+            shutil.rmtree(partial)
+        seed = self.path(self.active) if self.active and self.has(self.active) else None
+        if seed is not None:
+            link_tree(seed, partial)
+        extracted, reused = extract_server_archive(zip_path, partial)
+        
+        if seed is not None:
+            with zipfile.ZipFile(zip_path, 'r') as zipf:
+                names = {name.rstrip("/") for name in zipf.namelist()}
+            for path in sorted(partial.rglob("*"), reverse=True):
+                relative_path = path.relative_to(partial).as_posix()
+                if relative_path in names:
+                    continue
+                if path.is_dir():
+                    if not any(path.iterdir()):
+                        path.rmdir()
+                else:
+                    path.unlink()
+        
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(partial, target)
+        self._touch(version, "installed_at")
+        return extracted, reused
+    
+    def capture(self, version, server_dir, files, copy_items=PRESERVED_SERVER_ITEMS):
+        """
+        從目前的伺服器檔案建立版本資料夾（升級前的安裝沒有版本資料夾時使用，讓它也能回滾）
+        
+        Args:
+            version: 目前安裝的版本
+            server_dir: 伺服器資料夾
+            files: 該版本的檔案清單（相對路徑）
+            copy_items: 不納入的頂層項目（世界與設定檔）
+        """
+        partial = self.versions_dir / f"{version}.partial"
+        if partial.exists():
+            shutil.rmtree(partial)
+        for relative_path in files:
+            source = Path(server_dir) / relative_path
+            if relative_path.split("/", 1)[0] in copy_items or not source.is_file():
+                continue
+            target = partial / relative_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+        partial.mkdir(parents=True, exist_ok=True)
+        os.replace(partial, self.path(version))
+        self._touch(version, "installed_at")
+    
+    def _touch(self, version, field):
+        """記錄版本的安裝或使用時間"""
+        with self._lock:
+            entry = self.index["versions"].setdefault(version, {})
+            entry[field] = datetime.now().isoformat(timespec="seconds")
+            self._save_index()
+    
+    def activate(self, version, keep=INSTALLED_VERSIONS_KEEP):
+        """
+        將指標切換到指定版本，並依保留數量刪除最久未使用的版本
+        
+        Args:
+            version: 已安裝到伺服器的版本
+            keep: 保留的版本數（含使用中的版本）
+        
+        Returns:
+            list: 被刪除的版本
+        """
+        self._touch(version, "activated_at")
+        with self._lock:
+            self.index["active"] = version
+            self._save_index()
+        
+        removed = []
+        protected = {version, self.previous()}
+        for release in self.versions()[max(keep, 1):]:
+            if release["version"] in protected:
+                continue
+            shutil.rmtree(self.path(release["version"]), ignore_errors=True)
+            removed.append(release["version"])
+        if removed:
+            with self._lock:
+                for removed_version in removed:
+                    self.index["versions"].pop(removed_version, None)
+                self._save_index()
+        return removed
+    
+    def versions(self):
+        """
+        列出已安裝的版本資料夾
+        
+        Returns:
+            list: [{"version", "installed_at", "activated_at", "active"}]，依最後安裝或使用時間由新到舊
+        """
+        if not self.versions_dir.exists():
+            return []
+        releases = []
+        for path in self.versions_dir.iterdir():
+            if not path.is_dir() or path.name.endswith(".partial"):
+                continue
+            entry = self.index["versions"].get(path.name, {})
+            releases.append({
+                "version": path.name,
+                "installed_at": entry.get("installed_at"),
+                "activated_at": entry.get("activated_at"),
+                "active": path.name == self.active,
+            })
+        releases.sort(key=lambda r: max(r["activated_at"] or "", r["installed_at"] or ""), reverse=True)
+        return releases
+
+
+# ============================================================================
+# 更新前試啟動（canary）
+# ============================================================================
+
+def find_free_udp_ports(count):
+    """
+    取得目前未被佔用的 UDP 連接埠
+    
+    Args:
+        count: 需要的連接埠數量
+    
+    Returns:
+        list: 連接埠號碼
+    """
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(("", 0))
+            sockets.append(sock)
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def run_canary_boot(release_dir, config_dir, canary_dir, timeout, log=print):
+    """
+    以新版本試啟動一個臨時伺服器，確認能完成啟動後再正式替換
+    
+    功能:
+        - 將暫存的新版本複製到臨時資料夾（不含世界），並複製一份正式伺服器的設定檔
+        - 改用替代連接埠與臨時世界，不影響運行中的正式伺服器
+        - 等待輸出出現啟動完成訊息（逾時或進程提前結束視為失敗），成功後送出 stop 關閉
+        - 結束後刪除臨時資料夾
+    
+    Args:
+        release_dir: 新版本暫存資料夾
+        config_dir: 正式伺服器資料夾（複製設定檔來源）
+        canary_dir: 試啟動使用的臨時資料夾
+        timeout: 等待啟動完成的秒數
+        log: 日誌輸出函數
+    
+    Returns:
+        tuple: (是否成功, 說明訊息, 最後的輸出行)
+    """
+    canary_dir = Path(canary_dir)
+    if canary_dir.exists():
+        shutil.rmtree(canary_dir)
+    shutil.copytree(release_dir, canary_dir, ignore=shutil.ignore_patterns("worlds"))
+    for filename in CANARY_CONFIG_FILES:
+        source = Path(config_dir) / filename
+        if source.exists():
+            shutil.copy2(source, canary_dir / filename)
+    
+    # 改用替代連接埠與臨時世界
+    port, port_v6 = find_free_udp_ports(2)
+    overrides = {
+        "server-port": str(port),
+        "server-portv6": str(port_v6),
+        "level-name": CANARY_LEVEL_NAME,
+        "enable-lan-visibility": "false",
+    }
+    properties = ServerProperties.load(canary_dir / "server.properties")
+    properties.update(overrides)
+    properties.save()
+    
+    log(f"正在試啟動新版本（連接埠 {port}/{port_v6}，最多等待 {timeout} 秒）...")
+    process = None
+    started = threading.Event()
+    output_tail = deque(maxlen=CANARY_OUTPUT_TAIL_LINES)
+    
+    def read_output():
+        for line in process.stdout:
+            line = line.rstrip()
+            output_tail.append(line)
+            if any(marker in line for marker in SERVER_STARTED_MARKERS):
+                started.set()
+    
+    try:
+        process = subprocess.Popen(
+            [str(canary_dir / SERVER_EXECUTABLE)],
+            cwd=str(canary_dir),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            **server_popen_options(canary_dir)
+        )
+        threading.Thread(target=read_output, daemon=True).start()
+        
+        start_time = time.monotonic()
+        while not started.wait(0.5):
+            if process.poll() is not None:
+                return False, f"試啟動的伺服器提前結束（結束代碼 {process.returncode}）", list(output_tail)
+            if time.monotonic() - start_time > timeout:
+                return False, f"試啟動的伺服器在 {timeout} 秒內未完成啟動", list(output_tail)
+        
+        elapsed = time.monotonic() - start_time
+        process.stdin.write("stop\n")
+        process.stdin.flush()
+        try:
+            process.wait(timeout=CANARY_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            pass
+        return True, f"新版本試啟動成功（{elapsed:.1f} 秒完成啟動）", list(output_tail)
+    except OSError as e:
+        return False, f"無法啟動試啟動的伺服器: {e}", list(output_tail)
+    finally:
+        if process is not None:
+            force_stop_process(process)
+        shutil.rmtree(canary_dir, ignore_errors=True)
+
+
+# ============================================================================
+# 伺服器進程監控
+# ============================================================================
+
+class ProcessSupervisor:
+    """
+    伺服器進程監控器
+    
+    功能:
+        - 保留最近的伺服器輸出，供崩潰報告使用
+        - 記錄每次運行的啟動/結束時間、運行時長與結束代碼
+        - 計算崩潰後自動重啟的指數退避延遲
+        - 偵測短時間內連續崩潰（崩潰循環）並停止自動重啟
+    
+    用途:
+        與介面無關的崩潰偵測策略，由主程式的進程監看執行緒呼叫
+    """
+    def __init__(self, history_file, report_dir, tail_lines=CRASH_REPORT_TAIL_LINES, log=print):
+        """
+        初始化監控器
+        
+        Args:
+            history_file: 運行歷史記錄檔路徑
+            report_dir: 崩潰報告資料夾
+            tail_lines: 崩潰報告保留的輸出行數
+            log: 日誌輸出函數
+        """
+        self.history_file = history_file
+        self.report_dir = report_dir
+        self.log = log
+        self.output_tail = deque(maxlen=tail_lines)
+        self.started_at = None                  # 目前運行的啟動時間（datetime）
+        self._started_monotonic = None
+        self.consecutive_crashes = 0            # 連續崩潰次數（用於退避計算）
+        self._recent_crashes = deque()          # 最近崩潰的時間點（monotonic）
+        self._lock = threading.Lock()
+        self.history = self._load_history()
+    
+    def _load_history(self):
+        """載入運行歷史記錄"""
+        history = {"start_count": 0, "crash_count": 0, "auto_restart_count": 0, "sessions": []}
+        if self.history_file.exists():
+            try:
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    history.update(json.load(f))
+            except Exception as e:
+                self.log(f"載入運行歷史記錄失敗: {e}")
+        return history
+    
+    def _save_history(self):
+        """儲存運行歷史記錄（只保留最近的記錄）"""
+        try:
+            self.history["sessions"] = self.history["sessions"][-SERVER_HISTORY_MAX_SESSIONS:]
+            write_json_atomic(self.history_file, self.history)
+        except Exception as e:
+            self.log(f"儲存運行歷史記錄失敗: {e}")
+    
+    def record_line(self, line):
+        """記錄一行伺服器輸出"""
+        self.output_tail.append(line)
+    
+    def record_start(self, is_auto_restart=False):
+        """
+        記錄伺服器啟動
+        
+        Args:
+            is_auto_restart: 是否為崩潰後的自動重啟
+        """
+        with self._lock:
+            self.started_at = datetime.now()
+            self._started_monotonic = time.monotonic()
+            self.output_tail.clear()
+            self.history["start_count"] += 1
+            if is_auto_restart:
+                self.history["auto_restart_count"] += 1
+            self._save_history()
+    
+    def uptime_seconds(self):
+        """目前運行的時長（秒），未運行時為 0"""
+        if self._started_monotonic is None:
+            return 0
+        return time.monotonic() - self._started_monotonic
+    
+    def record_exit(self, exit_code, crashed):
+        """
+        記錄伺服器結束
+        
+        Args:
+            exit_code: 進程結束代碼
+            crashed: 是否為非預期結束
+        
+        Returns:
+            dict: 本次運行的記錄
+        """
+        with self._lock:
+            uptime = self.uptime_seconds()
+            session = {
+                "start": self.started_at.isoformat() if self.started_at else None,
+                "end": datetime.now().isoformat(),
+                "uptime_seconds": int(uptime),
+                "exit_code": exit_code,
+                "crashed": crashed
+            }
+            self.history["sessions"].append(session)
+            
+            if crashed:
+                self.history["crash_count"] += 1
+                # 運行足夠久才崩潰，視為新的崩潰序列
+                if uptime >= CRASH_STABLE_UPTIME:
+                    self.consecutive_crashes = 0
+                self.consecutive_crashes += 1
+                now = time.monotonic()
+                self._recent_crashes.append(now)
+                while self._recent_crashes and now - self._recent_crashes[0] > CRASH_LOOP_WINDOW:
+                    self._recent_crashes.popleft()
+            else:
+                self.consecutive_crashes = 0
+            
+            self.started_at = None
+            self._started_monotonic = None
+            self._save_history()
+            return session
+    
+    def next_restart_delay(self, max_attempts):
+        """
+        計算崩潰後的自動重啟延遲
+        
+        Args:
+            max_attempts: 崩潰循環判定次數（視窗時間內）
+        
+        Returns:
+            int|None: 延遲秒數；判定為崩潰循環時返回 None
+        """
+        if len(self._recent_crashes) >= max_attempts:
+            return None
+        delay = CRASH_RESTART_BASE_DELAY * (2 ** max(0, self.consecutive_crashes - 1))
+        return min(delay, CRASH_RESTART_MAX_DELAY)
+    
+    def write_crash_report(self, session, server_version):
+        """
+        寫入崩潰報告
+        
+        Args:
+            session: record_exit 返回的運行記錄
+            server_version: 伺服器版本
+        
+        Returns:
+            Path: 崩潰報告檔案路徑
+        """
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_file = self.report_dir / f"crash_{timestamp}.log"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write("BDS Console 崩潰報告\n")
+            f.write(f"崩潰時間: {session['end']}\n")
+            f.write(f"啟動時間: {session['start']}\n")
+            f.write(f"運行時長: {session['uptime_seconds']} 秒\n")
+            f.write(f"結束代碼: {session['exit_code']}\n")
+            f.write(f"伺服器版本: {server_version}\n")
+            f.write(f"累計崩潰次數: {self.history['crash_count']}\n")
+            f.write("-" * 60 + "\n")
+            f.write(f"最後 {len(self.output_tail)} 行輸出:\n")
+            for line in list(self.output_tail):
+                f.write(line + "\n")
+        return report_file
+
+
+# ============================================================================
+# 資源監控
+# ============================================================================
+
+SPARKLINE_BLOCKS = "▁▂▃▄▅▆▇█"
+
+
+def render_sparkline(values, width=40, max_value=None):
+    """
+    將數值序列轉換為 Unicode 迷你折線圖
+    
+    Args:
+        values: 數值序列（None 視為缺值）
+        width: 顯示寬度（只取最後 width 筆）
+        max_value: 固定上限（例如 CPU 100%），None 則依資料自動縮放
+    
+    Returns:
+        str: 迷你折線圖字串（不足寬度時以空白補齊左側）
+    """
+    values = [v for v in list(values)[-width:] if v is not None]
+    if not values:
+        return " " * width
+    low = 0 if max_value is not None else min(values)
+    high = max_value if max_value is not None else max(values)
+    span = high - low
+    levels = len(SPARKLINE_BLOCKS) - 1
+    chars = []
+    for v in values:
+        if span <= 0:
+            index = levels // 2 if high > 0 else 0
+        else:
+            index = int(round((min(v, high) - low) / span * levels))
+        chars.append(SPARKLINE_BLOCKS[max(0, min(levels, index))])
+    return "".join(chars).rjust(width)
+
+
+class ResourceSampler:
+    """
+    伺服器進程資源取樣器
+    
+    功能:
+        - 以固定間隔讀取進程的 CPU、記憶體（RSS）、磁碟 I/O 與執行緒/控制代碼數
+        - Linux 讀取 /proc，Windows 使用 kernel32 API（不需額外套件）
+        - 取樣結果存放於固定長度的環狀緩衝區
+        - 每次取樣只讀取少量計數器，間隔之間完全休眠
+    
+    用途:
+        在狀態頁繪製資源趨勢圖，協助發現記憶體洩漏與延遲尖峰
+    """
+    def __init__(self, history_size=RESOURCE_HISTORY_SIZE, on_sample=None):
+        """
+        初始化取樣器
+        
+        Args:
+            history_size: 環狀緩衝區保留的取樣筆數
+            on_sample: 每次取樣完成時的回呼，參數為取樣結果 dict
+        """
+        self.samples = deque(maxlen=history_size)
+        self.on_sample = on_sample
+        self.pid = None
+        self._stop_event = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._cpu_count = os.cpu_count() or 1
+    
+    @property
+    def running(self):
+        """取樣執行緒是否運行中"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self, pid, interval=RESOURCE_SAMPLE_INTERVAL):
+        """
+        開始取樣指定進程（會先停止前一次取樣）
+        
+        Args:
+            pid: 進程 ID
+            interval: 取樣間隔（秒）
+        """
+        self.stop()
+        with self._lock:
+            self.pid = pid
+            self.samples.clear()
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._run,
+                                            args=(pid, max(1, interval), self._stop_event),
+                                            name="ResourceSampler", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """停止取樣（保留已收集的資料）"""
+        with self._lock:
+            if self._stop_event is not None:
+                self._stop_event.set()
+            self._stop_event = None
+            self._thread = None
+            self.pid = None
+    
+    def latest(self):
+        """
+        取得最新一筆取樣
+        
+        Returns:
+            dict: 取樣結果，尚無資料時返回 None
+        """
+        return self.samples[-1] if self.samples else None
+    
+    def series(self, key):
+        """
+        取得指定欄位的歷史序列
+        
+        Args:
+            key: 欄位名稱（cpu / rss_mb / read_kbps / write_kbps / threads / handles）
+        
+        Returns:
+            list: 歷史數值
+        """
+        return [s[key] for s in list(self.samples)]
+    
+    def _run(self, pid, interval, stop_event):
+        """取樣執行緒主迴圈"""
+        reader = self._open_reader(pid)
+        if reader is None:
+            return
+        read_counters, close = reader
+        previous = None
+        try:
+            while not stop_event.is_set():
+                try:
+                    counters = read_counters()
+                except Exception:
+                    # 進程已結束或無法讀取
+                    break
+                if previous is not None:
+                    sample = self._build_sample(previous, counters)
+                    self.samples.append(sample)
+                    if self.on_sample:
+                        try:
+                            self.on_sample(sample)
+                        except Exception:
+                            pass
+                previous = counters
+                stop_event.wait(interval)
+        finally:
+            close()
+    
+    def _build_sample(self, previous, current):
+        """由前後兩次計數器計算取樣結果（CPU 與 I/O 為區間平均值）"""
+        elapsed = max(current["time"] - previous["time"], 1e-6)
+        cpu_seconds = current["cpu_seconds"] - previous["cpu_seconds"]
+        
+        def rate(key):
+            if current[key] is None or previous[key] is None:
+                return None
+            return max(0, current[key] - previous[key]) / elapsed / 1024
+        
+        return {
+            "timestamp": datetime.now().strftime("%H:%M:%S"),
+            "cpu": max(0.0, cpu_seconds / elapsed / self._cpu_count * 100),
+            "rss_mb": current["rss_bytes"] / (1024 * 1024),
+            "read_kbps": rate("read_bytes"),
+            "write_kbps": rate("write_bytes"),
+            "threads": current["threads"],
+            "handles": current["handles"],
+        }
+    
+    def _open_reader(self, pid):
+        """
+        建立平台對應的計數器讀取函數
+        
+        Returns:
+            tuple: (read_counters, close)，平台不支援或進程不存在時返回 None
+        """
+        try:
+            if sys.platform == 'win32':
+                return self._open_windows_reader(pid)
+            if os.path.isdir(f"/proc/{pid}"):
+                return self._open_proc_reader(pid)
+        except Exception as e:
+            print(f"資源取樣初始化失敗: {e}")
+        return None
+    
+    def _open_proc_reader(self, pid):
+        """Linux：讀取 /proc/<pid>/stat、io 與 fd"""
+        clock_ticks = os.sysconf('SC_CLK_TCK')
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        proc_dir = f"/proc/{pid}"
+        
+        def read_counters():
+            with open(f"{proc_dir}/stat", 'r') as f:
+                # 進程名稱可能含空白，從最後一個 ")" 之後開始解析（第 3 欄起）
+                fields = f.read().rsplit(")", 1)[1].split()
+            read_bytes = write_bytes = None
+            try:
+                with open(f"{proc_dir}/io", 'r') as f:
+                    io = dict(line.split(":", 1) for line in f.read().splitlines() if ":" in line)
+                read_bytes = int(io["read_bytes"])
+                write_bytes = int(io["write_bytes"])
+            except (OSError, KeyError, ValueError):
+                pass
+            try:
+                handles = len(os.listdir(f"{proc_dir}/fd"))
+            except OSError:
+                handles = None
+            return {
+                "time": time.monotonic(),
+                "cpu_seconds": (int(fields[11]) + int(fields[12])) / clock_ticks,
+                "rss_bytes": int(fields[21]) * page_size,
+                "threads": int(fields[17]),
+                "read_bytes": read_bytes,
+                "write_bytes": write_bytes,
+                "handles": handles,
+            }
+        
+        return read_counters, lambda: None
+    
+    def _open_windows_reader(self, pid):
+        """Windows：GetProcessTimes / K32GetProcessMemoryInfo / GetProcessIoCounters / GetProcessHandleCount / Toolhelp32"""
+        from ctypes import wintypes
+        
+        # 使用獨立的 WinDLL 物件設定 restype/argtypes，不影響其他程式碼使用的 ctypes.windll.kernel32
+        # （未設定時 HANDLE 預設以 32 位元 int 傳遞，64 位元系統上會被截斷）
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        PROCESS_VM_READ = 0x0010
+        TH32CS_SNAPTHREAD = 0x00000004
+        INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+        
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD),
+                        ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t)]
+        
+        class IO_COUNTERS(ctypes.Structure):
+            _fields_ = [("ReadOperationCount", ctypes.c_ulonglong),
+                        ("WriteOperationCount", ctypes.c_ulonglong),
+                        ("OtherOperationCount", ctypes.c_ulonglong),
+                        ("ReadTransferCount", ctypes.c_ulonglong),
+                        ("WriteTransferCount", ctypes.c_ulonglong),
+                        ("OtherTransferCount", ctypes.c_ulonglong)]
+        
+        class THREADENTRY32(ctypes.Structure):
+            _fields_ = [("dwSize", wintypes.DWORD),
+                        ("cntUsage", wintypes.DWORD),
+                        ("th32ThreadID", wintypes.DWORD),
+                        ("th32OwnerProcessID", wintypes.DWORD),
+                        ("tpBasePri", wintypes.LONG),
+                        ("tpDeltaPri", wintypes.LONG),
+                        ("dwFlags", wintypes.DWORD)]
+        
+        LPFILETIME = ctypes.POINTER(ctypes.c_ulonglong)     # FILETIME 與 64 位元整數佈局相同
+        kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.GetProcessTimes.argtypes = [wintypes.HANDLE, LPFILETIME, LPFILETIME, LPFILETIME, LPFILETIME]
+        kernel32.GetProcessTimes.restype = wintypes.BOOL
+        kernel32.K32GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS),
+                                                     wintypes.DWORD]
+        kernel32.K32GetProcessMemoryInfo.restype = wintypes.BOOL
+        kernel32.GetProcessIoCounters.argtypes = [wintypes.HANDLE, ctypes.POINTER(IO_COUNTERS)]
+        kernel32.GetProcessIoCounters.restype = wintypes.BOOL
+        kernel32.GetProcessHandleCount.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD)]
+        kernel32.GetProcessHandleCount.restype = wintypes.BOOL
+        kernel32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+        kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+        kernel32.Thread32First.argtypes = [wintypes.HANDLE, ctypes.POINTER(THREADENTRY32)]
+        kernel32.Thread32First.restype = wintypes.BOOL
+        kernel32.Thread32Next.argtypes = [wintypes.HANDLE, ctypes.POINTER(THREADENTRY32)]
+        kernel32.Thread32Next.restype = wintypes.BOOL
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        kernel32.CloseHandle.restype = wintypes.BOOL
+        
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ, False, pid)
+        if not handle:
+            return None
+        
+        def count_threads():
+            # Windows 沒有單一行程的執行緒數 API，以全系統執行緒快照計算屬於此進程的執行緒
+            snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPTHREAD, 0)
+            if not snapshot or snapshot == INVALID_HANDLE_VALUE:
+                return None
+            try:
+                entry = THREADENTRY32()
+                entry.dwSize = ctypes.sizeof(entry)
+                count = 0
+                found = kernel32.Thread32First(snapshot, ctypes.byref(entry))
+                while found:
+                    if entry.th32OwnerProcessID == pid:
+                        count += 1
+                    found = kernel32.Thread32Next(snapshot, ctypes.byref(entry))
+                return count
+            finally:
+                kernel32.CloseHandle(snapshot)
+        
+        thread_count = [None, 0]    # [上次計算的執行緒數, 之後經過的取樣次數]
+        
+        def cached_thread_count():
+            # 每 RESOURCE_THREAD_COUNT_EVERY 次取樣才重新拍攝快照，其餘取樣沿用上次的值
+            if thread_count[0] is None or thread_count[1] >= RESOURCE_THREAD_COUNT_EVERY:
+                thread_count[:] = [count_threads(), 0]
+            thread_count[1] += 1
+            return thread_count[0]
+        
+        def read_counters():
+            creation, exit_time, kernel, user = (ctypes.c_ulonglong() for _ in range(4))
+            if not kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                            ctypes.byref(kernel), ctypes.byref(user)):
+                raise OSError("GetProcessTimes failed")
+            if exit_time.value:
+                raise OSError("process exited")
+            memory = PROCESS_MEMORY_COUNTERS()
+            memory.cb = ctypes.sizeof(memory)
+            kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(memory), memory.cb)
+            io = IO_COUNTERS()
+            io_ok = kernel32.GetProcessIoCounters(handle, ctypes.byref(io))
+            handle_count = wintypes.DWORD()
+            handles_ok = kernel32.GetProcessHandleCount(handle, ctypes.byref(handle_count))
+            return {
+                "time": time.monotonic(),
+                "cpu_seconds": (kernel.value + user.value) / 10_000_000,   # FILETIME 單位為 100ns
+                "rss_bytes": memory.WorkingSetSize,
+                "threads": cached_thread_count(),
+                "read_bytes": io.ReadTransferCount if io_ok else None,
+                "write_bytes": io.WriteTransferCount if io_ok else None,
+                "handles": handle_count.value if handles_ok else None,
+            }
+        
+        return read_counters, lambda: kernel32.CloseHandle(handle)
+
+
+# ============================================================================
+# 指標匯出（OpenMetrics）
+# ============================================================================
+
+class MetricsRegistry:
+    """
+    輕量指標登錄表
+    
+    功能:
+        - 支援 counter、gauge、histogram、info 四種指標
+        - 指標值於事件發生時預先累計，匯出時只需格式化
+        - 可指定函數型指標，於匯出時讀取一般屬性（不觸碰 Tk 元件）
+        - 以 OpenMetrics 文字格式輸出
+    
+    用途:
+        提供集中監控系統（Prometheus 等）抓取主控台與伺服器指標
+    """
+    def __init__(self):
+        """初始化登錄表"""
+        self._families = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, kind, name, help_text, buckets=None, function=None):
+        """註冊指標家族（重複註冊時返回既有家族）"""
+        with self._lock:
+            if name not in self._families:
+                self._families[name] = {
+                    "kind": kind,
+                    "help": help_text,
+                    "buckets": tuple(buckets) if buckets else None,
+                    "function": function,
+                    "samples": {},
+                }
+            return self._families[name]
+    
+    def counter(self, name, help_text, function=None):
+        """註冊計數器（function 返回累計值時為函數型）"""
+        self._register("counter", name, help_text, function=function)
+    
+    def gauge(self, name, help_text, function=None):
+        """註冊量測值（function 返回數值，或 {標籤 tuple: 數值} 的 dict）"""
+        self._register("gauge", name, help_text, function=function)
+    
+    def histogram(self, name, help_text, buckets):
+        """註冊直方圖（buckets 為遞增的上界序列）"""
+        self._register("histogram", name, help_text, buckets=buckets)
+    
+    def info(self, name, help_text, function):
+        """註冊資訊型指標（function 返回標籤 dict）"""
+        self._register("info", name, help_text, function=function)
+    
+    @staticmethod
+    def _label_key(labels):
+        """標籤 dict 轉為可雜湊的排序 tuple"""
+        return tuple(sorted(labels.items()))
+    
+    def inc(self, name, value=1, **labels):
+        """計數器累加"""
+        key = self._label_key(labels)
+        with self._lock:
+            samples = self._families[name]["samples"]
+            samples[key] = samples.get(key, 0) + value
+    
+    def set(self, name, value, **labels):
+        """設定量測值"""
+        with self._lock:
+            self._families[name]["samples"][self._label_key(labels)] = value
+    
+    def observe(self, name, value, **labels):
+        """記錄一筆直方圖觀測值"""
+        key = self._label_key(labels)
+        with self._lock:
+            family = self._families[name]
+            state = family["samples"].get(key)
+            if state is None:
+                state = {"buckets": [0] * len(family["buckets"]), "sum": 0.0, "count": 0}
+                family["samples"][key] = state
+            for i, bound in enumerate(family["buckets"]):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+    
+    @staticmethod
+    def _format_labels(key, extra=()):
+        """格式化標籤字串 {a="1",b="2"}"""
+        items = list(key) + list(extra)
+        if not items:
+            return ""
+        escaped = []
+        for label, value in items:
+            value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+            escaped.append(f'{label}="{value}"')
+        return "{" + ",".join(escaped) + "}"
+    
+    @staticmethod
+    def _format_value(value):
+        """格式化數值（整數不帶小數點）"""
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, int):
+            return str(value)
+        if value == math.inf:
+            return "+Inf"
+        return repr(float(value))
+    
+    def _evaluate(self, family):
+        """取得指標家族目前的樣本（函數型指標於此呼叫）"""
+        function = family["function"]
+        if function is None:
+            with self._lock:
+                return {k: (dict(v, buckets=list(v["buckets"])) if isinstance(v, dict) else v)
+                        for k, v in family["samples"].items()}
+        try:
+            result = function()
+        except Exception:
+            return {}
+        if result is None:
+            return {}
+        if family["kind"] == "info":
+            return {self._label_key(result): 1}
+        if isinstance(result, dict):
+            return result
+        return {(): result}
+    
+    def render(self):
+        """
+        輸出 OpenMetrics 文字格式
+        
+        Returns:
+            str: 指標內容（以 "# EOF" 結尾）
+        """
+        with self._lock:
+            families = list(self._families.items())
+        lines = []
+        for name, family in families:
+            kind = family["kind"]
+            samples = self._evaluate(family)
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {family['help']}")
+            for key, value in sorted(samples.items()):
+                if kind == "counter":
+                    lines.append(f"{name}_total{self._format_labels(key)} {self._format_value(value)}")
+                elif kind == "info":
+                    lines.append(f"{name}_info{self._format_labels(key)} 1")
+                elif kind == "histogram":
+                    for bound, count in zip(family["buckets"], value["buckets"]):
+                        le = (("le", self._format_value(float(bound))),)
+                        lines.append(f"{name}_bucket{self._format_labels(key, le)} {count}")
+                    lines.append(f"{name}_bucket{self._format_labels(key, (('le', '+Inf'),))} {value['count']}")
+                    lines.append(f"{name}_sum{self._format_labels(key)} {self._format_value(value['sum'])}")
+                    lines.append(f"{name}_count{self._format_labels(key)} {value['count']}")
+                else:
+                    lines.append(f"{name}{self._format_labels(key)} {self._format_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    內嵌的 OpenMetrics HTTP 端點
+    
+    功能:
+        - 於背景執行緒提供 /metrics
+        - 每次請求只格式化登錄表中已預先累計的數值
+    
+    用途:
+        讓 Prometheus 等監控系統直接抓取主控台指標
+    """
+    CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+    
+    def __init__(self, registry):
+        """
+        初始化匯出器
+        
+        Args:
+            registry: MetricsRegistry 物件
+        """
+        self.registry = registry
+        self._server = None
+        self._thread = None
+    
+    @property
+    def running(self):
+        """HTTP 端點是否運行中"""
+        return self._server is not None
+    
+    def start(self, bind, port):
+        """
+        啟動 HTTP 端點
+        
+        Args:
+            bind: 綁定位址
+            port: 連接埠
+        """
+        if self._server is not None:
+            return
+        registry = self.registry
+        content_type = self.CONTENT_TYPE
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                # 不輸出每次抓取的存取記錄
+                pass
+        
+        self._server = http.server.ThreadingHTTPServer((bind, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsExporter", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止 HTTP 端點"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
+
+# ============================================================================
+# 共用服務（多實例共用的排程、下載快取與工作執行緒池）
+# ============================================================================
+
+def default_base_dir():
+    """
+    取得預設資料根目錄
+    
+    處理 PyInstaller 打包後的路徑差異
+    - 打包成 exe: 使用 sys.executable 的父目錄
+    - 開發環境: 使用 __file__ 的父目錄
+    """
+    if getattr(sys, 'frozen', False):
+        # 打包後的執行環境
+        return Path(sys.executable).parent
+    # 開發環境
+    return Path(__file__).parent
+
+
+class DownloadCancelled(Exception):
+    """下載被使用者取消（未完成的檔案保留供下次續傳）"""
+
+
+class ResumableDownloader:
+    """
+    可續傳的檔案下載器
+    
+    功能:
+        - 下載中的資料寫入 <目的檔>.part，並以 <目的檔>.part.json 記錄網址、ETag、Last-Modified 與總大小
+        - 中斷或取消後，下次以 Range/If-Range 請求從已下載的位置接續；
+          伺服器檔案已變更（回應 200 而非 206）時自動從頭下載
+        - 依實際速度調整讀取區塊大小（64 KB ~ 4 MB）
+        - 連線錯誤時以指數退避重試
+        - 完成後驗證大小、SHA-256（若有提供）與 zip 內容的 CRC，通過才改名為目的檔
+    """
+    
+    def __init__(self, headers=None, max_retries=DOWNLOAD_MAX_RETRIES, log=print):
+        """
+        初始化下載器
+        
+        Args:
+            headers: 額外的 HTTP 標頭
+            max_retries: 連線錯誤的重試次數
+            log: 日誌輸出函數
+        """
+        self.headers = dict(headers or {})
+        self.max_retries = max_retries
+        self.log = log
+    
+    @staticmethod
+    def partial_paths(dest):
+        """取得未完成下載的資料檔與中繼資料檔路徑"""
+        dest = Path(dest)
+        return dest.with_name(dest.name + ".part"), dest.with_name(dest.name + ".part.json")
+    
+    def download(self, url, dest, should_cancel=None, on_progress=None, expected_sha256=None):
+        """
+        下載檔案到目的路徑（阻塞）
+        
+        Args:
+            url: 下載網址
+            dest: 目的檔案路徑
+            should_cancel: 返回 True 時中止下載的函數
+            on_progress: 進度回呼 on_progress(已下載位元組, 總位元組或 0, 本次新增位元組)
+            expected_sha256: 預期的 SHA-256（十六進位字串，None 則不比對）
+        
+        Returns:
+            tuple: (目的檔案路徑, SHA-256)
+        
+        Raises:
+            DownloadCancelled: 使用者取消
+            Exception: 重試後仍失敗或驗證失敗
+        """
+        dest = Path(dest)
+        part_file, meta_file = self.partial_paths(dest)
+        meta = self._load_meta(meta_file, url, part_file)
+        
+        attempt = 0
+        with requests.Session() as session:
+            while True:
+                try:
+                    self._fetch(session, url, part_file, meta_file, meta, should_cancel, on_progress)
+                    break
+                except DownloadCancelled:
+                    raise
+                except (requests.RequestException, OSError) as e:
+                    attempt += 1
+                    if attempt > self.max_retries:
+                        raise Exception(f"下載失敗（已重試 {self.max_retries} 次）: {str(e)}")
+                    delay = min(DOWNLOAD_RETRY_BASE_DELAY * 2 ** (attempt - 1), DOWNLOAD_RETRY_MAX_DELAY)
+                    self.log(f"下載中斷: {str(e)}，{delay} 秒後續傳（第 {attempt}/{self.max_retries} 次重試）")
+                    deadline = time.monotonic() + delay
+                    while time.monotonic() < deadline:
+                        if should_cancel and should_cancel():
+                            raise DownloadCancelled()
+                        time.sleep(0.2)
+        
+        sha256 = self._verify(part_file, meta.get("total_size"), expected_sha256)
+        os.replace(part_file, dest)
+        try:
+            meta_file.unlink()
+        except OSError:
+            pass
+        return dest, sha256
+    
+    def _load_meta(self, meta_file, url, part_file):
+        """讀取未完成下載的中繼資料（網址不同或資料不一致時捨棄）"""
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("url") == url and part_file.exists():
+                return meta
+        except (OSError, ValueError):
+            pass
+        if part_file.exists():
+            part_file.unlink()
+        return {"url": url}
+    
+    def _save_meta(self, meta_file, meta):
+        """寫入未完成下載的中繼資料（原子寫入）"""
+        write_json_atomic(meta_file, meta, indent=None)
+    
+    @staticmethod
+    def _content_range_matches(content_range, offset, total_size):
+        """
+        檢查 206 回應的 Content-Range 是否從已下載的位置接續
+        
+        Args:
+            content_range: Content-Range 標頭，例如 bytes 1000-1999/2000
+            offset: 已下載的位元組數
+            total_size: 先前記錄的總大小（None 則不比對）
+        
+        Returns:
+            bool: 起始位置與總大小都相符時為 True
+        """
+        match = re.fullmatch(r'\s*bytes\s+(\d+)-(\d+)/(\d+|\*)\s*', content_range or "")
+        if not match or int(match.group(1)) != offset:
+            return False
+        if total_size and match.group(3) != "*" and int(match.group(3)) != total_size:
+            return False
+        return True
+    
+    def _fetch(self, session, url, part_file, meta_file, meta, should_cancel, on_progress):
+        """送出（續傳）請求並將回應寫入 .part 檔"""
+        offset = part_file.stat().st_size if part_file.exists() else 0
+        total = meta.get("total_size")
+        if total and offset >= total:
+            return
+        
+        headers = dict(self.headers)
+        validator = meta.get("etag") or meta.get("last_modified")
+        if offset > 0 and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        
+        response = session.get(url, headers=headers, stream=True, timeout=(15, 60))
+        if response.status_code == 206 and not self._content_range_matches(
+                response.headers.get('Content-Range'), offset, total):
+            # 回應的範圍不是接在 .part 之後（或總大小不同），不能附加，捨棄後完整下載
+            response.close()
+            self.log(f"續傳範圍不符（Content-Range: {response.headers.get('Content-Range')}），重新下載")
+            part_file.unlink(missing_ok=True)
+            offset = 0
+            headers.pop("Range", None)
+            headers.pop("If-Range", None)
+            response = session.get(url, headers=headers, stream=True, timeout=(15, 60))
+        
+        with response:
+            if response.status_code == 206 and offset > 0:
+                self.log(f"從 {offset / 1024 / 1024:.1f} MB 處續傳")
+                mode = 'ab'
+            elif response.status_code == 200:
+                if offset > 0:
+                    self.log("伺服器檔案已變更或不支援續傳，重新下載")
+                offset = 0
+                mode = 'wb'
+                length = response.headers.get('content-length')
+                meta.update({
+                    "etag": response.headers.get('ETag'),
+                    "last_modified": response.headers.get('Last-Modified'),
+                    "total_size": int(length) if length and 'content-encoding' not in response.headers else None,
+                })
+                self._save_meta(meta_file, meta)
+            else:
+                response.raise_for_status()
+                raise requests.RequestException(f"HTTP {response.status_code}")
+            
+            total = meta.get("total_size") or 0
+            downloaded = offset
+            chunk_size = DOWNLOAD_CHUNK_MIN
+            with open(part_file, mode) as f:
+                while True:
+                    if should_cancel and should_cancel():
+                        raise DownloadCancelled()
+                    
+                    read_start = time.monotonic()
+                    try:
+                        chunk = response.raw.read(chunk_size, decode_content=True)
+                    except Exception as e:
+                        # urllib3 的連線中斷例外統一轉為 requests 例外，交由外層重試
+                        raise requests.ConnectionError(str(e))
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    if on_progress:
+                        on_progress(downloaded, total, len(chunk))
+                    
+                    # 依讀取時間調整區塊大小：快則加倍、慢則減半
+                    elapsed = time.monotonic() - read_start
+                    if elapsed < DOWNLOAD_CHUNK_TARGET_SECONDS / 2:
+                        chunk_size = min(chunk_size * 2, DOWNLOAD_CHUNK_MAX)
+                    elif elapsed > DOWNLOAD_CHUNK_TARGET_SECONDS * 2:
+                        chunk_size = max(chunk_size // 2, DOWNLOAD_CHUNK_MIN)
+        
+        if total and downloaded < total:
+            raise requests.ConnectionError(f"連線提前結束（{downloaded}/{total} 位元組）")
+    
+    def _verify(self, part_file, total_size, expected_sha256):
+        """
+        驗證下載完成的檔案
+        
+        Returns:
+            str: 檔案的 SHA-256
+        """
+        size = part_file.stat().st_size
+        if total_size and size != total_size:
+            part_file.unlink()
+            raise Exception(f"檔案大小不符（{size}/{total_size} 位元組）")
+        
+        sha256 = file_sha256(part_file)
+        if expected_sha256 and sha256.lower() != expected_sha256.lower():
+            part_file.unlink()
+            raise Exception("檔案 SHA-256 驗證失敗")
+        
+        if part_file.name.endswith(".zip.part"):
+            error = verify_zip_archive(part_file)
+            if error:
+                part_file.unlink()
+                raise Exception(f"壓縮檔損毀: {error}")
+        return sha256
+
+
+def file_sha256(path):
+    """計算檔案的 SHA-256（十六進位字串）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(DOWNLOAD_CHUNK_MAX), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_crc32(path):
+    """計算檔案的 CRC-32（與 zip 記錄的 CRC 比對用）"""
+    crc = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(DOWNLOAD_CHUNK_MAX), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def verify_zip_archive(path):
+    """
+    檢查 zip 檔完整性（讀取所有項目並比對 CRC）
+    
+    Returns:
+        str: 錯誤描述，完整時返回 None
+    """
+    try:
+        with zipfile.ZipFile(path, 'r') as zipf:
+            bad_entry = zipf.testzip()
+        if bad_entry:
+            return f"{bad_entry} CRC 錯誤"
+        return None
+    except (zipfile.BadZipFile, OSError) as e:
+        return str(e)
+
+
+class DownloadCache:
+    """
+    BDS 版本庫（各實例共用的安裝檔下載快取）
+    
+    功能:
+        - 依版本號與平台存放 bedrock-server-<版本>-<平台>.zip（附 .sha256 校驗檔），
+          所有實例共用同一份，更新、首次安裝與回滾舊版都先從這裡取得
+        - 每個版本一把鎖：多個實例同時更新到同一版本時只下載一次
+        - 未完成的下載保留在快取中，任一實例皆可接續
+        - 總大小超過上限時依最後使用時間（LRU）淘汰版本
+    """
+    
+    def __init__(self, cache_dir, max_bytes=RELEASE_CACHE_MAX_GB * 1024 ** 3, platform=SERVER_PLATFORM):
+        """
+        初始化版本庫
+        
+        Args:
+            cache_dir: 快取資料夾
+            max_bytes: 容量上限（位元組）
+            platform: 伺服器平台（win/linux）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.platform = platform
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+    
+    def path_for(self, version):
+        """版本對應的快取檔案路徑"""
+        return self.cache_dir / f"bedrock-server-{version}-{self.platform}.zip"
+    
+    def versions(self):
+        """
+        列出本平台已快取的版本
+        
+        Returns:
+            list: [{"version", "size_bytes", "last_used"}]，依最後使用時間由新到舊
+        """
+        suffix = f"-{self.platform}.zip"
+        releases = []
+        for path in self.cache_dir.glob(f"bedrock-server-*{suffix}"):
+            stat = path.stat()
+            releases.append({
+                "version": path.name[len("bedrock-server-"):-len(suffix)],
+                "size_bytes": stat.st_size,
+                "last_used": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+            })
+        releases.sort(key=lambda r: r["last_used"], reverse=True)
+        return releases
+    
+    def lock_for(self, version):
+        """取得版本的下載鎖（持有期間其他實例等待同一版本的下載結果）"""
+        with self._locks_lock:
+            return self._locks.setdefault(version, threading.Lock())
+    
+    def contains(self, path):
+        """檔案是否位於快取中（快取檔案不可由單一實例刪除）"""
+        return Path(path).parent == self.cache_dir
+    
+    def checksum_path(self, path):
+        """快取檔案對應的 SHA-256 校驗檔"""
+        path = Path(path)
+        return path.with_name(path.name + ".sha256")
+    
+    def get(self, version):
+        """
+        取得已快取的安裝檔
+        
+        Returns:
+            Path: 完整的快取檔案（不存在或損毀時返回 None）
+        """
+        path = self.path_for(version)
+        if not path.exists():
+            return None
+        if not zipfile.is_zipfile(path):
+            self._discard(path)
+            return None
+        os.utime(path)
+        return path
+    
+    def verify(self, path):
+        """
+        解壓縮前完整驗證安裝檔（SHA-256 與 zip CRC），損毀時自快取移除
+        
+        Args:
+            path: 安裝檔路徑
+        
+        Returns:
+            str: 錯誤描述，驗證通過時返回 None
+        """
+        path = Path(path)
+        checksum_file = self.checksum_path(path)
+        if checksum_file.exists():
+            expected = checksum_file.read_text(encoding='utf-8').split()[0]
+            if file_sha256(path) != expected:
+                self._discard(path)
+                return "SHA-256 與下載時記錄的不符"
+        error = verify_zip_archive(path)
+        if error:
+            self._discard(path)
+        return error
+    
+    def store(self, version, source, sha256=None):
+        """
+        將下載完成的檔案移入快取並淘汰較舊的版本
+        
+        Args:
+            version: 版本號
+            source: 下載完成的檔案
+            sha256: 下載時計算的 SHA-256（寫入校驗檔）
+        
+        Returns:
+            Path: 快取檔案路徑
+        """
+        path = self.path_for(version)
+        if Path(source) != path:
+            os.replace(source, path)
+        if sha256:
+            write_text_atomic(self.checksum_path(path), f"{sha256}  {path.name}\n")
+        os.utime(path)
+        
+        # 超過容量上限時淘汰最久未使用的版本（剛存入的版本一定保留；
+        # 其他實例正持有該版本的鎖（下載或解壓縮中）時也保留，下次存入時再檢查）
+        cached = sorted(self.cache_dir.glob("bedrock-server-*.zip"), key=lambda p: p.stat().st_mtime, reverse=True)
+        total = 0
+        for cached_path in cached:
+            size = cached_path.stat().st_size
+            if cached_path != path and total + size > self.max_bytes:
+                version_lock = self.lock_for(self._version_of(cached_path))
+                if version_lock.acquire(blocking=False):
+                    try:
+                        self._discard(cached_path)
+                    finally:
+                        version_lock.release()
+                    continue
+            total += size
+        
+        # 清除過久未接續的下載
+        cutoff = time.time() - DOWNLOAD_PARTIAL_MAX_AGE_DAYS * 86400
+        for partial in self.cache_dir.glob("bedrock-server-*.zip.part*"):
+            try:
+                if partial.stat().st_mtime < cutoff:
+                    partial.unlink()
+            except OSError:
+                pass
+        return path
+    
+    @staticmethod
+    def _version_of(path):
+        """由快取檔名（bedrock-server-<版本>-<平台>.zip）取得版本號"""
+        return path.name[len("bedrock-server-"):-len(".zip")].rsplit("-", 1)[0]
+    
+    def _discard(self, path):
+        """刪除快取檔案與其校驗檔"""
+        for file in (path, self.checksum_path(path)):
+            try:
+                file.unlink()
+            except OSError:
+                pass
+
+
+class JobCoordinator:
+    """
+    主機層級的重負載工作協調器
+    
+    功能:
+        - 限制同時執行的備份/更新/還原數量，避免多個實例同時佔滿磁碟 I/O
+        - 同時到期的排程工作依最短間隔錯開啟動
+        - 等待中的工作依優先順序（數字越小越優先）與到達順序執行；
+          手動觸發的工作排在排程工作之前且不受錯開間隔限制
+    """
+    
+    def __init__(self, max_concurrent=MAX_CONCURRENT_JOBS, stagger_seconds=JOB_STAGGER_SECONDS):
+        """
+        初始化協調器
+        
+        Args:
+            max_concurrent: 同時執行的工作數
+            stagger_seconds: 排程工作之間的最短啟動間隔（秒）
+        """
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.stagger_seconds = max(0, stagger_seconds)
+        self._condition = threading.Condition()
+        self._waiting = []                  # 等待佇列（heap）: (緊急度, 優先順序, 序號, 工作)
+        self._running = []                  # 執行中的工作
+        self._counter = itertools.count()
+        self._last_start = None             # 上次工作啟動時間（monotonic）
+    
+    def acquire(self, job_type, owner, priority=0, urgent=False, on_wait=None):
+        """
+        等待並取得執行名額
+        
+        Args:
+            job_type: 工作類型（backup/update/restore）
+            owner: 實例名稱
+            priority: 優先順序（數字越小越優先）
+            urgent: 是否為手動觸發（排在排程工作之前，不受錯開間隔限制）
+            on_wait: 需要等待時呼叫一次的函數，參數為目前執行中的工作列表
+        
+        Returns:
+            dict: 工作資訊（釋放時傳給 release）
+        """
+        job = {"type": job_type, "owner": owner, "priority": priority,
+               "queued_at": datetime.now().isoformat(timespec="seconds"), "started_at": None}
+        entry = (0 if urgent else 1, priority, next(self._counter), job)
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            notified = False
+            while True:
+                timeout = None
+                if self._waiting[0] is entry and len(self._running) < self.max_concurrent:
+                    if urgent or self._last_start is None:
+                        break
+                    timeout = self._last_start + self.stagger_seconds - time.monotonic()
+                    if timeout <= 0:
+                        break
+                if on_wait and not notified:
+                    notified = True
+                    on_wait([dict(running) for running in self._running])
+                self._condition.wait(timeout)
+            
+            heapq.heappop(self._waiting)
+            job["started_at"] = datetime.now().isoformat(timespec="seconds")
+            self._running.append(job)
+            self._last_start = time.monotonic()
+            self._condition.notify_all()
+        return job
+    
+    def release(self, job):
+        """釋放執行名額並喚醒等待中的工作"""
+        with self._condition:
+            if job in self._running:
+                self._running.remove(job)
+            self._condition.notify_all()
+    
+    def snapshot(self):
+        """
+        取得目前工作狀態
+        
+        Returns:
+            dict: {"running": [...], "waiting": [...]}（等待中依執行順序排列）
+        """
+        with self._condition:
+            return {
+                "running": [dict(job) for job in self._running],
+                "waiting": [dict(entry[3]) for entry in sorted(self._waiting)],
+            }
+
+
+def parse_release_version(download_url):
+    """
+    從下載連結中提取版本號（例如 bedrock-server-1.21.113.1.zip → 1.21.113.1）
+    
+    Returns:
+        str: 版本號（無法辨識時返回 None）
+    """
+    match = re.search(r'bedrock-server-([\d\.]+)\.zip', download_url or "")
+    return match.group(1) if match else None
+
+
+def release_url_for(download_url, version):
+    """由任一版本的下載連結推算指定版本的下載網址"""
+    return re.sub(r'bedrock-server-[\d\.]+\.zip', f'bedrock-server-{version}.zip', download_url)
+
+
+class ManifestClient:
+    """
+    官方下載連結清單（download/links）用戶端
+    
+    功能:
+        - 以持續連線的 requests.Session 取得清單（keep-alive）
+        - 清單連同 ETag/Last-Modified 存於磁碟，程式重啟後仍可使用
+        - 清單未超過有效期時直接使用快取；過期時送出條件式請求，未變更時只需 304 回應
+        - 同一時間只有一個請求，多個實例同時檢查時共用結果
+    """
+    
+    def __init__(self, cache_file, url=DOWNLOAD_LINKS_API, ttl=MANIFEST_TTL_SECONDS):
+        """
+        初始化清單用戶端
+        
+        Args:
+            cache_file: 清單快取檔案路徑
+            url: 清單 API 網址
+            ttl: 快取有效期（秒）
+        """
+        self.cache_file = Path(cache_file)
+        self.url = url
+        self.ttl = ttl
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = HTTP_USER_AGENT
+        self.last_source = None             # 上次取得的來源: cache / not-modified / fetched
+        self._lock = threading.Lock()
+        self._cached = self._load()
+    
+    def _load(self):
+        """讀取磁碟上的清單快取"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if isinstance(cached.get("data"), dict):
+                return cached
+        except (OSError, ValueError):
+            pass
+        return None
+    
+    def _save(self):
+        """寫入清單快取（原子寫入，避免中途中斷留下損毀的檔案）"""
+        write_json_atomic(self.cache_file, self._cached, indent=None)
+    
+    def fetch(self, max_age=None):
+        """
+        取得下載連結清單
+        
+        Args:
+            max_age: 可接受的快取秒數（None 使用預設有效期；0 表示一律向伺服器驗證）
+        
+        Returns:
+            dict: API 回應的 JSON
+        
+        Raises:
+            Exception: 連線失敗或 API 回應錯誤
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            cached = self._cached
+            if cached and max_age > 0 and time.time() - cached.get("fetched_at", 0) < max_age:
+                self.last_source = "cache"
+                return cached["data"]
+            
+            headers = {}
+            if cached:
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+            
+            response = self.session.get(self.url, headers=headers, timeout=30)
+            if response.status_code == 304 and cached:
+                cached["fetched_at"] = time.time()
+                self.last_source = "not-modified"
+            elif response.status_code == 200:
+                self._cached = {
+                    "fetched_at": time.time(),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "data": response.json(),
+                }
+                self.last_source = "fetched"
+            else:
+                raise Exception(f"API 回應錯誤: {response.status_code}")
+            
+            try:
+                self._save()
+            except OSError as e:
+                print(f"寫入下載清單快取失敗: {str(e)}")
+            return self._cached["data"]
+    
+    def latest_release(self, download_type=SERVER_DOWNLOAD_TYPE, max_age=None):
+        """
+        取得本平台的最新版本與下載連結
+        
+        Args:
+            download_type: 下載類型（serverBedrockWindows/serverBedrockLinux）
+            max_age: 可接受的快取秒數（見 fetch）
+        
+        Returns:
+            tuple: (版本號, 下載連結)
+        
+        Raises:
+            Exception: 清單取得失敗或找不到對應的連結
+        """
+        data = self.fetch(max_age)
+        links = data.get("result", {}).get("links", [])
+        target_link = next((link for link in links if link.get("downloadType") == download_type), None)
+        if not target_link:
+            raise Exception(f"找不到 '{download_type}' 對應的下載連結")
+        
+        download_url = target_link.get("downloadUrl", "")
+        if not download_url:
+            raise Exception("下載連結為空")
+        
+        version = parse_release_version(download_url)
+        if not version:
+            raise Exception(f"無法從連結中提取版本號: {download_url}")
+        return version, download_url
+    
+    def close(self):
+        """關閉連線"""
+        self.session.close()
+
+
+class SharedServices:
+    """
+    多實例共用服務
+    
+    功能:
+        - 單一排程器（schedule.Scheduler）與排程檢查執行緒，各實例以標籤區分工作
+        - 單一倒數通知計時執行緒
+        - BDS 安裝檔下載快取
+        - 工作執行緒池（排程備份、更新、重啟等背景工作）
+        - 重負載工作協調器（限制同時執行的備份/更新/還原）
+        - 官方下載連結清單（快取與條件式請求）
+    
+    用途:
+        單一實例時由 BDSCore 自行建立；多實例時由 InstanceManager 建立並注入
+    """
+    
+    def __init__(self, cache_dir, max_workers=WORKER_POOL_SIZE,
+                 max_concurrent_jobs=MAX_CONCURRENT_JOBS, job_stagger_seconds=JOB_STAGGER_SECONDS,
+                 release_cache_max_gb=RELEASE_CACHE_MAX_GB):
+        """
+        初始化共用服務
+        
+        Args:
+            cache_dir: 下載快取資料夾
+            max_workers: 工作執行緒數
+            max_concurrent_jobs: 同時執行的重負載工作數
+            job_stagger_seconds: 排程工作之間的最短啟動間隔（秒）
+            release_cache_max_gb: 版本庫容量上限（GB）
+        """
+        self.scheduler = schedule.Scheduler()
+        self.countdown_scheduler = CountdownScheduler()
+        self.download_cache = DownloadCache(cache_dir, max_bytes=release_cache_max_gb * 1024 ** 3)
+        self.manifest = ManifestClient(Path(cache_dir) / "download_links.json")
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="BDSWorker")
+        self.jobs = JobCoordinator(max_concurrent_jobs, job_stagger_seconds)
+        self.scheduler_lag = 0.0                        # 排程迴圈延遲（秒）
+        self._thread = None
+        self._start_lock = threading.Lock()
+    
+    def start(self):
+        """啟動排程檢查執行緒（重複呼叫時只啟動一次）"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run_schedule, name="Scheduler", daemon=True)
+            self._thread.start()
+    
+    def _run_schedule(self):
+        """
+        排程檢查執行迴圈
+        
+        功能:
+            持續檢查並執行所有實例待處理的排程任務
+        
+        用途:
+            在背景執行緒中運行，驅動自動備份、更新與重啟
+        """
+        while True:
+            self.scheduler.run_pending()
+            before_sleep = time.monotonic()
+            time.sleep(1)
+            self.scheduler_lag = max(0.0, time.monotonic() - before_sleep - 1)
+    
+    def shutdown(self):
+        """停止接受新工作（執行中的工作不等待）"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.manifest.close()
+
+
+# ============================================================================
+# 伺服器管理核心
+# ============================================================================
+
+class BDSCore:
+    """
+    BDS 伺服器管理核心（無介面）
+    
+    功能:
+        - 伺服器生命週期管理（啟動、關閉、重啟、崩潰自動重啟）
+        - 伺服器輸出解析與玩家連線記錄
+        - 世界備份系統（手動/自動）
+        - 伺服器版本更新系統
+        - 排程任務執行與維護時段
+        - 資源取樣與指標匯出
+    
+    用途:
+        可單獨以無介面模式（daemon/服務）執行，或由圖形介面繼承並覆寫介面回呼
+    """
+    
+    def __init__(self, base_dir=None, shared=None, name="default"):
+        """
+        初始化管理核心
+        
+        功能:
+            - 初始化路徑配置
+            - 建立資料夾結構
+            - 初始化狀態變數
+            - 載入使用者設定
+        
+        Args:
+            base_dir: 資料根目錄（None 則使用程式所在目錄）
+            shared: 共用服務 SharedServices（None 則自行建立）
+            name: 實例名稱（多實例時用於區分排程與日誌）
+        """
+        # ====================================================================
+        # 路徑配置（支援打包環境）
+        # ====================================================================
+        self.base_dir = Path(base_dir) if base_dir is not None else default_base_dir()
+        
+        # 應用程式目錄結構
+        self.app_dir = self.base_dir / "data"              # 應用資料目錄
+        self.server_dir = self.base_dir / "server_files"   # 伺服器檔案目錄
+        self.backup_dir = self.base_dir / "backup"         # 備份目錄
+        self.temp_dir = self.app_dir / "temp"              # 暫存目錄
+        
+        # 建立必要資料夾結構
+        self.create_directories()
+        
+        # ====================================================================
+        # 共用服務（排程、倒數計時、下載快取、工作執行緒池）
+        # ====================================================================
+        self.instance_name = name
+        self.schedule_tag = f"instance:{name}"          # 此實例在共用排程器中的工作標籤
+        self.shared = shared if shared is not None else SharedServices(self.app_dir / "cache")
+        
+        # ====================================================================
+        # 伺服器狀態變數
+        # ====================================================================
+        self.server_process = None          # 伺服器進程物件
+        self.server_status = "關閉"         # 伺服器狀態
+        self.online_players = 0             # 在線玩家數
+        self.max_players = 10               # 最大玩家數
+        self.server_version = "未知"        # 伺服器版本
+        self.server_properties = {}         # server.properties 內容
+        self.server_properties_doc = None   # server.properties 文件模型（保留註解與順序，寫入用）
+        
+        # 進程監控（崩潰偵測、自動重啟、運行歷史）
+        self.supervisor = ProcessSupervisor(self.app_dir / "server_history.json",
+                                            self.app_dir / "crash_reports",
+                                            log=self.log_message)
+        self.expected_exit_process = None   # 預期結束的進程（關閉流程或 "Quit correctly" 標記）
+        self.crash_restart_pending = False  # 崩潰自動重啟等待中
+        
+        # 資源取樣（CPU、記憶體、磁碟 I/O、執行緒/控制代碼）
+        self.resource_sampler = ResourceSampler(
+            on_sample=lambda sample: self.call_later(0, self.update_resource_display)
+        )
+        
+        # 外部修改偵測（server.properties、白名單/權限與 data/*.json）
+        self.file_watcher = FileWatcher(log=self.log_message)
+        
+        # ====================================================================
+        # 玩家管理變數
+        # ====================================================================
+        self.player_list_file = self.app_dir / "player_list.json"
+        self.player_list = self.load_player_list()     # 玩家列表資料
+        self.online_players_names = []                  # 在線玩家名稱列表
+        self.allowlisted_xuids = set()                  # allowlist.json 中的 XUID（記憶體副本）
+        self.player_permissions = {}                    # permissions.json 的 XUID -> 權限（記憶體副本）
+        self.player_access_lock = threading.RLock()     # 保護玩家列表與白名單/權限檔的讀取-修改-寫入（輸出、介面、匯入執行緒共用）
+        
+        # ====================================================================
+        # 更新系統狀態變數
+        # ====================================================================
+        self.update_notification_active = False         # 更新通知進行中
+        self.update_countdown = None                    # 更新倒數物件（Countdown）
+        self.update_cancel_requested = False            # 取消更新請求標誌
+        self.update_in_progress = False                 # 更新執行中標誌
+        self.update_download_thread = None              # 下載執行緒參考
+        self.versions = VersionStore(self.base_dir / "versions",
+                                     self.app_dir / "installed_versions.json")  # 版本化安裝資料夾
+        
+        # ====================================================================
+        # 伺服器操作狀態變數
+        # ====================================================================
+        self.server_operation_in_progress = False       # 伺服器操作進行中（啟動/關閉/重啟）
+        self.is_restarting = False                      # 重啟程序進行中
+        self.countdown_scheduler = self.shared.countdown_scheduler  # 倒數通知排程器（共用單一計時執行緒）
+        self.restart_countdown = None                   # 定時重啟倒數物件（Countdown）
+        self.maintenance_active = False                 # 維護時段（延後/倒數）進行中
+        self.maintenance_deferred = None                # 延後中的維護 (名稱, 動作, 通知分鐘數, 期限)
+        self.maintenance_timer = None                   # 延後維護的下次檢查計時（Countdown）
+        self.maintenance_lock = threading.Lock()        # 保護延後維護狀態（計時與玩家離線可能同時觸發檢查）
+        self.settings_restart_pending = False           # 設定變更等待維護時段重啟
+        self.shutdown_event = threading.Event()         # 無介面模式結束事件
+        self.heavy_job_context = threading.local()      # 目前執行緒持有的重負載工作（釋放名額後的後續動作）
+        
+        # ====================================================================
+        # 備份系統變數
+        # ====================================================================
+        self.last_manual_backup_time = None             # 上次手動備份時間
+        self.last_auto_backup_time = None               # 上次自動備份時間
+        self.backup_time_file = self.app_dir / "backup_time.json"
+        self.backup_times_store = ConfigStore(self.backup_time_file, log=self.log_message,
+                                              on_write=self.file_watcher.sync)
+        self.load_backup_times()
+        
+        # ====================================================================
+        # 載入設定檔
+        # ====================================================================
+        self.config_file = self.app_dir / "config.json"
+        self.config_store = ConfigStore(self.config_file, log=self.log_message,
+                                        on_write=self.file_watcher.sync)
+        self.load_config()
+        self.config_store.subscribe(self._on_config_changed)
+        self.load_server_properties()
+        self.load_player_access()
+        self._register_file_watches()
+        
+        # ====================================================================
+        # 指標匯出
+        # ====================================================================
+        self.metrics = MetricsRegistry()
+        self.metrics_exporter = MetricsExporter(self.metrics)
+        self._register_metrics()
+        
+        # ====================================================================
+        # 本機控制 API（HTTP + WebSocket 事件串流）
+        # ====================================================================
+        self.api_server = ControlAPIServer(self)
+
+    
+    # ========================================================================
+    # 系統初始化方法
+    # ========================================================================
+    
+    def create_directories(self):
+        """
+        建立必要的資料夾結構
+        
+        功能:
+            建立程式運行所需的所有目錄
+        
+        用途:
+            確保應用程式、伺服器、備份等目錄存在
+        """
+        dirs = [
+            self.app_dir,                           # 應用資料目錄
+            self.server_dir,                        # 伺服器檔案目錄
+            self.backup_dir,                        # 備份根目錄
+            self.temp_dir,                          # 暫存目錄
+            self.app_dir / "crash_reports",         # 崩潰報告目錄
+            self.backup_dir / "server_settings",    # 伺服器設定備份目錄
+            self.backup_dir / "worlds_manual",      # 手動世界備份目錄
+            self.backup_dir / "worlds_auto"         # 自動世界備份目錄
+        ]
+        for d in dirs:
+            d.mkdir(parents=True, exist_ok=True)
+    
+    def load_config(self):
+        """
+        載入應用程式設定
+        
+        功能:
+            - 從 config.json 載入使用者設定
+            - 若檔案不存在則使用預設值
+            - 支援備份、更新、主題等各項設定
+        
+        用途:
+            初始化應用程式配置參數
+        """
+        default_config = {
+            # 備份設定
+            "auto_backup_enabled": False,           # 自動備份開關（預設關閉）
+            "backup_frequency_type": "hours",       # 備份頻率類型
+            "backup_frequency_value": 6,            # 備份頻率值
+            "backup_time_hour": 3,                  # 備份時間（小時）
+            "backup_time_minute": 0,                # 備份時間（分鐘）
+            "backup_weekday": 0,                    # 備份星期
+            "backup_day": 1,                        # 備份日期
+            "backup_notify_seconds": 5,             # 備份通知秒數
+            "backup_max_size_gb": 10,               # 備份最大容量（GB）
+            
+            # 更新設定
+            "auto_update_enabled": False,           # 自動更新開關（預設關閉）
+            "update_frequency_type": "daily",       # 更新頻率類型
+            "update_frequency_value": 1,            # 更新頻率值
+            "update_time_hour": 4,                  # 更新時間（小時）
+            "update_time_minute": 0,                # 更新時間（分鐘）
+            "update_weekday": 0,                    # 更新星期
+            "update_day": 1,                        # 更新日期
+            "update_notify_minutes": 10,            # 更新通知分鐘數
+            "update_canary_enabled": False,         # 替換前先以新版本試啟動（失敗時不更新）
+            "update_canary_timeout": 120,           # 試啟動等待完成啟動的秒數
+            "installed_versions_keep": INSTALLED_VERSIONS_KEEP,  # 保留的版本資料夾數（含使用中的版本，供立即回滾）
+            
+            # 定時重啟與維護時段設定
+            "auto_restart_enabled": False,          # 每日定時重啟開關（預設關閉）
+            "restart_time_hour": 5,                 # 重啟時間（小時）
+            "restart_time_minute": 0,               # 重啟時間（分鐘）
+            "restart_notify_minutes": 5,            # 重啟通知分鐘數
+            "maintenance_defer_enabled": True,      # 有玩家在線時延後維護
+            "maintenance_max_defer_minutes": 60,    # 維護最長延後分鐘數
+            
+            # 崩潰監控設定
+            "crash_auto_restart_enabled": True,     # 崩潰後自動重啟
+            "crash_restart_max_attempts": 5,        # 崩潰循環判定次數（10 分鐘內）
+            
+            # 多實例工作協調
+            "job_priority": 0,                      # 備份/更新/還原排隊時的優先順序（數字越小越優先）
+            
+            # 資源監控設定
+            "resource_monitor_enabled": True,       # 伺服器資源取樣開關
+            "resource_sample_interval": 5,          # 資源取樣間隔（秒）
+            
+            # 指標匯出設定（OpenMetrics HTTP 端點）
+            "metrics_enabled": False,               # 指標匯出開關（預設關閉）
+            "metrics_bind": "127.0.0.1",            # 綁定位址
+            "metrics_port": 9464,                   # 連接埠
+        
+            # 本機控制 API 設定（HTTP + WebSocket）
+            "api_enabled": False,                   # 控制 API 開關（預設關閉）
+            "api_bind": "127.0.0.1",                # 綁定位址
+            "api_port": 8765,                       # 連接埠
+            "api_token": "",                        # 存取權杖（留空時首次啟用自動產生）
+
+            # 介面設定
+            "theme": "system"                       # 主題（system|dark|light）
+        }
+        
+        # 檔案損毀時自動改用最後可用的副本（config.json.bak）
+        loaded_config = self.config_store.load()
+        if loaded_config is not None:
+            self.config = {**default_config, **loaded_config}
+            # 確保備份容量不小於0.5
+            if self.config["backup_max_size_gb"] < 0.5:
+                self.config["backup_max_size_gb"] = 0.5
+            self.config_store.attach(self.config)
+        else:
+            self.config = dict(default_config)
+            self.config_store.attach(self.config)
+            self.config_store.save(immediate=True)
+        self.config_defaults = default_config
+    
+    def save_config(self):
+        """
+        儲存應用程式設定
+        
+        功能:
+            - 將當前設定寫入 config.json 檔案（延遲合併寫入，拖動滑桿時不會每次都寫檔）
+            - 排程相關設定有變更時自動重建排程
+        
+        用途:
+            持久化使用者設定
+        """
+        self.config_store.save()
+    
+    def _on_config_changed(self, changed):
+        """設定變更通知：只有排程相關設定變更時才重建排程"""
+        if changed & SCHEDULE_CONFIG_KEYS:
+            self.setup_schedules()
+    
+    def flush_settings(self):
+        """立即寫入延遲中的設定與備份時間記錄（結束程式前呼叫）"""
+        self.config_store.flush()
+        self.backup_times_store.flush()
+    
+    def load_backup_times(self):
+        """
+        載入備份時間記錄
+        
+        功能:
+            - 從 backup_time.json 讀取上次備份時間
+            - 掃描備份資料夾獲取最新備份時間
+            - 同步更新記錄
+        
+        用途:
+            追蹤手動/自動備份的執行時間
+        """
+        from datetime import datetime
+        
+        # 從檔案載入記錄（損毀時改用最後可用的副本）
+        try:
+            data = self.backup_times_store.load() or {}
+            self.backup_times_store.attach(data)
+            if data.get("last_manual_backup"):
+                self.last_manual_backup_time = datetime.fromisoformat(data["last_manual_backup"])
+            if data.get("last_auto_backup"):
+                self.last_auto_backup_time = datetime.fromisoformat(data["last_auto_backup"])
+        except Exception as e:
+            print(f"載入備份時間記錄失敗: {str(e)}")
+        
+        # 從備份資料夾掃描最新的備份檔案並更新時間
+        self.scan_latest_backups()
+    
+    def scan_latest_backups(self):
+        """
+        掃描備份資料夾並更新最新備份時間
+        
+        功能:
+            - 掃描手動/自動備份資料夾
+            - 從檔名解析備份時間戳
+            - 更新最新備份時間記錄
+        
+        用途:
+            同步檔案系統與記錄資料
+        """
+        from datetime import datetime
+        import re
+        
+        try:
+            # 掃描手動備份資料夾
+            manual_backup_dir = self.backup_dir / "worlds_manual"
+            if manual_backup_dir.exists():
+                manual_backups = list(manual_backup_dir.glob("world_backup_*.zip"))
+                if manual_backups:
+                    # 從檔名提取時間戳並排序
+                    manual_times = []
+                    for backup_file in manual_backups:
+                        # 檔名格式: world_backup_YYYYMMDD_HHMMSS.zip
+                        match = re.search(r'world_backup_(\d{8}_\d{6})\.zip', backup_file.name)
+                        if match:
+                            timestamp_str = match.group(1)
+                            try:
+                                backup_time = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
+                                manual_times.append(backup_time)
+                            except ValueError:
+                                continue
+                    
+                    if manual_times:
+                        latest_manual = max(manual_times)
+                        # 如果從檔案掃描到的時間比記錄的時間新，則更新
+                        if not self.last_manual_backup_time or latest_manual > self.last_manual_backup_time:
+                            self.last_manual_backup_time = latest_manual
+                            self.log_message(f"從檔案掃描到最新手動備份時間: {latest_manual.strftime('%Y-%m-%d %H:%M:%S')}")
+            
+            # 掃描自動備份資料夾
+            auto_backup_dir = self.backup_dir / "worlds_auto"
+            if auto_backup_dir.exists():
+                auto_backups = list(auto_backup_dir.glob("world_backup_*.zip"))
+                if auto_backups:
+                    # 從檔名提取時間戳並排序
+                    auto_times = []
+                    for backup_file in auto_backups:
+                        # 檔名格式: world_backup_YYYYMMDD_HHMMSS.zip
+                        match = re.search(r'world_backup_(\d{8}_\d{6})\.zip', backup_file.name)
+                        if match:
+                            timestamp_str = match.group(1)
+                            try:
+                                backup_time = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
+                                auto_times.append(backup_time)
+                            except ValueError:
+                                continue
+                    
+                    if auto_times:
+                        latest_auto = max(auto_times)
+                        # 如果從檔案掃描到的時間比記錄的時間新，則更新
+                        if not self.last_auto_backup_time or latest_auto > self.last_auto_backup_time:
+                            self.last_auto_backup_time = latest_auto
+                            self.log_message(f"從檔案掃描到最新自動備份時間: {latest_auto.strftime('%Y-%m-%d %H:%M:%S')}")
+            
+            # 如果有更新，保存到檔案
+            if self.last_manual_backup_time or self.last_auto_backup_time:
+                self.save_backup_times()
+                
+        except Exception as e:
+            self.log_message(f"掃描備份檔案時發生錯誤: {str(e)}")
+    
+    def save_backup_times(self):
+        """
+        儲存備份時間記錄
+        
+        功能:
+            將最新的備份時間寫入 backup_time.json（延遲合併、原子寫入，內容未變時不寫檔）
+        
+        用途:
+            持久化備份時間記錄
+        """
+        try:
+            data = {}
+            if self.last_manual_backup_time:
+                data["last_manual_backup"] = self.last_manual_backup_time.isoformat()
+            if self.last_auto_backup_time:
+                data["last_auto_backup"] = self.last_auto_backup_time.isoformat()
+            
+            self.backup_times_store.attach(data)
+            self.backup_times_store.save()
+        except Exception as e:
+            print(f"儲存備份時間記錄失敗: {str(e)}")
+    
+    def _register_metrics(self):
+        """
+        註冊匯出指標
+        
+        功能:
+            - 事件型指標（日誌行數、備份、下載）由對應流程直接累計
+            - 狀態型指標以函數讀取一般屬性，匯出時不經過 Tk 主執行緒
+        """
+        m = self.metrics
+        m.gauge("bds_server_up", "伺服器進程是否運行中",
+                function=lambda: 1 if self.server_process is not None else 0)
+        m.gauge("bds_server_status", "伺服器目前狀態（目前狀態為 1）",
+                function=lambda: {(("status", name),): 1 if SERVER_STATUS_NAMES.get(self.server_status) == name else 0
+                                  for name in SERVER_STATUS_NAMES.values()})
+        m.info("bds_server", "伺服器版本",
+               function=lambda: {"version": self.server_version})
+        m.gauge("bds_players_online", "在線玩家數",
+                function=lambda: len(self.online_players_names))
+        m.gauge("bds_uptime_seconds", "本次運行時間（秒）",
+                function=lambda: round(self.supervisor.uptime_seconds(), 1) if self.server_process is not None else 0)
+        m.counter("bds_server_starts", "伺服器啟動次數",
+                  function=lambda: self.supervisor.history["start_count"])
+        m.counter("bds_server_crashes", "伺服器崩潰次數",
+                  function=lambda: self.supervisor.history["crash_count"])
+        m.counter("bds_server_auto_restarts", "崩潰後自動重啟次數",
+                  function=lambda: self.supervisor.history["auto_restart_count"])
+        m.counter("bds_server_log_lines", "伺服器輸出行數")
+        m.counter("bds_backups", "備份次數")
+        m.histogram("bds_backup_duration_seconds", "備份耗時（秒）", BACKUP_DURATION_BUCKETS)
+        m.histogram("bds_backup_size_bytes", "備份檔案大小（位元組）", BACKUP_SIZE_BUCKETS)
+        m.counter("bds_update_download_bytes", "更新下載位元組數")
+        m.gauge("bds_update_download_bytes_per_second", "最近一次更新下載的平均速度")
+        m.counter("bds_update_canaries", "更新前試啟動次數")
+        m.gauge("bds_scheduler_lag_seconds", "排程檢查迴圈的喚醒延遲（秒）",
+                function=lambda: round(self.shared.scheduler_lag, 3))
+        m.gauge("bds_countdown_lag_seconds", "倒數廣播相對預定時間的延遲（秒）",
+                function=lambda: round(self.countdown_scheduler.last_lag, 3))
+        m.gauge("bds_host_jobs_running", "主機上執行中的重負載工作數（備份/更新/還原）",
+                function=lambda: len(self.shared.jobs.snapshot()["running"]))
+        m.gauge("bds_host_jobs_waiting", "主機上等待執行的重負載工作數",
+                function=lambda: len(self.shared.jobs.snapshot()["waiting"]))
+        m.gauge("bds_process_cpu_percent", "伺服器進程 CPU 使用率（%）",
+                function=lambda: self._latest_resource_value("cpu"))
+        m.gauge("bds_process_resident_memory_bytes", "伺服器進程常駐記憶體（位元組）",
+                function=lambda: self._latest_resource_value("rss_mb", 1024 * 1024))
+    
+    def _latest_resource_value(self, key, multiplier=1):
+        """取得最新資源取樣值（伺服器未運行或無資料時返回 None，不輸出該指標）"""
+        if not self.resource_sampler.running:
+            return None
+        latest = self.resource_sampler.latest()
+        if latest is None or latest[key] is None:
+            return None
+        return round(latest[key] * multiplier, 2)
+    
+    def start_metrics_exporter(self):
+        """依設定啟動指標匯出端點"""
+        if not self.config["metrics_enabled"] or self.metrics_exporter.running:
+            return
+        bind = self.config["metrics_bind"]
+        port = self.config["metrics_port"]
+        try:
+            self.metrics_exporter.start(bind, port)
+            self.log_message(f"指標匯出已啟用: http://{bind}:{port}/metrics")
+        except OSError as e:
+            self.log_message(f"指標匯出啟動失敗（{bind}:{port}）: {str(e)}")
+    
+    def start_control_api(self):
+        """依設定啟動本機控制 API（未設定權杖時自動產生並寫入設定檔）"""
+        if not self.config["api_enabled"] or self.api_server.running:
+            return
+        if not self.config["api_token"]:
+            self.config["api_token"] = secrets.token_urlsafe(24)
+            self.save_config()
+            self.log_message("已產生控制 API 權杖（儲存於 data/config.json 的 api_token）")
+        bind = self.config["api_bind"]
+        port = self.config["api_port"]
+        try:
+            self.api_server.start(bind, port, self.config["api_token"])
+            self.log_message(f"控制 API 已啟用: http://{bind}:{port}/api/status")
+        except OSError as e:
+            self.log_message(f"控制 API 啟動失敗（{bind}:{port}）: {str(e)}")
+    
+    def publish_event(self, event_type, **data):
+        """
+        發布事件到控制 API 的 WebSocket 串流
+        
+        Args:
+            event_type: 事件類型
+            **data: 事件內容
+        """
+        # 初始化完成前（例如載入設定時）產生的日誌不發布
+        if hasattr(self, 'api_server'):
+            self.api_server.publish(event_type, **data)
+    
+    # ========================================================================
+    # 排程系統方法
+    # ========================================================================
+    
+    def submit_task(self, func, *args):
+        """
+        在共用工作執行緒池執行背景工作（例外寫入日誌）
+        
+        Args:
+            func: 工作函數
+            *args: 工作參數
+        
+        Returns:
+            Future: 工作結果
+        """
+        def run():
+            try:
+                return func(*args)
+            except Exception as e:
+                self.log_message(f"背景工作執行失敗: {str(e)}")
+        return self.shared.executor.submit(run)
+    
+    def run_heavy_job(self, job_type, func, *args, urgent=False):
+        """
+        取得主機層級的執行名額後執行重負載工作（備份、更新、還原）
+        
+        Args:
+            job_type: 工作類型（backup/update/restore）
+            func: 工作函數
+            *args: 工作參數
+            urgent: 是否為手動觸發（優先執行，不受錯開間隔限制）
+        
+        Returns:
+            工作函數的返回值
+        """
+        def on_wait(running):
+            running_text = "、".join(f"{job['owner']} {JOB_TYPE_NAMES.get(job['type'], job['type'])}" for job in running)
+            self.log_message(f"{JOB_TYPE_NAMES.get(job_type, job_type)}排隊中，等待其他工作完成"
+                             + (f"（執行中: {running_text}）" if running_text else "（錯開排程時間）"))
+        
+        job = self.shared.jobs.acquire(job_type, self.instance_name, self.config["job_priority"], urgent, on_wait)
+        followups = []
+        self.heavy_job_context.followups = followups
+        try:
+            return func(*args)
+        finally:
+            self.heavy_job_context.followups = None
+            self.shared.jobs.release(job)
+            for callback in followups:
+                try:
+                    callback()
+                except Exception as e:
+                    self.log_message(f"{JOB_TYPE_NAMES.get(job_type, job_type)}後續動作失敗: {str(e)}")
+    
+    def after_heavy_job(self, callback):
+        """
+        在目前的重負載工作釋放執行名額後才執行（不在工作內時立即執行）
+        
+        用途:
+            工作結束後重新啟動伺服器；啟動前備份也需要名額，
+            若在工作內直接啟動會等待自己持有的名額而永遠卡住
+        
+        Args:
+            callback: 要執行的函數
+        """
+        followups = getattr(self.heavy_job_context, "followups", None)
+        if followups is None:
+            callback()
+        else:
+            followups.append(callback)
+    
+    def setup_schedules(self):
+        """
+        設置排程任務
+        
+        功能:
+            - 清除舊有排程
+            - 根據使用者設定建立新排程
+            - 支援多種頻率類型（小時、每日、每週、每月）
+        
+        用途:
+            初始化和更新自動備份/更新排程（只清除與重建此實例的工作）
+        """
+        scheduler = self.shared.scheduler
+        tag = self.schedule_tag
+        scheduler.clear(tag)
+        
+        # 設置自動備份
+        if self.config["auto_backup_enabled"]:
+            freq_type = self.config["backup_frequency_type"]
+            if freq_type == "hours":
+                hours = self.config["backup_frequency_value"]
+                scheduler.every(hours).hours.do(self.submit_task, self.scheduled_backup).tag(tag)
+            elif freq_type == "daily":
+                time_str = f"{self.config['backup_time_hour']:02d}:{self.config['backup_time_minute']:02d}"
+                scheduler.every().day.at(time_str).do(self.submit_task, self.scheduled_backup).tag(tag)
+            elif freq_type == "weekly":
+                weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+                time_str = f"{self.config['backup_time_hour']:02d}:{self.config['backup_time_minute']:02d}"
+                getattr(scheduler.every(), weekdays[self.config["backup_weekday"]]).at(time_str).do(
+                    self.submit_task, self.scheduled_backup).tag(tag)
+            elif freq_type == "monthly":
+                # 每天檢查是否是指定日期
+                scheduler.every().day.at("00:01").do(self.check_monthly_backup).tag(tag)
+        
+        # 設置自動更新
+        if self.config["auto_update_enabled"]:
+            freq_type = self.config["update_frequency_type"]
+            if freq_type == "hours":
+                hours = self.config["update_frequency_value"]
+                scheduler.every(hours).hours.do(self.submit_task, self.scheduled_update_check).tag(tag)
+            elif freq_type == "daily":
+                time_str = f"{self.config['update_time_hour']:02d}:{self.config['update_time_minute']:02d}"
+                scheduler.every().day.at(time_str).do(self.submit_task, self.scheduled_update_check).tag(tag)
+            elif freq_type == "weekly":
+                weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+                time_str = f"{self.config['update_time_hour']:02d}:{self.config['update_time_minute']:02d}"
+                getattr(scheduler.every(), weekdays[self.config["update_weekday"]]).at(time_str).do(
+                    self.submit_task, self.scheduled_update_check).tag(tag)
+            elif freq_type == "monthly":
+                scheduler.every().day.at("00:01").do(self.check_monthly_update).tag(tag)
+        
+        # 設置每日定時重啟
+        if self.config["auto_restart_enabled"]:
+            time_str = f"{self.config['restart_time_hour']:02d}:{self.config['restart_time_minute']:02d}"
+            scheduler.every().day.at(time_str).do(self.submit_task, self.scheduled_restart).tag(tag)
+    
+    def check_monthly_backup(self):
+        """檢查是否執行月度備份"""
+        if datetime.now().day == self.config["backup_day"]:
+            hour = self.config["backup_time_hour"]
+            minute = self.config["backup_time_minute"]
+            now = datetime.now()
+            if now.hour == hour and now.minute == minute:
+                self.submit_task(self.scheduled_backup)
+    
+    def check_monthly_update(self):
+        """檢查是否執行月度更新"""
+        if datetime.now().day == self.config["update_day"]:
+            hour = self.config["update_time_hour"]
+            minute = self.config["update_time_minute"]
+            now = datetime.now()
+            if now.hour == hour and now.minute == minute:
+                self.submit_task(self.scheduled_update_check)
+    
+    def scheduled_backup(self):
+        """排程備份（帶通知）"""
+        self.log_message("排程備份即將執行...")
+        self.perform_backup_with_notification(
+            self.config["backup_notify_seconds"], 
+            is_auto=True
+        )
+    
+    def _compare_versions(self, version1, version2):
+        """比較兩個版本號
+        
+        Args:
+            version1: 第一個版本號（如 "1.21.113.1"）
+            version2: 第二個版本號（如 "1.21.114.0"）
+        
+        Returns:
+            1: version1 > version2
+            0: version1 == version2
+            -1: version1 < version2
+        """
+        try:
+            # 分割版本號並轉換為整數列表
+            v1_parts = [int(x) for x in version1.split('.')]
+            v2_parts = [int(x) for x in version2.split('.')]
+            
+            # 補齊較短的版本號（用0填充）
+            max_len = max(len(v1_parts), len(v2_parts))
+            v1_parts.extend([0] * (max_len - len(v1_parts)))
+            v2_parts.extend([0] * (max_len - len(v2_parts)))
+            
+            # 逐段比較
+            for v1, v2 in zip(v1_parts, v2_parts):
+                if v1 > v2:
+                    return 1
+                elif v1 < v2:
+                    return -1
+            
+            return 0
+        except Exception as e:
+            self.log_message(f"版本比較錯誤: {str(e)}")
+            return 0
+    
+    def scheduled_update_check(self):
+        """排程更新檢查"""
+        self.log_message("正在檢查更新...")
+        # 先檢查更新（自動模式不顯示彈窗）
+        self._check_update(is_auto=True)
+        # 如果有更新可用且版本較新，執行更新
+        if hasattr(self, 'download_url') and self.download_url and hasattr(self, 'has_new_version') and self.has_new_version:
+            self.log_message("開始自動更新...")
+            self.run_maintenance_window(
+                "更新",
+                lambda notify_minutes: self.perform_update_with_notification(notify_minutes, is_auto=True),
+                self.config["update_notify_minutes"]
+            )
+    
+    def scheduled_restart(self):
+        """排程定時重啟（經由維護時段執行）"""
+        if self.server_process is None:
+            self.log_message("伺服器未運行，略過排程重啟")
+            return
+        if self.update_notification_active or self.update_in_progress:
+            self.log_message("更新流程進行中，略過排程重啟")
+            return
+        
+        self.log_message("排程重啟即將執行...")
+        self.run_maintenance_window(
+            "重啟",
+            self.perform_restart_with_notification,
+            self.config["restart_notify_minutes"]
+        )
+    
+    def run_maintenance_window(self, action_name, action, notify_minutes):
+        """
+        在維護時段內執行重啟/更新（依玩家在線狀態延後）
+        
+        功能:
+            - 無玩家在線時立即執行（不需倒數通知）
+            - 有玩家在線時延後，玩家全部離線後立即執行
+              （以共用倒數計時器定期檢查後立即返回，不佔用工作執行緒）
+            - 延後超過最長期限時，改為帶倒數通知執行
+        
+        Args:
+            action_name: 維護動作名稱（用於日誌，如 "重啟"、"更新"）
+            action: 執行函式，參數為通知分鐘數
+            notify_minutes: 到達期限時的提前通知分鐘數
+        
+        用途:
+            確保維護不會在玩家遊玩中途發生，也不會無限期等待
+        """
+        if self.maintenance_active:
+            self.log_message(f"已有維護進行中，略過排程{action_name}")
+            return
+        
+        self.maintenance_active = True
+        deferred = False
+        try:
+            if not self.online_players_names or self.server_process is None:
+                self.log_message(f"目前無玩家在線，立即執行排程{action_name}")
+                action(0)
+                return
+            
+            if not self.config["maintenance_defer_enabled"]:
+                action(notify_minutes)
+                return
+            
+            max_defer = self.config["maintenance_max_defer_minutes"]
+            deadline = time.monotonic() + max_defer * 60
+            deadline_str = (datetime.now() + timedelta(minutes=max_defer)).strftime("%H:%M")
+            self.log_message(
+                f"有 {len(self.online_players_names)} 位玩家在線，延後排程{action_name}"
+                f"（最遲於 {deadline_str} 執行）"
+            )
+            
+            # 等待玩家全部離線或到達期限：以共用倒數計時器定期檢查，不佔用工作執行緒
+            # （玩家全部離線時由 parse_server_output 提早觸發檢查）
+            with self.maintenance_lock:
+                self.maintenance_deferred = (action_name, action, notify_minutes, deadline)
+                self._schedule_maintenance_check(min(max_defer * 60, MAINTENANCE_CHECK_INTERVAL))
+            deferred = True
+        except Exception as e:
+            self.log_message(f"維護時段執行錯誤: {str(e)}")
+        finally:
+            # 延後時由 _check_deferred_maintenance 執行完畢後才結束維護時段
+            if not deferred:
+                self.maintenance_active = False
+    
+    def _schedule_maintenance_check(self, delay):
+        """
+        排定延後維護的下一次檢查（需持有 maintenance_lock）
+        
+        Args:
+            delay: 距離檢查的秒數
+        """
+        if self.maintenance_timer is not None:
+            self.maintenance_timer.cancel()
+        self.maintenance_timer = self.countdown_scheduler.schedule_once(
+            delay, lambda: self.submit_task(self._check_deferred_maintenance), name="maintenance"
+        )
+    
+    def wake_deferred_maintenance(self):
+        """玩家全部離線時立即檢查延後中的維護"""
+        with self.maintenance_lock:
+            if self.maintenance_deferred is not None:
+                self._schedule_maintenance_check(0)
+    
+    def _check_deferred_maintenance(self):
+        """
+        檢查延後中的維護是否可以執行（由計時器觸發，在工作執行緒執行）
+        
+        功能:
+            - 玩家全部離線時立即執行（不需倒數通知）
+            - 到達最長期限時帶倒數通知執行
+            - 否則重新排定下一次檢查
+        """
+        with self.maintenance_lock:
+            if self.maintenance_deferred is None:
+                return
+            action_name, action, notify_minutes, deadline = self.maintenance_deferred
+            players_online = bool(self.online_players_names) and self.server_process is not None
+            remaining = deadline - time.monotonic()
+            if players_online and remaining > 0:
+                self._schedule_maintenance_check(min(remaining, MAINTENANCE_CHECK_INTERVAL))
+                return
+            self.maintenance_deferred = None
+            self.maintenance_timer = None
+            
+        try:
+            if not players_online:
+                self.log_message(f"玩家已全部離線，立即執行排程{action_name}")
+                action(0)
+            else:
+                self.log_message(f"已達最長延後期限，開始排程{action_name}倒數")
+                action(notify_minutes)
+        except Exception as e:
+            self.log_message(f"維護時段執行錯誤: {str(e)}")
+        finally:
+            self.maintenance_active = False
+    
+    def perform_restart_with_notification(self, notify_minutes):
+        """
+        重新啟動伺服器（含遊戲內倒數通知）
+        
+        Args:
+            notify_minutes: 提前通知分鐘數（0 表示立即重啟）
+        """
+        try:
+            if self.server_process is None:
+                return
+            
+            if notify_minutes > 0:
+                countdown = self.countdown_scheduler.start_countdown(
+                    notify_minutes * 60,
+                    RESTART_BROADCAST_SCHEDULE,
+                    lambda remaining: self.broadcast_message(
+                        f"Restart in {self._format_duration(remaining)}", "重啟通知"),
+                    name="restart"
+                )
+                self.restart_countdown = countdown
+                if not countdown.wait():
+                    self.log_message("排程重啟已取消")
+                    return
+            
+            if self.server_process is None:
+                return
+            
+            self.is_restarting = True
+            self._do_restart_server()
+        except Exception as e:
+            self.log_message(f"排程重啟錯誤: {str(e)}")
+        finally:
+            self.restart_countdown = None
+    
+    def broadcast_message(self, message, log_prefix=None):
+        """發送廣播訊息到遊戲中
+        
+        Args:
+            message: 廣播訊息內容
+            log_prefix: 日誌前綴（如 "備份通知"、"更新通知"、"重啟通知"），None則使用預設格式
+        """
+        if self.server_process:
+            try:
+                command = f'say {message}'
+                self.server_process.stdin.write(command + "\n")
+                self.server_process.stdin.flush()
+                
+                # 根據前綴決定日誌格式
+                if log_prefix:
+                    self.log_message(f"已發送{log_prefix}: {message}")
+                else:
+                    self.log_message(f"廣播: {message}")
+            except Exception as e:
+                self.log_message(f"廣播失敗: {str(e)}")
+    
+    def _format_time_unit(self, value, unit="second"):
+        """格式化時間單位（自動判斷單複數）"""
+        if value == 1:
+            return f"{value} {unit}"
+        else:
+            return f"{value} {unit}s"
+    
+    def _format_duration(self, total_seconds):
+        """格式化秒數為「N minutes M seconds」形式（用於遊戲內廣播）"""
+        minutes, seconds = divmod(int(total_seconds), 60)
+        if minutes > 0 and seconds > 0:
+            return f"{self._format_time_unit(minutes, 'minute')} {self._format_time_unit(seconds, 'second')}"
+        elif minutes > 0:
+            return self._format_time_unit(minutes, "minute")
+        else:
+            return self._format_time_unit(seconds, "second")
+    
+    # ========================================================================
+    # 備份系統方法
+    # ========================================================================
+    
+    def perform_backup_with_notification(self, notify_seconds, is_auto=False):
+        """
+        執行備份（含遊戲內通知）
+        
+        功能:
+            - 發送備份倒數通知到遊戲中
+            - 執行世界備份
+            - 顯示備份完成時間
+            - 禁用/啟用相關按鈕
+        
+        Args:
+            notify_seconds: 提前通知秒數
+            is_auto: 是否為自動備份
+        
+        用途:
+            完整的備份流程，包含玩家通知
+        """
+        try:
+            # 自動備份時需要禁用按鈕（手動備份已在調用前處理）
+            if is_auto:
+                self.call_later(0, self._disable_operation_buttons)
+            
+            if notify_seconds > 0 and self.server_process:
+                countdown = self.countdown_scheduler.start_countdown(
+                    notify_seconds,
+                    BACKUP_BROADCAST_SCHEDULE,
+                    lambda remaining: self.broadcast_message(
+                        f"Backup will begin in {self._format_duration(remaining)}", "備份通知"),
+                    name="backup"
+                )
+                countdown.wait()
+            
+            # 記錄實際備份開始時間（排除等待時間）
+            backup_start_time = time.time()
+            
+            # 執行備份（移除進行中通知）
+            # 注意：_perform_backup 內部也會調用 _disable_operation_buttons，
+            # 但這裡先調用是為了在通知期間就禁用按鈕
+            self._perform_backup(is_auto=is_auto)
+            
+            # 計算實際備份耗時（不包含提前通知等待時間）
+            if self.server_process:
+                elapsed = int(time.time() - backup_start_time)
+                message = f"Backup completed, took {self._format_duration(elapsed)}"
+                self.broadcast_message(message, "備份通知")
+        except Exception as e:
+            self.log_message(f"備份通知流程錯誤: {str(e)}")
+    
+    def list_backups(self):
+        """
+        列出世界備份
+        
+        Returns:
+            list: [{"type", "name", "size_bytes", "created"}]，依建立時間由新到舊
+        """
+        backups = []
+        for backup_type in ("manual", "auto"):
+            folder = self.backup_dir / f"worlds_{backup_type}"
+            if not folder.exists():
+                continue
+            for backup_file in folder.glob("*.zip"):
+                stat = backup_file.stat()
+                backups.append({
+                    "type": backup_type,
+                    "name": backup_file.name,
+                    "size_bytes": stat.st_size,
+                    "created": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+                })
+        backups.sort(key=lambda b: b["created"], reverse=True)
+        return backups
+    
+    def find_backup(self, backup_type, name):
+        """
+        取得備份檔案路徑（只接受備份資料夾內的檔名）
+        
+        Args:
+            backup_type: manual 或 auto
+            name: 備份檔名
+        
+        Returns:
+            Path: 備份檔案（不存在時返回 None）
+        """
+        if backup_type not in ("manual", "auto") or not name or Path(name).name != name:
+            return None
+        backup_file = self.backup_dir / f"worlds_{backup_type}" / name
+        return backup_file if backup_file.is_file() else None
+    
+    def restore_backup(self, backup_file):
+        """
+        從備份還原世界（經由工作協調器排隊）
+        
+        Args:
+            backup_file: 備份 zip 路徑
+        
+        Returns:
+            bool: 是否還原成功
+        """
+        return self.run_heavy_job("restore", self._run_restore, backup_file, urgent=True)
+    
+    def _run_restore(self, backup_file):
+        """
+        從備份還原世界（執行緒）
+        
+        功能:
+            - 伺服器運行中時通知玩家並關閉
+            - 目前的 worlds 先改名保留，解壓失敗時移回
+            - 還原完成後若原本運行中則重新啟動
+        
+        Args:
+            backup_file: 備份 zip 路徑
+        
+        Returns:
+            bool: 是否還原成功
+        """
+        was_running = self.server_process is not None
+        worlds_dir = self.server_dir / "worlds"
+        previous_worlds = self.server_dir / "worlds_before_restore"
+        self.call_later(0, self._disable_operation_buttons)
+        self.log_message(f"開始還原備份: {backup_file.name}")
+        
+        try:
+            with zipfile.ZipFile(backup_file, 'r') as zipf:
+                # 只接受 worlds/ 底下的項目，避免解壓到伺服器目錄以外
+                for member in zipf.namelist():
+                    if not member.startswith("worlds/") or ".." in Path(member).parts:
+                        raise Exception(f"備份檔內容不正確: {member}")
+        
+                if was_running:
+                    self.broadcast_message("Server is restoring a backup and will restart shortly", "還原通知")
+                    time.sleep(3)
+                    self._do_stop_server()
+                    time.sleep(2)
+        
+                if previous_worlds.exists():
+                    shutil.rmtree(previous_worlds)
+                if worlds_dir.exists():
+                    worlds_dir.rename(previous_worlds)
+        
+                try:
+                    zipf.extractall(self.server_dir)
+                except Exception:
+                    if worlds_dir.exists():
+                        shutil.rmtree(worlds_dir)
+                    if previous_worlds.exists():
+                        previous_worlds.rename(worlds_dir)
+                    raise
+        
+            if previous_worlds.exists():
+                shutil.rmtree(previous_worlds)
+            self.log_message(f"備份還原完成: {backup_file.name}")
+            self.publish_event("restore", result="success", name=backup_file.name)
+            success = True
+        except Exception as e:
+            self.log_message(f"還原備份失敗: {str(e)}")
+            self.publish_event("restore", result="failed", name=backup_file.name, error=str(e))
+            success = False
+        
+        self.call_later(0, self._enable_operation_buttons)
+        if was_running and self.server_process is None:
+            self.after_heavy_job(lambda: self.call_later(0, self.start_server))
+        return success
+
+    # ========================================================================
+    # 更新系統方法
+    # ========================================================================
+    
+    def perform_update_with_notification(self, notify_minutes, is_auto=False):
+        """
+        執行伺服器更新（含遊戲內通知）
+        
+        功能:
+            - 並行下載更新檔案，並在倒數期間預先解壓縮、驗證與比對差異
+            - 發送更新倒數通知到遊戲中
+            - 關閉伺服器並執行更新
+            - 自動重啟伺服器
+            - 支援取消更新
+        
+        Args:
+            notify_minutes: 提前通知分鐘數
+            is_auto: 是否為自動更新
+        
+        用途:
+            完整的伺服器更新流程，含玩家通知和檔案下載
+        """
+        try:
+            # 自動更新時需要禁用按鈕（手動更新已在調用前處理）
+            if is_auto:
+                self.call_later(0, self._disable_operation_buttons)
+            
+            download_thread = None
+            
+            # 如果有通知時間，在通知期間並行下載檔案
+            if notify_minutes > 0:
+                self.update_notification_active = True  # 開始更新通知
+                
+                self.log_message("開始並行下載並準備更新檔...")
+                # 啟動下載執行緒並保存引用
+                download_thread = threading.Thread(target=self._download_and_stage, daemon=True)
+                self.update_download_thread = download_thread
+                download_thread.start()
+                
+                # 同時進行通知倒數（由倒數排程器的計時執行緒廣播）
+                if self.server_process:
+                    countdown = self.countdown_scheduler.start_countdown(
+                        notify_minutes * 60,
+                        UPDATE_BROADCAST_SCHEDULE,
+                        lambda remaining: self.broadcast_message(
+                            f"Update in {self._format_duration(remaining)}", "更新通知"),
+                        name="update"
+                    )
+                    self.update_countdown = countdown
+                    
+                    # 倒數建立前已請求取消
+                    if self.update_cancel_requested:
+                        countdown.cancel()
+                    
+                    # 等待倒數結束（取消時立即返回）
+                    if not countdown.wait():
+                        self.log_message("更新已取消（通知階段）")
+                        return
+                
+                # 等待下載與預先準備完成
+                if download_thread:
+                    if download_thread.is_alive():
+                        self.log_message("等待新版本準備完成...")
+                    download_thread.join()
+                
+                # 檢查最後一次是否請求取消
+                if self.update_cancel_requested:
+                    self.log_message("更新已取消（下載後）")
+                    return
+                
+                # 清除更新通知狀態
+                self.update_notification_active = False
+                self.update_countdown = None
+            
+            # 標記進入更新階段（無法取消）
+            self.update_in_progress = True
+            
+            # 將按鈕改為無效化的反灰狀態
+            if not is_auto:
+                self.call_later(0, self._lock_update_button)
+            
+            # 執行更新
+            self._perform_update(urgent=not is_auto)
+            
+        except Exception as e:
+            self.log_message(f"更新通知流程錯誤: {str(e)}")
+            # 確保清除狀態
+            self.update_notification_active = False
+            if self.update_countdown:
+                self.update_countdown.cancel()
+                self.update_countdown = None
+    
+    def send_immediate_update_notification(self, player_name):
+        """立即發送更新通知給新上線的玩家（spawned時）"""
+        try:
+            # 檢查是否在更新通知期間
+            countdown = self.update_countdown
+            if self.update_notification_active and countdown and countdown.remaining() > 0:
+                # 計算與下次預定廣播的時間差
+                time_until_next_broadcast = countdown.seconds_until_next_broadcast()
+                
+                # 如果與下次預定廣播相距超過60秒，則發送額外通知
+                if time_until_next_broadcast > 60:
+                    remaining_seconds = countdown.remaining()
+                    minutes, seconds = divmod(remaining_seconds, 60)
+                    
+                    message = f"Update in {self._format_duration(remaining_seconds)}"
+                    self.broadcast_message(message, f"更新通知 (for {player_name})")
+                    self.log_message(f"為新上線玩家 {player_name} 發送更新通知 (剩餘 {minutes}分{seconds}秒)")
+        except Exception as e:
+            self.log_message(f"即時通知錯誤: {str(e)}")
+    
+    def _download_and_stage(self):
+        """
+        下載並預先準備新版本（供倒數期間並行執行）
+        
+        下載完成後在伺服器仍運行時解壓縮到暫存資料夾、驗證並比對差異，
+        倒數結束關閉伺服器後只需搬移變更的檔案並重新啟動
+        """
+        temp_zip = self._download_update_file()
+        if not temp_zip:
+            # 檢查是否為取消操作
+            if not self.update_cancel_requested:
+                # 只有在非取消情況下才記錄為失敗
+                self.log_message("並行下載失敗！")
+            return
+        
+        self._downloaded_zip = temp_zip
+        if self.update_cancel_requested:
+            return
+        try:
+            self._staged_update = (self.latest_version, self._stage_update(self.latest_version, temp_zip))
+            self.log_message("新版本已預先準備完成，等待倒數結束...")
+        except Exception as e:
+            # 預先準備失敗時由更新流程重新處理
+            self.log_message(f"預先準備新版本失敗: {str(e)}，將於更新時重新處理")
+    
+    def _stage_update(self, version, temp_zip):
+        """
+        驗證安裝檔並解壓縮為版本資料夾（已存在時略過），以硬連結建立暫存資料夾並比對差異
+        （不影響運行中的伺服器）
+        
+        啟用試啟動（update_canary_enabled）且有檔案變更時，另外以新版本試啟動
+        一個臨時伺服器，失敗時拋出例外，正式伺服器維持原版本繼續運行
+        
+        Args:
+            version: 版本號
+            temp_zip: 安裝檔路徑（版本資料夾已存在時可為 None）
+        
+        Returns:
+            DeltaUpdate: 已完成比對、可直接套用的差異更新
+        """
+        if self.versions.has(version):
+            self.log_message(f"版本 {version} 已安裝於 versions/{version}，不需解壓縮")
+        else:
+            # 驗證與解壓縮期間持有版本鎖，其他實例存入新版本時不會淘汰這個安裝檔
+            with self.shared.download_cache.lock_for(version):
+                verify_error = self.shared.download_cache.verify(temp_zip)
+                if verify_error:
+                    raise Exception(f"安裝檔驗證失敗: {verify_error}")
+                self.log_message(f"正在解壓縮版本 {version} 到 versions/{version}...")
+                extract_start = time.monotonic()
+                extracted, reused = self.versions.add(version, temp_zip)
+                self.log_message(f"解壓縮完成：{extracted} 個檔案，{reused} 個檔案與使用中的版本相同直接沿用"
+                                 f"（耗時 {time.monotonic() - extract_start:.1f} 秒）")
+        self._capture_installed_version()
+        
+        self.log_message("正在比對差異...")
+        delta = DeltaUpdate(
+            self.server_dir,
+            self.base_dir / "server_staging",
+            self.base_dir / "server_old",
+            self.app_dir / "installed_release.json",
+            self.app_dir / "update_journal.json"
+        )
+        try:
+            delta.stage(self.versions.path(version))
+            self._report_new_property_defaults(self.versions.path(version))
+            change_count = delta.plan()
+            self.log_message(f"新增 {len(delta.added)} 個、替換 {len(delta.changed)} 個、"
+                             f"移除 {len(delta.removed)} 個檔案，{delta.unchanged} 個檔案未變更"
+                             f"（{', '.join(PRESERVED_SERVER_ITEMS)} 保留不動）")
+            
+            if change_count and self.config["update_canary_enabled"]:
+                success, message, output_tail = run_canary_boot(
+                    delta.staging_dir,
+                    self.server_dir,
+                    self.base_dir / "server_canary",
+                    self.config["update_canary_timeout"],
+                    log=self.log_message
+                )
+                if not success:
+                    for line in output_tail:
+                        self.log_message(f"  {line}")
+                    self.metrics.inc("bds_update_canaries", result="failed")
+                    raise Exception(message)
+                self.metrics.inc("bds_update_canaries", result="success")
+                self.log_message(message)
+        except Exception:
+            delta.cleanup()
+            raise
+        return delta
+    
+    def load_player_list(self):
+        """載入玩家列表"""
+        return self.load_json_file(self.player_list_file, [])
+    
+    def save_player_list(self):
+        """儲存玩家列表"""
+        with self.player_access_lock:
+            self.save_json_file(self.player_list_file, self.player_list)
+    
+    # ========================================================================
+    # 設定檔讀寫方法
+    # ========================================================================
+    
+    def load_server_properties(self):
+        """載入 server.properties（解析完成後才替換，其他執行緒不會讀到一半的內容）"""
+        document = ServerProperties.load(self.server_dir / "server.properties")
+        
+        if not document.exists:
+            # 檢查伺服器是否存在
+            server_exe = self.server_dir / SERVER_EXECUTABLE
+            if server_exe.exists():
+                # 伺服器存在但缺少 server.properties，這是錯誤
+                self.log_message("錯誤：找不到 server.properties 檔案")
+        self.server_properties_doc = document
+        self.server_properties = document.as_dict()
+    
+    def backup_server_settings(self):
+        """備份伺服器設定檔"""
+        backup_folder = self.backup_dir / "server_settings"
+        
+        # 刪除舊備份
+        for file in backup_folder.glob("*"):
+            file.unlink()
+        
+        # 建立新備份
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        files_to_backup = ["server.properties", "allowlist.json", "permissions.json"]
+        
+        for filename in files_to_backup:
+            src = self.server_dir / filename
+            if src.exists():
+                dst = backup_folder / f"{timestamp}_{filename}"
+                shutil.copy2(src, dst)
+    
+    def load_json_file(self, filepath, default=None):
+        """載入JSON檔案"""
+        if filepath.exists():
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except:
+                return default if default is not None else {}
+        return default if default is not None else {}
+    
+    def save_json_file(self, filepath, data):
+        """儲存JSON檔案（原子寫入，不觸發外部修改偵測）"""
+        write_json_atomic(filepath, data)
+        self.file_watcher.sync(filepath)
+    
+    def load_player_access(self):
+        """
+        讀取 allowlist.json 與 permissions.json 到記憶體副本
+        
+        Returns:
+            set: 白名單或權限有變動的 XUID
+        """
+        return self._cache_player_access(
+            allowlist=self.load_json_file(self.server_dir / "allowlist.json", []),
+            permissions=self.load_json_file(self.server_dir / "permissions.json", [])
+        )
+    
+    def _cache_player_access(self, allowlist=None, permissions=None):
+        """
+        更新白名單/權限的記憶體副本（只更新有提供的部分）
+        
+        Returns:
+            set: 白名單或權限有變動的 XUID
+        """
+        changed = set()
+        if allowlist is not None:
+            allowlisted = {entry["xuid"] for entry in allowlist if isinstance(entry, dict) and entry.get("xuid")}
+            changed |= allowlisted ^ self.allowlisted_xuids
+            self.allowlisted_xuids = allowlisted
+        if permissions is not None:
+            player_permissions = {entry["xuid"]: entry.get("permission", "member")
+                                  for entry in permissions if isinstance(entry, dict) and entry.get("xuid")}
+            changed |= {xuid for xuid in player_permissions.keys() | self.player_permissions.keys()
+                        if player_permissions.get(xuid) != self.player_permissions.get(xuid)}
+            self.player_permissions = player_permissions
+        return changed
+    
+    # ========================================================================
+    # 外部修改偵測（檔案監看回呼，於監看執行緒執行）
+    # ========================================================================
+    
+    def _register_file_watches(self):
+        """登記要監看的伺服器設定檔與資料檔"""
+        self.file_watcher.watch(self.server_dir / "server.properties", self._on_server_properties_changed)
+        self.file_watcher.watch(self.server_dir / "allowlist.json", self._on_player_access_file_changed)
+        self.file_watcher.watch(self.server_dir / "permissions.json", self._on_player_access_file_changed)
+        self.file_watcher.watch_glob(self.app_dir, "*.json", self._on_data_file_changed)
+    
+    def _read_changed_json(self, path):
+        """
+        讀取被修改的 JSON 檔案
+        
+        Returns:
+            tuple: (是否可用, 資料)；格式錯誤（例如寫到一半）時返回 (False, None)，保留目前的記憶體副本
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return True, json.load(f)
+        except FileNotFoundError:
+            return True, None
+        except (OSError, ValueError) as e:
+            self.log_message(f"{path.name} 格式錯誤，保留目前內容: {str(e)}")
+            return False, None
+    
+    def _on_server_properties_changed(self, path):
+        """server.properties 被修改：重新解析並只通知有變動的設定"""
+        old_properties = self.server_properties
+        self.load_server_properties()
+        changed = {key: value for key, value in self.server_properties.items() if old_properties.get(key) != value}
+        if not changed:
+            return
+        self.log_message(f"偵測到 server.properties 外部修改: {', '.join(sorted(changed))}")
+        self.call_later(0, lambda: self.on_server_properties_changed(changed))
+    
+    def _on_player_access_file_changed(self, path):
+        """allowlist.json / permissions.json 被修改：更新記憶體副本並只通知有變動的玩家"""
+        ok, data = self._read_changed_json(path)
+        if not ok:
+            return
+        entries = data if isinstance(data, list) else []
+        if path.name == "allowlist.json":
+            changed = self._cache_player_access(allowlist=entries)
+        else:
+            changed = self._cache_player_access(permissions=entries)
+        if not changed:
+            return
+        self.log_message(f"偵測到 {path.name} 外部修改: {len(changed)} 位玩家有變動")
+        self.call_later(0, lambda: self.on_player_access_changed(changed))
+    
+    def _on_data_file_changed(self, path):
+        """data/*.json 被修改：重新載入設定、玩家列表與備份時間（其他資料檔不需處理）"""
+        if path.name == self.config_file.name:
+            ok, data = self._read_changed_json(path)
+            if not ok or not isinstance(data, dict):
+                return
+            # 以檔案內容取代目前設定（外部刪除的項目回到預設值）；
+            # 保持同一個 dict，config_store 與介面都參照它
+            merged = {**self.config_defaults, **data}
+            self.config.clear()
+            self.config.update(merged)
+            changed = self.config_store.notify_changes()
+            if changed:
+                self.log_message(f"偵測到設定檔外部修改: {', '.join(sorted(changed))}")
+        elif path.name == self.player_list_file.name:
+            # 在鎖內讀檔：避免讀到舊內容後，覆蓋掉其他執行緒剛加入並存檔的玩家
+            with self.player_access_lock:
+                ok, data = self._read_changed_json(path)
+                if not ok or not isinstance(data, list) or data == self.player_list:
+                    return
+                self.player_list = data
+            self.log_message(f"偵測到玩家列表外部修改，已重新載入（{len(data)} 位玩家）")
+            self.call_later(0, self.update_players_management_display)
+        elif path.name == self.backup_time_file.name:
+            ok, data = self._read_changed_json(path)
+            if not ok or not isinstance(data, dict):
+                return
+            if data.get("last_manual_backup"):
+                self.last_manual_backup_time = datetime.fromisoformat(data["last_manual_backup"])
+                self.call_later(0, self.update_last_manual_backup_label)
+            if data.get("last_auto_backup"):
+                self.last_auto_backup_time = datetime.fromisoformat(data["last_auto_backup"])
+                self.call_later(0, self.update_last_auto_backup_label)
+    
+    # ========================================================================
+    # 伺服器控制方法
+    # ========================================================================
+    
+    def start_server(self):
+        """
+        啟動 Bedrock 伺服器
+        
+        功能:
+            - 檢查伺服器檔案是否存在
+            - 執行啟動前備份（若需要）
+            - 啟動伺服器進程
+            - 建立輸出監控執行緒
+            - 更新 UI 狀態
+        
+        用途:
+            啟動 Minecraft Bedrock Dedicated Server
+        
+        Returns:
+            Future: 需要啟動前備份時，備份與啟動改在工作執行緒進行，返回其 Future（否則為 None）
+        """
+        if self.server_process is not None:
+            self.show_warning("警告", "伺服器已在運行中")
+            return
+        
+        try:
+            # 設置操作進行中狀態
+            self.server_operation_in_progress = True
+            self._disable_server_operation_buttons()
+            
+            self.update_status("啟動", "yellow")
+            self.log_message("正在啟動伺服器...")
+            
+            server_exe = self.server_dir / SERVER_EXECUTABLE
+            if not server_exe.exists():
+                # 詢問是否自動下載
+                result = self.ask_yes_no(
+                    "找不到伺服器檔案",
+                    f"找不到 {SERVER_EXECUTABLE}\n\n是否自動下載最新版本的 Bedrock Server？\n\n點擊「是」將自動下載並安裝\n點擊「否」將退出程式"
+                )
+                
+                if result:
+                    # 使用者選擇下載
+                    self.log_message("自動下載伺服器...")
+                    threading.Thread(target=self._auto_download_and_install_server, daemon=True).start()
+                else:
+                    # 使用者選擇不下載，退出程式
+                    self.log_message("找不到伺服器檔案，程式即將退出...")
+                    self.show_info("提示", "程式將退出")
+                    self.quit_application()
+                
+                self.update_status("關閉", "red")
+                return
+            
+            # 需要啟動前備份時改在工作執行緒備份後再啟動：備份要排隊取得主機層級的工作名額，
+            # 不可在呼叫端（常為 Tk 主執行緒）等待其他實例的工作結束
+            if self._startup_backup_needed():
+                return self.submit_task(self._backup_then_launch_server, server_exe)
+            
+            self._launch_server_process(server_exe)
+        except Exception as e:
+            self._on_server_start_failed(e)
+    
+    def _backup_then_launch_server(self, server_exe):
+        """
+        執行啟動前備份後啟動伺服器（工作執行緒，介面更新經由 call_later）
+        
+        Args:
+            server_exe: 伺服器執行檔路徑
+        """
+        try:
+            self._perform_backup(is_auto=True, urgent=True)
+            if self.server_process is not None:
+                self.log_message("伺服器已在備份期間啟動，略過")
+                return
+            self.log_message("啟動前備份已完成，繼續啟動伺服器...")
+            self._launch_server_process(server_exe)
+        except Exception as e:
+            error = e
+            self.call_later(0, lambda: self._on_server_start_failed(error))
+    
+    def _launch_server_process(self, server_exe):
+        """
+        啟動伺服器進程並開始監看（可在任何執行緒呼叫）
+        
+        Args:
+            server_exe: 伺服器執行檔路徑
+        """
+        # 啟動伺服器進程
+        # Windows 隱藏命令提示字元視窗；Linux 以原生執行檔啟動並載入目錄內的函式庫
+        self.server_process = subprocess.Popen(
+            [str(server_exe)],
+            cwd=str(self.server_dir),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            **server_popen_options(self.server_dir)
+        )
+        
+        # 重新啟動後已載入最新設定，不再需要為設定變更重啟
+        self.settings_restart_pending = False
+        
+        # 記錄啟動並監看進程結束（崩潰偵測）
+        self.supervisor.record_start(is_auto_restart=self.crash_restart_pending)
+        self.crash_restart_pending = False
+        
+        # 啟動輸出讀取執行緒（監看執行緒在進程結束後等待它讀完剩餘輸出）
+        output_thread = threading.Thread(target=self.read_server_output, daemon=True)
+        output_thread.start()
+        threading.Thread(target=self._watch_server_process, args=(self.server_process, output_thread),
+                         daemon=True).start()
+        
+        # 開始資源取樣
+        if self.config["resource_monitor_enabled"]:
+            self.resource_sampler.start(self.server_process.pid, self.config["resource_sample_interval"])
+        
+        self.call_later(0, self.update_toggle_button)
+        self.call_later(0, self._update_command_entry_state)
+        
+        # 啟動後同步難度顯示（延遲執行，確保伺服器已初始化）
+        self.call_later(5000, self.sync_difficulty_after_restart)
+        
+        # 注意：狀態將由 parse_server_output 檢測到 "Server started" 時更新
+    
+    def _on_server_start_failed(self, error):
+        """啟動失敗：顯示錯誤並恢復介面狀態"""
+        self.show_error("錯誤", f"啟動失敗: {str(error)}")
+        self.server_operation_in_progress = False
+        self._enable_server_operation_buttons()
+        self.update_status("關閉", "red")
+        self.update_toggle_button()
+    
+    def _startup_backup_needed(self):
+        """檢查是否需要在啟動前執行備份
+        如果上次備份時間已超過設定週期，則需立即執行備份（忽略提前通知）
+        
+        Returns:
+            bool: 是否需要備份
+        """
+        if not self.config["auto_backup_enabled"]:
+            return False
+        
+        if not self.last_auto_backup_time:
+            # 如果從未執行過自動備份，執行一次
+            self.log_message("從未執行自動備份，執行首次備份...")
+            return True
+        
+        from datetime import datetime, timedelta
+        
+        now = datetime.now()
+        freq_type = self.config["backup_frequency_type"]
+        time_since_last = now - self.last_auto_backup_time
+        
+        needs_backup = False
+        
+        if freq_type == "hours":
+            hours = self.config["backup_frequency_value"]
+            if time_since_last >= timedelta(hours=hours):
+                self.log_message(f"上次備份距今已超過 {hours} 小時，啟動前執行備份...")
+                needs_backup = True
+        
+        elif freq_type == "daily":
+            if time_since_last >= timedelta(days=1):
+                self.log_message("上次備份距今已超過 1 天，啟動前執行備份...")
+                needs_backup = True
+        
+        elif freq_type == "weekly":
+            if time_since_last >= timedelta(weeks=1):
+                self.log_message("上次備份距今已超過 1 週，啟動前執行備份...")
+                needs_backup = True
+        
+        elif freq_type == "monthly":
+            # 粗略計算，30天為一個月
+            if time_since_last >= timedelta(days=30):
+                self.log_message("上次備份距今已超過 1 個月，啟動前執行備份...")
+                needs_backup = True
+        
+        return needs_backup
+    
+    def _do_stop_server(self):
+        """
+        實際執行關閉伺服器操作
+        
+        功能:
+            - 發送 stop 命令到伺服器
+            - 等待進程結束
+            - 清理資源
+            - 更新 UI 狀態
+        
+        用途:
+            內部方法，執行實際的關閉流程
+        """
+        if self.server_process is None:
+            return
+        
+        try:
+            # 設置操作進行中狀態
+            self.server_operation_in_progress = True
+            self.call_later(0, self._disable_server_operation_buttons)
+            
+            self.call_later(0, lambda: self.update_status("關閉", "yellow"))
+            self.log_message("正在關閉伺服器...")
+            
+            # 標記為預期結束（避免被誤判為崩潰）
+            self.expected_exit_process = self.server_process
+            
+            # 發送stop命令
+            self.server_process.stdin.write("stop\n")
+            self.server_process.stdin.flush()
+            
+            # 等待進程結束
+            self.server_process.wait(timeout=30)
+            self.server_process = None
+            
+            # 清空在線玩家列表
+            self.online_players_names.clear()
+            self.call_later(0, self.update_players_management_display)
+            self.call_later(0, self.update_player_count)
+            
+            self.call_later(0, self.update_toggle_button)
+            self.call_later(0, self._update_command_entry_state)
+            # 注意：狀態和按鈕將由 parse_server_output 檢測到 "Quit correctly" 時更新
+            
+        except Exception as e:
+            # 強制終止
+            if self.server_process:
+                force_stop_process(self.server_process)
+                self.server_process = None
+            
+            # 清空在線玩家列表
+            self.online_players_names.clear()
+            self.call_later(0, self.update_players_management_display)
+            self.call_later(0, self.update_player_count)
+            
+            self.server_operation_in_progress = False
+            self.call_later(0, self._enable_server_operation_buttons)
+            self.call_later(0, lambda: self.update_status("關閉", "red"))
+            self.call_later(0, self.update_toggle_button)
+            self.call_later(0, self._update_command_entry_state)
+            self.log_message(f"伺服器已強制關閉: {str(e)}")
+    
+    def _do_restart_server(self):
+        """實際執行重啟操作"""
+        try:
+            self.log_message("重新啟動伺服器...")
+            # 調用內部關閉方法（不帶確認框）
+            self._do_stop_server()
+            time.sleep(2)
+            self.start_server()
+            # start_server() 會自動同步難度顯示
+            # 啟動完成後清除重啟標誌（延遲執行，確保 Server started 已處理）
+            self.call_later(10000, self._clear_restarting_flag)
+        except Exception as e:
+            self.log_message(f"重啟過程出錯: {str(e)}")
+            self.call_later(0, self._clear_restarting_flag)
+    
+    def _clear_restarting_flag(self):
+        """清除重啟標誌"""
+        self.is_restarting = False
+        self.log_message("重啟流程結束")
+    
+    def read_server_output(self):
+        """讀取伺服器輸出"""
+        try:
+            for line in iter(self.server_process.stdout.readline, ''):
+                if not line:
+                    break
+                
+                line = line.strip()
+                self.supervisor.record_line(line)
+                self.metrics.inc("bds_server_log_lines")
+                self.on_console_line(line)
+                self.publish_event("console", line=line)
+                
+                # 解析輸出
+                self.parse_server_output(line)
+                
+        except Exception as e:
+            self.log_message(f"讀取輸出錯誤: {str(e)}")
+    
+    def _watch_server_process(self, process, output_thread=None):
+        """
+        監看伺服器進程直到結束（執行緒）
+        
+        功能:
+            - 等待進程結束並記錄運行歷史
+            - 區分正常關閉（stop / "Quit correctly"）與崩潰
+            - 崩潰時寫入崩潰報告、重設介面狀態
+            - 依指數退避排程自動重啟，崩潰循環時停止
+        
+        Args:
+            process: 要監看的 subprocess.Popen 物件
+            output_thread: 此進程的輸出讀取執行緒
+        """
+        try:
+            exit_code = process.wait()
+        except Exception as e:
+            self.log_message(f"監看伺服器進程錯誤: {str(e)}")
+            return
+        
+        # 進程結束時輸出可能還沒讀完，先等 "Quit correctly" 等最後幾行處理完才判斷是否為崩潰
+        if output_thread is not None:
+            output_thread.join(SERVER_OUTPUT_DRAIN_TIMEOUT)
+        
+        crashed = process is not self.expected_exit_process
+        session = self.supervisor.record_exit(exit_code, crashed)
+        self.call_later(0, self.update_crash_stats_label)
+        
+        if self.resource_sampler.pid == process.pid:
+            self.resource_sampler.stop()
+            self.call_later(0, self.update_resource_display)
+        
+        if not crashed:
+            # 正常結束：若不是由關閉流程處理（例如在控制台直接輸入 stop），在此清理狀態
+            if process is self.server_process:
+                self.server_process = None
+                self.online_players_names.clear()
+                self.call_later(0, self.update_players_management_display)
+                self.call_later(0, self.update_player_count)
+                self.call_later(0, self.update_toggle_button)
+                self.call_later(0, self._update_command_entry_state)
+            return
+        
+        if process is not self.server_process:
+            return
+        
+        # 崩潰：伺服器非預期結束
+        self.log_message(f"偵測到伺服器非預期結束（結束代碼: {exit_code}，運行 {session['uptime_seconds']} 秒）")
+        self.publish_event("crash", exit_code=exit_code, uptime_seconds=session['uptime_seconds'])
+        self.server_process = None
+        self.server_operation_in_progress = False
+        self.is_restarting = False
+        self.online_players_names.clear()
+        self.call_later(0, self.update_players_management_display)
+        self.call_later(0, self.update_player_count)
+        self.call_later(0, lambda: self.update_status("關閉", "red"))
+        self.call_later(0, self.update_toggle_button)
+        self.call_later(0, self._update_command_entry_state)
+        self.call_later(0, self._enable_server_operation_buttons)
+        
+        try:
+            report_file = self.supervisor.write_crash_report(session, self.server_version)
+            self.log_message(f"已寫入崩潰報告: {report_file.name}")
+        except Exception as e:
+            self.log_message(f"寫入崩潰報告失敗: {str(e)}")
+        
+        if not self.config["crash_auto_restart_enabled"]:
+            return
+        
+        delay = self.supervisor.next_restart_delay(self.config["crash_restart_max_attempts"])
+        if delay is None:
+            self.log_message("伺服器短時間內連續崩潰，已停止自動重啟")
+            self.call_later(0, lambda: self.show_error(
+                "伺服器崩潰",
+                "伺服器在短時間內連續崩潰，已停止自動重啟。\n\n"
+                "請查看 data/crash_reports 中的崩潰報告。"
+            ))
+            return
+        
+        self.log_message(f"將於 {delay} 秒後自動重啟伺服器（連續崩潰 {self.supervisor.consecutive_crashes} 次）")
+        self.crash_restart_pending = True
+        self.call_later(delay * 1000, self._restart_after_crash)
+    
+    def _restart_after_crash(self):
+        """崩潰後的自動重啟（若期間已手動啟動或正在更新則略過）"""
+        if not self.crash_restart_pending:
+            return
+        if self.server_process is not None or self.update_in_progress:
+            self.crash_restart_pending = False
+            return
+        self.log_message("崩潰後自動重啟伺服器...")
+        self.start_server()
+    
+    def parse_server_output(self, line):
+        """解析伺服器輸出"""
+        # 檢測伺服器狀態變化
+        if "Starting Server" in line:
+            # 伺服器開始啟動
+            self.server_operation_in_progress = True
+            self.call_later(0, self._disable_server_operation_buttons)
+            self.call_later(0, lambda: self.update_status("啟動", "yellow"))
+        
+        elif any(marker in line for marker in SERVER_STARTED_MARKERS):
+            # 伺服器啟動完成
+            self.server_operation_in_progress = False
+            self.is_restarting = False  # 清除重啟標誌
+            self.call_later(0, self._enable_server_operation_buttons)
+            self.call_later(0, self._update_command_entry_state)
+            self.call_later(0, lambda: self.update_status("運行", "green"))
+            self.log_message("已啟動伺服器")
+        
+        elif "Stopping server" in line or "Stopping Server" in line:
+            # 伺服器開始關閉
+            self.server_operation_in_progress = True
+            self.call_later(0, self._disable_server_operation_buttons)
+            self.call_later(0, lambda: self.update_status("關閉", "yellow"))
+        
+        elif "Quit correctly" in line:
+            # 伺服器正確退出（標記為預期結束）
+            self.expected_exit_process = self.server_process
+            if not self.is_restarting:
+                # 如果不是重啟過程，則結束操作狀態
+                self.server_operation_in_progress = False
+                self.call_later(0, self._enable_server_operation_buttons)
+                self.call_later(0, self._update_command_entry_state)
+                self.call_later(0, lambda: self.update_status("關閉", "red"))
+                self.log_message("已關閉伺服器")
+            else:
+                # 重啟過程中，保持操作狀態，保持黃色燈號
+                self.call_later(0, lambda: self.update_status("重啟", "yellow"))
+        
+        # 檢測版本 - 格式: [2025-10-12 21:48:08:511 INFO] Version: 1.21.113.1
+        if "Version:" in line or "Version :" in line:
+            import re
+            # 匹配版本號格式 (例如: 1.21.113.1)
+            version_pattern = r'Version[:\s]+(\d+\.\d+\.\d+\.\d+)'
+            match = re.search(version_pattern, line)
+            if match:
+                self.server_version = match.group(1)
+                self.call_later(0, self.update_version_display)
+                self.log_message(f"伺服器版本: {self.server_version}")
+        
+        # 檢測玩家加入/離開
+        if "Player connected" in line or "Player disconnected" in line:
+            
+            # 提取玩家資訊 - 格式: Player connected: PlayerName, xuid: 1234567890
+            if "Player connected" in line:
+                try:
+                    import re
+                    # 提取玩家名稱
+                    name_match = re.search(r'Player connected:\s*([^,]+)', line)
+                    # 提取 XUID
+                    xuid_match = re.search(r'xuid:\s*(\d+)', line, re.IGNORECASE)
+                    
+                    if name_match and xuid_match:
+                        name = name_match.group(1).strip()
+                        xuid = xuid_match.group(1).strip()
+                        
+                        # 獲取當前時間
+                        from datetime import datetime
+                        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        
+                        # 添加到在線玩家列表（確保添加成功）
+                        if name not in self.online_players_names:
+                            self.online_players_names.append(name)
+                        self.publish_event("player", action="join", name=name, xuid=xuid)
+                        
+                        with self.player_access_lock:
+                            player_exists = False
+                            for player in self.player_list:
+                                if player.get("xuid") == xuid:
+                                    player["last_online"] = current_time
+                                    player_exists = True
+                                    break
+                        
+                            if not player_exists:
+                                self.player_list.append({
+                                    "name": name,
+                                    "xuid": xuid,
+                                    "last_online": current_time
+                                })
+                                self.log_message(f"新玩家加入: {name} (XUID: {xuid})")
+                                self.auto_add_to_allowlist(name, xuid)
+                        
+                            self.save_player_list()
+                        self.update_player_count()
+                        self.update_players_management_display()
+                except Exception as e:
+                    self.log_message(f"解析玩家資訊失敗: {str(e)}")
+            
+            # 玩家離開
+            if "Player disconnected" in line:
+                try:
+                    import re
+                    name_match = re.search(r'Player disconnected:\s*([^,]+)', line)
+                    if name_match:
+                        name = name_match.group(1).strip()
+                        self.log_message(f"玩家離開: {name}")
+                        self.publish_event("player", action="leave", name=name)
+                        
+                        if name in self.online_players_names:
+                            self.online_players_names.remove(name)
+                            self.update_player_count()
+                            self.update_players_management_display()
+                        
+                        # 玩家全部離線時喚醒延後中的維護
+                        if not self.online_players_names:
+                            self.wake_deferred_maintenance()
+                except Exception as e:
+                    # 忽略解析錯誤，記錄並繼續處理其他訊息
+                    self.log_message(f"解析玩家離開訊息失敗: {str(e)}")
+            
+            self.update_player_count()
+        
+        # 檢測玩家 spawned（完全進入遊戲）
+        if "Player Spawned" in line or "spawned" in line.lower():
+            try:
+                import re
+                # 嘗試多種格式匹配玩家名稱
+                # 格式可能是: "Player Spawned: PlayerName" 或 "PlayerName spawned"
+                name_match = re.search(r'(?:Player Spawned:\s*|spawned:\s*)([^,\s]+)', line, re.IGNORECASE)
+                if not name_match:
+                    # 嘗試另一種格式: "PlayerName spawned"
+                    name_match = re.search(r'([^\s]+)\s+spawned', line, re.IGNORECASE)
+                
+                if name_match:
+                    name = name_match.group(1).strip()
+                    
+                    # 檢查是否在更新通知期間，如果是則立即發送通知
+                    if self.update_notification_active and self.update_countdown:
+                        threading.Thread(
+                            target=self.send_immediate_update_notification,
+                            args=(name,),
+                            daemon=True
+                        ).start()
+            except Exception as e:
+                self.log_message(f"解析 spawned 訊息失敗: {str(e)}")
+    
+    def auto_add_to_allowlist(self, name, xuid):
+        """
+        自動添加玩家到白名單
+        
+        玩家已在線上，不需送出命令；已有的白名單與權限項目保持不變，只補上缺少的項目
+        """
+        try:
+            self.apply_player_access(
+                {xuid: {"name": name, "allowlisted": True, "permission": "member"}},
+                live=False,
+                keep_existing=True
+            )
+        except Exception as e:
+            self.log_message(f"自動添加白名單失敗: {str(e)}")
+    
+    def apply_player_access(self, desired, live=True, keep_existing=False):
+        """
+        依差異套用玩家白名單與權限
+        
+        功能:
+            - 與目前的 allowlist.json / permissions.json 比對，只處理有變更的玩家
+              （不在 desired 中的既有項目保持不變）
+            - 有變更的檔案各以原子寫入一次寫完，沒有變更時不寫檔
+            - 伺服器運行中時以一批命令即時套用，不需重啟：
+              白名單檔寫入後一次 allowlist reload、在線玩家的 op/deop，最後 permission reload
+        
+        Args:
+            desired: {xuid: {"name": 名稱, "allowlisted": 是否在白名單, "permission": 權限}}
+                     （allowlisted / permission 為 None 時該項目保持不變）
+            live: 伺服器運行中時是否送出命令即時套用
+            keep_existing: 只補上缺少的項目，不移除白名單也不修改已有的權限
+        
+        Returns:
+            dict: {"allowlist_added": [名稱], "allowlist_removed": [名稱], "permission_changed": [名稱]}
+        """
+        with self.player_access_lock:
+            return self._apply_player_access(desired, live, keep_existing)
+    
+    def _apply_player_access(self, desired, live, keep_existing):
+        """apply_player_access 的實作（需持有 player_access_lock，檔案的讀取到寫入不會被其他執行緒插入）"""
+        allowlist_file = self.server_dir / "allowlist.json"
+        permissions_file = self.server_dir / "permissions.json"
+        allowlist = self.load_json_file(allowlist_file, [])
+        permissions = self.load_json_file(permissions_file, [])
+            
+        # 建立索引：白名單以 XUID 對應，沒有 XUID 的項目（以 allowlist add 加入的）以小寫名稱對應
+        allowlist_index = {}
+        for index, entry in enumerate(allowlist):
+            key = entry.get("xuid") or entry.get("name", "").lower()
+            allowlist_index.setdefault(key, index)
+        permissions_index = {entry.get("xuid"): index for index, entry in enumerate(permissions)}
+        
+        added, removed, permission_changed = [], [], []
+        ops, deops = [], []
+        remove_indexes = set()
+        for xuid, player in desired.items():
+            name = player.get("name", "")
+            
+            # 白名單
+            index = allowlist_index.get(xuid)
+            if index is None and name:
+                index = allowlist_index.get(name.lower())
+            allowlisted = player.get("allowlisted")
+            if allowlisted:
+                if index is None:
+                    allowlist.append({
+                        "ignoresPlayerLimit": False,
+                        "name": name,
+                        "xuid": xuid
+                    })
+                    allowlist_index[xuid] = len(allowlist) - 1
+                    added.append(name)
+            elif allowlisted is not None and index is not None and not keep_existing and index not in remove_indexes:
+                remove_indexes.add(index)
+                removed.append(allowlist[index].get("name") or name)
+            
+            # 權限
+            permission = player.get("permission")
+            if not permission:
+                continue
+            index = permissions_index.get(xuid)
+            old_permission = permissions[index].get("permission") if index is not None else None
+            if old_permission == permission or (keep_existing and index is not None):
+                continue
+            if index is None:
+                permissions.append({
+                    "permission": permission,
+                    "xuid": xuid
+                })
+                permissions_index[xuid] = len(permissions) - 1
+            else:
+                permissions[index]["permission"] = permission
+            permission_changed.append(name or xuid)
+            
+            # 在線玩家的管理員身分以 op/deop 立即生效
+            if name in self.online_players_names and (permission == "operator") != (old_permission == "operator"):
+                (ops if permission == "operator" else deops).append(name)
+        
+        # 每個檔案最多寫入一次
+        if added or removed:
+            allowlist = [entry for index, entry in enumerate(allowlist) if index not in remove_indexes]
+            self.save_json_file(allowlist_file, allowlist)
+        if permission_changed:
+            self.save_json_file(permissions_file, permissions)
+        self._cache_player_access(allowlist, permissions)
+                
+        if live and self.server_process is not None:
+            commands = []
+            if added or removed:
+                # 白名單檔已寫入，重新載入即可；逐筆 add/remove 會讓伺服器再各自改寫一次檔案
+                commands.append("allowlist reload")
+            commands += [f'op "{name}"' for name in ops]
+            commands += [f'deop "{name}"' for name in deops]
+            if permission_changed:
+                commands.append("permission reload")
+            if commands:
+                self.send_server_commands(commands)
+        
+        if added or removed or permission_changed:
+            self.log_message(
+                f"玩家權限變更: 白名單新增 {len(added)}、移除 {len(removed)}，權限變更 {len(permission_changed)}"
+            )
+        return {
+            "allowlist_added": added,
+            "allowlist_removed": removed,
+            "permission_changed": permission_changed,
+        }
+    
+    def iter_player_access(self):
+        """
+        逐筆產生玩家的名稱、XUID、權限與白名單狀態（匯出用）
+        
+        以 player_list 為主，再補上只出現在 allowlist.json / permissions.json 的玩家
+        
+        Yields:
+            dict: {"name", "xuid", "permission", "allowlisted"}
+        """
+        allowlist = self.load_json_file(self.server_dir / "allowlist.json", [])
+        permissions = self.load_json_file(self.server_dir / "permissions.json", [])
+        allowlist_names = {entry["xuid"]: entry.get("name", "") for entry in allowlist if entry.get("xuid")}
+        permission_of = {entry["xuid"]: entry.get("permission") for entry in permissions if entry.get("xuid")}
+        
+        seen = set()
+        for player in self.player_list:
+            xuid = player.get("xuid")
+            if not xuid or xuid in seen:
+                continue
+            seen.add(xuid)
+            yield {
+                "name": player.get("name", ""),
+                "xuid": xuid,
+                "permission": permission_of.get(xuid),
+                "allowlisted": xuid in allowlist_names,
+            }
+        
+        for xuid in itertools.chain(allowlist_names, permission_of):
+            if xuid in seen:
+                continue
+            seen.add(xuid)
+            yield {
+                "name": allowlist_names.get(xuid, ""),
+                "xuid": xuid,
+                "permission": permission_of.get(xuid),
+                "allowlisted": xuid in allowlist_names,
+            }
+    
+    def export_players(self, path):
+        """
+        匯出玩家名單（CSV / JSON Lines，逐筆寫出）
+        
+        Args:
+            path: 輸出檔案路徑（.csv 為 CSV，其餘為 JSON Lines）
+        
+        Returns:
+            int: 匯出的玩家數
+        """
+        count = write_player_records(path, self.iter_player_access())
+        self.log_message(f"已匯出 {count} 位玩家: {path}")
+        return count
+    
+    def import_players(self, path, dry_run=False):
+        """
+        批次匯入玩家名單
+        
+        功能:
+            - 串流讀取 CSV / JSON Lines，不一次載入整個檔案
+            - 以 XUID 對照 player_list 去重：新玩家加入列表，已存在的玩家只更新權限與白名單
+            - 回報衝突：檔案內 XUID 重複且內容不同、名稱與既有玩家不符、名稱已屬於其他 XUID
+            - 所有變更匯總後交給 apply_player_access，白名單與權限檔各原子寫入一次
+        
+        Args:
+            path: 檔案路徑（.csv 為 CSV，其餘視為 JSON Lines）
+            dry_run: 只分析不寫入（匯入前預覽）
+        
+        Returns:
+            dict: 匯入報告（rows/players/new_players/duplicates/conflicts/errors 計數、
+                  samples 衝突與錯誤範例、applied 實際套用的變更數）
+        """
+        with self.player_access_lock:
+            players_by_xuid = {player["xuid"]: player for player in self.player_list if player.get("xuid")}
+        xuid_by_name = {player["name"].lower(): player["xuid"]
+                        for player in players_by_xuid.values() if player.get("name")}
+        report = {"rows": 0, "players": 0, "new_players": 0, "duplicates": 0,
+                  "conflicts": 0, "errors": 0, "samples": [], "applied": None}
+        desired = {}
+        new_players = []
+        
+        def note(kind, line_no, message):
+            report[kind] += 1
+            if len(report["samples"]) < PLAYER_IMPORT_REPORT_LIMIT:
+                report["samples"].append(f"第 {line_no} 行: {message}")
+        
+        for line_no, record, error in iter_player_records(path):
+            report["rows"] += 1
+            if error:
+                note("errors", line_no, error)
+                continue
+            
+            xuid = record["xuid"]
+            name = record["name"]
+            
+            # 檔案內重複的 XUID：保留第一筆
+            if xuid in desired:
+                previous = desired[xuid]
+                if ((name and name.lower() != previous["name"].lower())
+                        or record["permission"] != previous["permission"]
+                        or record["allowlisted"] != previous["allowlisted"]):
+                    note("conflicts", line_no, f"XUID {xuid} 重複且內容不同，保留第一筆")
+                else:
+                    report["duplicates"] += 1
+                continue
+            
+            existing = players_by_xuid.get(xuid)
+            if existing is not None:
+                if name and existing.get("name") and name.lower() != existing["name"].lower():
+                    note("conflicts", line_no, f"XUID {xuid} 的名稱 {name} 與既有玩家 {existing['name']} 不符，保留既有名稱")
+                name = existing.get("name") or name
+            else:
+                if not name:
+                    note("errors", line_no, f"新玩家 XUID {xuid} 缺少名稱")
+                    continue
+                owner = xuid_by_name.get(name.lower())
+                if owner is not None:
+                    note("conflicts", line_no, f"名稱 {name} 已屬於 XUID {owner}，略過")
+                    continue
+                xuid_by_name[name.lower()] = xuid
+                new_players.append({"name": name, "xuid": xuid})
+            
+            desired[xuid] = {
+                "name": name,
+                "permission": record["permission"],
+                "allowlisted": record["allowlisted"],
+            }
+        
+        report["players"] = len(desired)
+        report["new_players"] = len(new_players)
+        if dry_run or not desired:
+            return report
+        
+        # 玩家列表與白名單/權限檔各寫入一次（持鎖期間其他執行緒不會修改玩家列表或權限檔）
+        with self.player_access_lock:
+            # 分析期間可能已有玩家加入伺服器，略過已在列表中的 XUID
+            known_xuids = {player.get("xuid") for player in self.player_list}
+            new_players = [player for player in new_players if player["xuid"] not in known_xuids]
+            report["new_players"] = len(new_players)
+            if new_players:
+                self.player_list.extend(new_players)
+                self.save_player_list()
+            self.backup_server_settings()
+            result = self.apply_player_access(desired)
+        report["applied"] = {key: len(value) for key, value in result.items()}
+        
+        self.log_message(
+            f"已匯入玩家名單 {path}: {report['players']} 位玩家（新增 {report['new_players']}），"
+            f"重複 {report['duplicates']}、衝突 {report['conflicts']}、錯誤 {report['errors']}"
+        )
+        self.call_later(0, self.update_players_management_display)
+        return report
+    
+    def change_difficulty(self, difficulty):
+        """修改遊戲難度"""
+        if self.server_process is not None:
+            command = f"difficulty {difficulty}"
+            try:
+                self.server_process.stdin.write(command + "\n")
+                self.server_process.stdin.flush()
+                self.log_message(f"難度已更改為: {difficulty}")
+            except Exception as e:
+                self.log_message(f"更改難度失敗: {str(e)}")
+        else:
+            self.log_message(f"伺服器未運行，難度選擇僅顯示，不會生效")
+    
+    def save_server_properties_file(self):
+        """
+        單獨儲存 server.properties 檔案（不重啟伺服器）
+        
+        只改寫值有變更的設定行，註解、空行與順序保持不變；沒有變更時不寫入
+        
+        Returns:
+            bool: 是否有寫入
+        """
+        try:
+            self.server_properties_doc.update(self.server_properties)
+            if self.server_properties_doc.save():
+                self.file_watcher.sync(self.server_properties_doc.path)
+                return True
+        except Exception as e:
+            self.log_message(f"儲存設定檔失敗: {str(e)}")
+        return False
+    
+    def _report_new_property_defaults(self, release_dir):
+        """
+        比較新版本附帶的 server.properties 與目前的設定（server.properties 更新時保留不動）
+        
+        記錄新版本新增的設定（以預設值運作）與已不再附帶的設定
+        
+        Args:
+            release_dir: 新版本的版本資料夾
+        """
+        upstream = ServerProperties.load(Path(release_dir) / "server.properties")
+        if not upstream.exists or not self.server_properties_doc.exists:
+            return
+        diff = self.server_properties_doc.diff(upstream)
+        if diff["added"]:
+            self.log_message("新版本新增的設定（未寫入目前設定，以預設值運作）: "
+                             + ", ".join(f"{key}={upstream.get(key)}" for key in diff["added"]))
+        if diff["removed"]:
+            self.log_message(f"新版本未附帶的設定: {', '.join(diff['removed'])}")
+    
+    def apply_server_settings(self, new_properties):
+        """
+        儲存並套用伺服器設定（能即時套用的設定以命令套用，不重新啟動）
+        
+        功能:
+            - 只處理值有變更的設定，沒有變更時不寫入檔案
+            - 備份舊設定並寫入 server.properties
+            - 伺服器運行中時，可即時套用的設定（難度、預設遊戲模式、白名單開關）立即以命令套用
+            - 回報需要重新啟動才會生效的設定，由呼叫端決定立即重啟或等待維護時段
+        
+        Args:
+            new_properties: 設定值 dict（key -> value）
+        
+        Returns:
+            dict: {"changed": 變更的設定, "live": 已即時套用的設定, "restart": 需重啟才生效的設定}
+        """
+        changed = {key: str(value) for key, value in new_properties.items()
+                   if self.server_properties.get(key) != str(value)}
+        result = {"changed": list(changed), "live": [], "restart": []}
+        if not changed:
+            return result
+        
+        self.backup_server_settings()
+        self.server_properties.update(changed)
+        self.save_server_properties_file()
+        self.log_message(f"已儲存伺服器設定: {', '.join(f'{key}={value}' for key, value in changed.items())}")
+        
+        if self.server_process is None:
+            # 伺服器未運行，下次啟動時載入
+            return result
+        
+        for key, value in changed.items():
+            if key in LIVE_PROPERTY_COMMANDS and self.send_server_command(LIVE_PROPERTY_COMMANDS[key](value)):
+                result["live"].append(key)
+            else:
+                result["restart"].append(key)
+        if result["live"]:
+            self.log_message(f"已即時套用: {', '.join(result['live'])}")
+        if result["restart"]:
+            self.log_message(f"下列設定需要重新啟動才會生效: {', '.join(result['restart'])}")
+        return result
+    
+    def schedule_settings_restart(self):
+        """
+        為設定變更安排重啟（經由維護時段：無玩家在線時立即重啟，否則延後，到達期限時倒數重啟）
+        
+        期間伺服器因其他原因重新啟動時，設定已生效，不再重啟
+        """
+        if self.settings_restart_pending:
+            self.log_message("已安排設定變更的重啟，等待維護時段")
+            return
+        self.settings_restart_pending = True
+        self.log_message("已安排於維護時段重新啟動以套用設定")
+        
+        def restart_if_pending(notify_minutes):
+            if self.settings_restart_pending:
+                self.perform_restart_with_notification(notify_minutes)
+        
+        threading.Thread(
+            target=self.run_maintenance_window,
+            args=("重啟", restart_if_pending, self.config["restart_notify_minutes"]),
+            daemon=True
+        ).start()
+    
+    # ========================================================================
+    # 備份與更新執行方法
+    # ========================================================================
+    
+    def _async_cleanup_after_cancel(self):
+        """異步清理：等待下載線程結束後清理（不阻塞UI）"""
+        try:
+            # 在背景線程中等待下載線程結束（使用短超時循環，最多3秒）
+            max_wait_time = 3.0
+            wait_interval = 0.1
+            elapsed = 0.0
+            
+            if self.update_download_thread and self.update_download_thread.is_alive():
+                while elapsed < max_wait_time and self.update_download_thread.is_alive():
+                    time.sleep(wait_interval)
+                    elapsed += wait_interval
+                
+                if self.update_download_thread.is_alive():
+                    # 下載線程仍在運行，但會在下一個chunk檢查時自動停止
+                    self.log_message("下載線程仍在運行，等待其自動停止...")
+            
+            # 延遲一下再清理，確保下載線程已釋放文件
+            time.sleep(0.5)
+            
+            # 清理臨時檔案
+            self._cleanup_update_temp_files()
+            
+            # 恢復按鈕狀態（必須在主線程執行）
+            self.call_later(0, self._reset_update_buttons)
+            
+            # 通知用戶清理完成
+            self.call_later(0, lambda: self.log_message("清理完成"))
+        except Exception as e:
+            self.log_message(f"異步清理時發生錯誤: {str(e)}")
+    
+    def _cleanup_update_temp_files(self):
+        """清理更新臨時檔案"""
+        try:
+            if hasattr(self, '_downloaded_zip') and self._downloaded_zip:
+                if self._downloaded_zip.exists() and not self.shared.download_cache.contains(self._downloaded_zip):
+                    self._downloaded_zip.unlink()
+                    self.log_message(f"已刪除臨時檔案: {self._downloaded_zip.name}")
+                delattr(self, '_downloaded_zip')
+            
+            # 取消時刪除倒數期間預先準備的暫存資料夾
+            staged = getattr(self, '_staged_update', None)
+            if staged:
+                self._staged_update = None
+                staged[1].cleanup()
+        except Exception as e:
+            self.log_message(f"清理臨時檔案時發生錯誤: {str(e)}")
+    
+    def _perform_backup(self, is_auto=False, urgent=None):
+        """
+        執行備份（經由工作協調器排隊）
+        
+        Args:
+            is_auto: 是否為自動備份
+            urgent: 是否優先執行（預設手動備份優先；啟動前備份會阻擋伺服器啟動，也應優先）
+        """
+        if urgent is None:
+            urgent = not is_auto
+        self.run_heavy_job("backup", self._run_backup, is_auto, urgent=urgent)
+    
+    def _run_backup(self, is_auto=False):
+        """執行備份"""
+        backup_start_time = None
+        backup_file = None
+        backup_success = False
+        
+        try:
+            # 僅在自動備份時禁用操作按鈕（手動備份已在外層處理）
+            if is_auto:
+                self.call_later(0, self._disable_operation_buttons)
+            
+            # 記錄開始時間
+            from datetime import datetime
+            backup_start_time = datetime.now()
+            
+            self.log_message("開始備份世界...")
+            self.update_status("備份", "yellow")
+            
+                       
+            # 暫停伺服器自動儲存
+            if self.server_process:
+                self.server_process.stdin.write("save hold\n")
+                self.server_process.stdin.flush()
+                time.sleep(2)
+            
+            # 壓縮worlds資料夾
+            worlds_dir = self.server_dir / "worlds"
+            if not worlds_dir.exists():
+                self.log_message("找不到worlds資料夾")
+                return
+            
+            timestamp = backup_start_time.strftime("%Y%m%d_%H%M%S")
+            # 根據是否為自動備份選擇不同的資料夾
+            backup_folder = "worlds_auto" if is_auto else "worlds_manual"
+            backup_file = self.backup_dir / backup_folder / f"world_backup_{timestamp}.zip"
+            
+            # 確保備份資料夾存在
+            backup_file.parent.mkdir(parents=True, exist_ok=True)
+            
+            with zipfile.ZipFile(backup_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for root, dirs, files in os.walk(worlds_dir):
+                    for file in files:
+                        file_path = Path(root) / file
+                        arcname = file_path.relative_to(worlds_dir.parent)
+                        zipf.write(file_path, arcname)
+            
+            # 恢復自動儲存
+            if self.server_process:
+               
+                self.server_process.stdin.write("save resume\n")
+                self.server_process.stdin.flush()
+            
+            # 計算耗時和備份大小
+            backup_end_time = datetime.now()
+            elapsed_time = backup_end_time - backup_start_time
+            backup_size_bytes = backup_file.stat().st_size
+            backup_size_mb = backup_size_bytes / (1024 * 1024)
+            
+            backup_success = True
+            backup_type = "auto" if is_auto else "manual"
+            self.metrics.inc("bds_backups", type=backup_type, result="success")
+            self.metrics.observe("bds_backup_duration_seconds", elapsed_time.total_seconds(), type=backup_type)
+            self.metrics.observe("bds_backup_size_bytes", backup_size_bytes, type=backup_type)
+            self.publish_event("backup", result="success", backup_type=backup_type, name=backup_file.name,
+                               size_bytes=backup_size_bytes, duration_seconds=round(elapsed_time.total_seconds(), 1))
+            
+            # 更新備份時間
+            if is_auto:
+                self.last_auto_backup_time = backup_start_time
+                self.update_last_auto_backup_label()
+                # 自動備份後，同步更新自動更新檢查時間
+                if hasattr(self, 'last_auto_update_check_time'):
+                    self.last_auto_update_check_time = backup_start_time
+                    self.log_message("已同步自動更新檢查時間與備份時間")
+            else:
+                self.last_manual_backup_time = backup_start_time
+                self.update_last_manual_backup_label()
+            
+            # 保存備份時間到文件
+            self.save_backup_times()
+            
+            self.log_message(f"備份完成: {backup_file.name}")
+            self.update_status("運行", "green")
+            
+            # 清理舊備份
+            self.cleanup_old_backups()
+            
+            # 更新容量進度條
+            self.update_backup_capacity_bar()
+            
+            # 只在手動備份時顯示備份完成回報窗口
+            if not is_auto:
+                self.call_later(100, lambda: self.show_backup_result(
+                    backup_start_time,
+                    elapsed_time,
+                    backup_size_mb,
+                    backup_file.name,
+                    success=True
+                ))
+            
+            # 重新啟用操作按鈕
+            self.call_later(0, self._enable_operation_buttons)
+            
+        except Exception as e:
+            self.log_message(f"備份失敗: {str(e)}")
+            self.metrics.inc("bds_backups", type="auto" if is_auto else "manual", result="failed")
+            self.publish_event("backup", result="failed", backup_type="auto" if is_auto else "manual", error=str(e))
+            if self.server_process:
+                self.server_process.stdin.write("save resume\n")
+                self.server_process.stdin.flush()
+            self.update_status("運行", "green")
+            
+            # 只在手動備份時顯示備份失敗回報窗口
+            if not is_auto:
+                self.call_later(100, lambda: self.show_error(
+                    "備份失敗",
+                    f"備份過程中發生錯誤：\n\n{str(e)}"
+                ))
+            
+            # 重新啟用操作按鈕
+            self.call_later(0, self._enable_operation_buttons)
+    
+    def cleanup_old_backups(self):
+        """清理舊備份（只清理自動備份資料夾，手動備份不受容量限制）"""
+        try:
+            max_size_gb = float(self.config["backup_max_size_gb"])
+            max_size_bytes = max_size_gb * 1024 * 1024 * 1024
+        
+            # 只清理自動備份資料夾，手動備份永久保留
+            backup_folder = self.backup_dir / "worlds_auto"
+            if not backup_folder.exists():
+                self.update_backup_capacity_bar()
+                return
+            
+            backups = sorted(backup_folder.glob("*.zip"), key=lambda x: x.stat().st_mtime)
+            
+            # 計算該資料夾的總大小
+            folder_total_size = sum(f.stat().st_size for f in backups)
+            
+            # 只在超過容量時清理自動備份
+            while folder_total_size > max_size_bytes and backups:
+                old_backup = backups.pop(0)
+                folder_total_size -= old_backup.stat().st_size
+                old_backup.unlink()
+                self.log_message(f"已刪除舊備份: {old_backup.name} (自動備份)")
+            
+            # 更新容量進度條
+            self.update_backup_capacity_bar()
+                
+        except Exception as e:
+            self.log_message(f"清理備份失敗: {str(e)}")
+    
+    def _auto_download_and_install_server(self):
+        """自動下載並安裝伺服器（在找不到伺服器執行檔時使用）"""
+        try:
+            self.log_message("=" * 60)
+            self.log_message("開始自動下載並安裝 Bedrock Server...")
+            self.log_message("=" * 60)
+            
+            # 步驟 1: 獲取下載連結
+            self.log_message("步驟 1/3: 獲取最新版本下載連結...")
+            
+            version, download_url = self.shared.manifest.latest_release()
+            self.log_message(f"最新版本：{version}")
+            self.log_message(f"下載連結：{download_url}")
+            self.log_message("-" * 60)
+            
+            # 步驟 2: 下載伺服器檔案（共用下載快取中已有此版本時略過下載）
+            self.log_message("步驟 2/3: 下載伺服器檔案...")
+            
+            temp_zip = self._download_server_zip(version, download_url)
+            self.log_message("-" * 60)
+            
+            # 步驟 3: 解壓縮為版本資料夾並安裝到 server_files（與更新相同流程，之後可回滾）
+            self.log_message("步驟 3/3: 安裝伺服器檔案...")
+            
+            self.server_dir.mkdir(parents=True, exist_ok=True)
+            delta = self._stage_update(version, temp_zip)
+            delta.apply(version)
+            delta.finish(version)
+            self.versions.activate(version, self.config["installed_versions_keep"])
+            
+            self.log_message("伺服器檔案已解壓縮完成")
+            
+            self.log_message("-" * 60)
+            self.log_message("✓ 伺服器安裝完成！")
+            self.log_message(f"版本：{version}")
+            self.log_message("=" * 60)
+            
+            # 更新伺服器版本資訊
+            self.server_version = version
+            self.call_later(0, self.update_version_display)
+            
+            # 重新讀取 server.properties（安裝後會生成）
+            self.load_server_properties()
+            self.log_message("已重新載入伺服器配置檔案")
+            
+            # 通知介面重新建立設定頁面以顯示新載入的配置
+            self.call_later(0, self.on_server_installed)
+
+            # 提示使用者並詢問是否立即啟動
+            self.call_later(100, lambda: self._prompt_start_after_install())
+            
+        except Exception as e:
+            self.log_message("=" * 60)
+            self.log_message(f"✗ 自動安裝失敗: {str(e)}")
+            self.log_message("=" * 60)
+            self.show_error("安裝失敗", f"自動安裝伺服器失敗: {str(e)}\n\n請手動從官網下載：\nhttps://www.minecraft.net/download/server/bedrock")
+    
+    def _prompt_start_after_install(self):
+        """安裝完成後詢問是否啟動伺服器"""
+        result = self.ask_yes_no(
+            "安裝完成",
+            "Bedrock Server 安裝完成！\n\n是否立即啟動伺服器？"
+        )
+        if result:
+            self.start_server()
+    
+    def auto_check_update_on_startup(self):
+        """啟動時自動檢查更新（靜默模式，只在有新版本時彈窗）"""
+        threading.Thread(target=lambda: self._check_update(is_auto=True), daemon=True).start()
+    
+    def check_update(self):
+        """檢查伺服器更新"""
+        threading.Thread(target=self._check_update, daemon=True).start()
+    
+    def _check_update(self, is_auto=False, silent=False):
+        """檢查更新（執行緒）- 使用官方 API
+        
+        Args:
+            is_auto: 是否為自動檢查（影響按鈕禁用和提示框顯示）
+            silent: 是否為靜默模式（不顯示提示框，僅獲取下載連結）
+        
+        Returns:
+            bool: 是否成功取得最新版本資訊
+        """
+        try:
+            # 僅在手動檢查且非靜默模式時禁用操作按鈕
+            if not is_auto and not silent:
+                self.call_later(0, self._disable_operation_buttons)
+            
+            self.log_message("正在檢查更新...")
+            
+            # 使用官方 API（共用清單快取）：排程檢查在有效期內直接使用快取，
+            # 手動檢查一律向伺服器驗證（未變更時只需 304 回應）
+            latest_version, download_url = self.shared.manifest.latest_release(
+                max_age=None if is_auto else 0
+            )
+            if self.shared.manifest.last_source == "cache":
+                self.log_message("使用快取的下載清單")
+            
+            # 更新介面
+            self.call_later(0, lambda: self.update_latest_version_display(latest_version))
+            
+            # 儲存下載資訊
+            self.download_url = download_url
+            self.latest_version = latest_version
+            
+            # 比較版本並記錄
+            self.has_new_version = False  # 預設沒有新版本
+            
+            if self.server_version == "未知":
+                self.log_message(f"已是最新版本: {latest_version}（當前版本未知，無法比較）")
+                
+                # 只在手動模式且非靜默模式下顯示回報窗口
+                if not is_auto and not silent:
+                    self.call_later(100, lambda: self.show_info(
+                        "檢查更新",
+                        f"目前版本：未知\n"
+                        f"最新版本：{latest_version}\n\n"
+                        f"無法比較版本，建議檢查伺服器是否正常運行。"
+                    ))
+            else:
+                # 使用版本比較函數
+                comparison = self._compare_versions(latest_version, self.server_version)
+                
+                if comparison > 0:
+                    # 最新版本較新
+                    self.has_new_version = True
+                    self.log_message(f"找到最新版本: {latest_version}")
+                    
+                    # 只在手動模式且非靜默模式下詢問是否立即更新
+                    if not is_auto and not silent:
+                        self.call_later(100, lambda: self.ask_for_immediate_update(latest_version))
+                elif comparison == 0:
+                    # 版本相同
+                    self.log_message(f"已是最新版本: {latest_version}")
+                    
+                    # 只在手動模式且非靜默模式下顯示已是最新版本的回報窗口
+                    if not is_auto and not silent:
+                        self.call_later(100, lambda: self.show_update_check_result(
+                            self.server_version, 
+                            latest_version, 
+                            is_latest=True
+                        ))
+                else:
+                    # 最新版本較舊（不應該發生，但以防萬一）
+                    self.log_message(f"已是最新版本: {self.server_version}（檢測版本: {latest_version}）")
+                    
+                    # 只在手動模式且非靜默模式下顯示回報窗口
+                    if not is_auto and not silent:
+                        self.call_later(100, lambda: self.show_update_check_result(
+                            self.server_version, 
+                            latest_version, 
+                            is_latest=True
+                        ))
+        
+            return True
+        
+        except Exception as e:
+            self.log_message(f"檢查更新錯誤: {str(e)}")
+            # 只在錯誤時記錄下載連結
+            if hasattr(self, 'download_url') and self.download_url:
+                self.log_message(f"下載連結：{self.download_url}")
+            self.call_later(0, lambda: self.update_latest_version_display("檢查失敗"))
+            
+            # 只在手動模式且非靜默模式下顯示錯誤回報窗口
+            if not is_auto and not silent:
+                self.call_later(100, lambda: self.show_error(
+                    "檢查更新失敗",
+                    f"檢查更新時發生錯誤：\n\n{str(e)}"
+                ))
+            return False
+        finally:
+            # 僅在手動檢查且非靜默模式時重新啟用操作按鈕
+            if not is_auto and not silent:
+                self.call_later(0, self._enable_operation_buttons)
+    
+    def _download_update_file(self, version=None, url=None):
+        """
+        下載更新檔案（可獨立執行）
+        
+        Args:
+            version: 目標版本（None 則為最新版本）
+            url: 下載網址（None 則為最新版本的網址；版本庫已有該版本時不需要）
+        
+        Returns:
+            Path: 安裝檔路徑（失敗或取消時返回 None）
+        """
+        try:
+            if version is None:
+                if not hasattr(self, 'download_url') or not hasattr(self, 'latest_version'):
+                    self.log_message("錯誤：缺少下載資訊")
+                    return None
+                version, url = self.latest_version, self.download_url
+            
+            self.log_message(f"正在下載版本 {version} 中...")
+            return self._download_server_zip(
+                version,
+                url,
+                should_cancel=lambda: self.update_cancel_requested
+            )
+        
+        except DownloadCancelled:
+            self.log_message("下載已取消（已下載的部分保留，下次從中斷處續傳）")
+            return None
+        except Exception as e:
+            self.log_message(f"下載失敗: {str(e)}")
+            return None
+    
+    def _download_server_zip(self, version, url, should_cancel=None):
+        """
+        取得指定版本的 BDS 安裝檔（優先使用共用下載快取，否則可續傳下載）
+            
+        Args:
+            version: 版本號
+            url: 下載網址
+            should_cancel: 返回 True 時中止下載的函數
+            
+        Returns:
+            Path: 快取中的安裝檔路徑
+            
+        Raises:
+            DownloadCancelled: 使用者取消
+            Exception: 下載或驗證失敗
+        """
+        cache = self.shared.download_cache
+        with cache.lock_for(version):
+            cached_zip = cache.get(version)
+            if cached_zip:
+                self.log_message(f"使用版本庫中的版本 {version}")
+                return cached_zip
+            if not url:
+                raise Exception(f"版本庫中沒有版本 {version}，且無法取得下載連結")
+            
+            self._last_progress = -1
+            download_start = time.monotonic()
+            start_bytes = [None]
+                    
+            def on_progress(downloaded, total, delta):
+                if start_bytes[0] is None:
+                    start_bytes[0] = downloaded - delta
+                self.metrics.inc("bds_update_download_bytes", delta)
+                if total > 0:
+                    percent = int((downloaded / total) * 100)
+                    # 只在每個新的整數倍20%時顯示一次進度
+                    if percent % 20 == 0 and percent != self._last_progress:
+                        self.log_message(f"下載進度：{percent}%")
+                        self._last_progress = percent
+            
+            downloader = ResumableDownloader(
+                headers={'User-Agent': HTTP_USER_AGENT},
+                log=self.log_message
+            )
+            path, sha256 = downloader.download(url, cache.path_for(version), should_cancel, on_progress)
+            
+            # 下載速度只計算本次傳輸的位元組（不含續傳前已有的部分）
+            transferred = path.stat().st_size - (start_bytes[0] or 0)
+            download_elapsed = max(time.monotonic() - download_start, 1e-6)
+            self.metrics.set("bds_update_download_bytes_per_second", round(transferred / download_elapsed, 1))
+            self.log_message(f"下載完成並通過驗證：{path.name}（SHA-256 {sha256[:12]}…）")
+            path = cache.store(version, path, sha256)
+            self.call_later(0, self.update_release_cache_display)
+            return path
+    
+    def _perform_update(self, urgent=True, version=None):
+        """
+        執行更新（經由工作協調器排隊）
+        
+        Args:
+            urgent: 是否為手動觸發（自動更新為 False，依排程錯開）
+            version: 指定安裝的版本（None 則為最新版本；用於從版本庫重裝或回滾）
+        """
+        self.run_heavy_job("update", self._run_update, version, urgent=urgent)
+    
+    def install_release(self, version):
+        """
+        安裝指定版本（重裝或回滾到版本庫中的舊版，阻塞直到完成）
+        
+        版本庫中沒有該版本時，依最新版本的下載連結推算該版本的網址下載
+        
+        Args:
+            version: 版本號
+        
+        Returns:
+            bool: 是否已開始安裝（更新進行中時返回 False）
+        """
+        if self.update_in_progress or self.update_notification_active:
+            self.log_message("更新進行中，無法安裝其他版本")
+            return False
+        self.update_cancel_requested = False
+        self.update_in_progress = True
+        self.call_later(0, self._disable_operation_buttons)
+        self.call_later(0, self._lock_update_button)
+        self._perform_update(urgent=True, version=version)
+        return True
+    
+    def recover_interrupted_update(self):
+        """
+        檢查更新日誌，處理上次在檔案替換途中中斷的更新（需在啟動伺服器前執行）
+        
+        Returns:
+            str: "rolled_back" / "rolled_forward"，沒有中斷的更新時返回 None
+        """
+        try:
+            return DeltaUpdate.recover(self.app_dir / "update_journal.json", log=self.log_message)
+        except Exception as e:
+            self.log_message(f"處理中斷的更新失敗: {str(e)}（請檢查 server_files 與 server_old）")
+            return None
+    
+    def rollback_release(self):
+        """
+        回滾到上一個使用的版本（版本資料夾已存在，不需下載與解壓縮，阻塞直到完成）
+        
+        Returns:
+            bool: 是否已開始回滾（沒有可回滾的版本或更新進行中時返回 False）
+        """
+        previous = self.versions.previous()
+        if previous is None:
+            self.log_message("沒有可回滾的版本")
+            return False
+        self.log_message(f"回滾至上一個版本 {previous}")
+        return self.install_release(previous)
+    
+    def _capture_installed_version(self):
+        """升級前的安裝沒有版本資料夾時，依安裝檔案清單從目前的伺服器檔案建立（供回滾）"""
+        try:
+            with open(self.app_dir / "installed_release.json", 'r', encoding='utf-8') as f:
+                installed = json.load(f)
+        except (OSError, ValueError):
+            return
+        version = installed.get("version")
+        if not version or self.versions.has(version):
+            return
+        self.versions.capture(version, self.server_dir, installed.get("files", {}))
+        self.versions.activate(version, self.config["installed_versions_keep"])
+        self.log_message(f"已將目前安裝的版本 {version} 保存至 versions/{version}（供回滾）")
+    
+    def _release_url(self, version):
+        """由最新版本的下載連結推算指定版本的下載網址（無法推算時返回 None）"""
+        download_url = getattr(self, 'download_url', None)
+        if not download_url:
+            return None
+        return release_url_for(download_url, version)
+    
+    def _run_update(self, version=None):
+        """
+        執行更新（執行緒）- 優化版本
+        
+        Args:
+            version: 指定安裝的版本（None 則為最新版本）
+        """
+        try:
+            # 注意：按鈕禁用已在調用前處理，這裡不需要重複調用
+            
+            if version is None and (not hasattr(self, 'download_url') or not hasattr(self, 'latest_version')):
+                self.log_message("錯誤：缺少下載資訊")
+                # 缺少資訊時重新啟用按鈕
+                self.update_in_progress = False
+                self.call_later(0, self._reset_update_buttons)
+                return
+            
+            # 指定版本時不使用通知階段預先下載與準備的最新版本
+            staged_version, delta = getattr(self, '_staged_update', None) or (None, None)
+            self._staged_update = None
+            if version is None:
+                version = self.latest_version
+                temp_zip = getattr(self, '_downloaded_zip', None)
+            else:
+                temp_zip = None
+            if delta is not None and (staged_version != version or not delta.staging_dir.exists()):
+                delta = None
+            
+            self.log_message("=" * 60)
+            self.log_message(f"進行伺服器更新，目標版本：{version}")
+            self.log_message("=" * 60)
+            
+            # 步驟 1/5: 下載更新檔（如果還沒下載；版本庫已有時直接使用）
+            if delta is not None:
+                self.log_message("使用倒數期間預先準備的新版本")
+            elif self.versions.has(version):
+                self.log_message(f"使用已安裝的版本資料夾 versions/{version}")
+            elif not temp_zip or not temp_zip.exists():
+                temp_zip = self._download_update_file(version, self._release_url(version))
+                if not temp_zip:
+                    # 檢查是否為取消操作
+                    if self.update_cancel_requested:
+                        # 取消時不記錄為失敗，靜默返回
+                        return
+                    else:
+                        raise Exception("下載失敗")
+            else:
+                self.log_message("使用已下載的版本更新")
+            
+            self.log_message("-" * 60)
+            
+            # 步驟 2/5: 驗證並解壓縮到暫存資料夾、比對差異（伺服器仍在運行；倒數期間已完成時略過）
+            
+            if delta is None:
+                delta = self._stage_update(version, temp_zip)
+                self.log_message("-" * 60)
+            self._active_delta = delta
+            change_count = len(delta.added) + len(delta.changed) + len(delta.removed)
+            
+            # 步驟 3/5: 關閉伺服器（沒有任何檔案變更時不需要關閉）
+            
+            was_running = self.server_process is not None
+            downtime_start = time.monotonic()
+            if change_count and self.server_process:
+                self._do_stop_server()
+                time.sleep(1)   # 等待系統釋放執行檔的檔案鎖定
+                self.log_message("已關閉伺服器，開始更新")
+                self.log_message("-" * 60)
+            
+            # 步驟 4/5: 替換變更的檔案（舊檔案移到 server_old）
+            
+            if change_count:
+                self.log_message(f"正在安裝版本 {version} 中...")
+                delta.apply(version)
+                self.log_message("新版本安裝完成（被替換的舊檔案已保存至 server_old）")
+            else:
+                self.log_message("所有檔案皆未變更，不需要替換")
+            self.log_message("-" * 60)
+            
+            # 步驟 5/5: 記錄安裝檔案清單並清理暫存資料夾（版本庫中的安裝檔保留給其他實例與日後回滾）
+            
+            self.log_message("清理暫存檔...")
+            try:
+                delta.finish(version)
+                self._active_delta = None
+                removed = self.versions.activate(version, self.config["installed_versions_keep"])
+                if removed:
+                    self.log_message(f"已刪除超過保留數量的版本資料夾: {', '.join(removed)}")
+                # 清除下載標記
+                if hasattr(self, '_downloaded_zip'):
+                    delattr(self, '_downloaded_zip')
+                self.log_message("暫存檔已清理")
+            except Exception as e:
+                self.log_message(f"清理暫存檔時發生錯誤: {str(e)}")
+            
+            self.log_message("-" * 60)
+            self.log_message(f"伺服器已更新至版本：{version}")
+            self.log_message("=" * 60)
+            
+            # 重新啟動伺服器（沒有變更且伺服器仍在運行時不需要重啟；釋放工作名額後才啟動）
+            if change_count or not was_running:
+                def restart_after_update():
+                    self.log_message("正在重新啟動伺服器...")
+                    pending = self.start_server()
+                    if pending is not None:
+                        pending.result()    # 已在工作執行緒，等待啟動前備份與啟動完成
+                    if change_count and was_running:
+                        self.log_message(f"更新停機時間：{time.monotonic() - downtime_start:.1f} 秒")
+                
+                self.after_heavy_job(restart_after_update)
+            
+            # 更新當前版本
+            self.server_version = version
+            self.call_later(0, self.update_version_display)
+            self.publish_event("update", result="success", version=version)
+            
+            # 重置更新狀態
+            self.update_in_progress = False
+            self.update_cancel_requested = False
+            
+            # 重新啟用操作按鈕
+            self.call_later(0, self._reset_update_buttons)
+            
+        except Exception as e:
+            self.log_message("=" * 60)
+            self.log_message(f"✗ 更新失敗: {str(e)}")
+            self.log_message("=" * 60)
+            self.publish_event("update", result="failed", error=str(e))
+            self.show_error("錯誤", f"更新失敗: {str(e)}\n\n已替換的檔案已還原，被替換的舊檔案保存在 server_old。")
+            
+            # 差異更新失敗時已自動還原被替換的檔案，這裡只清理暫存資料夾
+            delta = getattr(self, '_active_delta', None)
+            if delta is not None:
+                try:
+                    delta.cleanup()
+                except Exception as restore_error:
+                    self.log_message(f"清理暫存資料夾失敗: {str(restore_error)}")
+                self._active_delta = None
+            
+            # 嘗試啟動伺服器（釋放工作名額後才啟動）
+            if self.server_process is None:
+                def restart_after_failure():
+                    try:
+                        time.sleep(2)
+                        self.start_server()
+                    except Exception as e:
+                        self.log_message(f"自動重啟伺服器失敗: {str(e)}")
+                
+                self.after_heavy_job(restart_after_failure)
+            
+            # 重置更新狀態
+            self.update_in_progress = False
+            self.update_cancel_requested = False
+            
+            # 重新啟用操作按鈕
+            self.call_later(0, self._reset_update_buttons)
+    
+    def _cancel_pending_update(self):
+        """
+        取消通知階段中的更新
+        
+        功能:
+            - 設置取消標誌並立即中止倒數
+            - 停止並行下載並清理暫存檔
+            - 恢復更新相關按鈕
+        
+        Returns:
+            bool: 是否已取消（更新已進入執行階段時返回 False）
+        """
+        if self.update_in_progress:
+            return False
+        
+        # 設置取消標誌並立即中止倒數
+        self.update_cancel_requested = True
+        self.update_notification_active = False
+        if self.update_countdown:
+            self.update_countdown.cancel()
+            self.update_countdown = None
+        
+        self.log_message("用戶取消了更新")
+        
+        # 不等待下載線程，讓它自己清理
+        # 啟動一個異步清理線程來處理
+        if self.update_download_thread and self.update_download_thread.is_alive():
+            self.log_message("正在停止下載...")
+            threading.Thread(target=self._async_cleanup_after_cancel, daemon=True).start()
+        else:
+            # 如果沒有下載線程或已結束，直接清理
+            self._cleanup_update_temp_files()
+            self.call_later(0, self._reset_update_buttons)
+        return True
+    
+    def send_server_command(self, command):
+        """
+        發送命令到伺服器
+        
+        Args:
+            command: 伺服器命令
+        
+        Returns:
+            bool: 是否發送成功
+        """
+        if self.server_process is None:
+            return False
+        try:
+            self.server_process.stdin.write(command + "\n")
+            self.server_process.stdin.flush()
+            self.log_message(f"已發送命令: {command}")
+            return True
+        except Exception as e:
+            self.log_message(f"發送命令失敗: {str(e)}")
+            return False
+    
+    def send_server_commands(self, commands):
+        """
+        一次發送多個命令到伺服器（全部寫入後只 flush 一次）
+        
+        Args:
+            commands: 伺服器命令列表
+        
+        Returns:
+            bool: 是否發送成功
+        """
+        if self.server_process is None or not commands:
+            return False
+        try:
+            for command in commands:
+                self.server_process.stdin.write(command + "\n")
+            self.server_process.stdin.flush()
+            preview = "; ".join(commands[:5]) + (" ..." if len(commands) > 5 else "")
+            self.log_message(f"已發送 {len(commands)} 個命令: {preview}")
+            return True
+        except Exception as e:
+            self.log_message(f"發送命令失敗: {str(e)}")
+            return False
+    
+    def status_snapshot(self):
+        """
+        取得伺服器狀態摘要（控制 API 使用）
+        
+        Returns:
+            dict: 狀態、版本、在線玩家、運行時間與進行中的操作
+        """
+        return {
+            "status": SERVER_STATUS_NAMES.get(self.server_status, self.server_status),
+            "running": self.server_process is not None,
+            "version": self.server_version,
+            "latest_version": getattr(self, "latest_version", None),
+            "players": list(self.online_players_names),
+            "max_players": self.max_players,
+            "uptime_seconds": round(self.supervisor.uptime_seconds(), 1) if self.server_process is not None else 0,
+            "operation_in_progress": self.server_operation_in_progress,
+            "update_notification_active": self.update_notification_active,
+            "update_in_progress": self.update_in_progress,
+            "host_jobs": self.shared.jobs.snapshot(),
+            "cached_releases": [release["version"] for release in self.shared.download_cache.versions()],
+            "installed_versions": [release["version"] for release in self.versions.versions()],
+            "rollback_version": self.versions.previous(),
+            "last_manual_backup": self.last_manual_backup_time.isoformat(timespec="seconds") if self.last_manual_backup_time else None,
+            "last_auto_backup": self.last_auto_backup_time.isoformat(timespec="seconds") if self.last_auto_backup_time else None,
+        }
+
+    # ========================================================================
+    # 日誌與介面回呼（無介面模式的預設實作，圖形介面覆寫）
+    # ========================================================================
+    
+    def log_message(self, message):
+        """
+        輸出日誌訊息（加上時間戳記）
+        
+        Args:
+            message: 日誌訊息內容
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {message}", flush=True)
+        self.publish_event("log", message=message)
+    
+    def on_console_line(self, line):
+        """伺服器輸出一行（無介面模式直接輸出到標準輸出）"""
+        print(line, flush=True)
+    
+    def call_later(self, delay_ms, callback):
+        """
+        延遲執行回呼
+        
+        圖形介面覆寫為 Tk 的 after，確保回呼在主執行緒執行；
+        無介面模式沒有主迴圈，延遲為 0 時直接執行，否則以計時器執行緒執行。
+        
+        Args:
+            delay_ms: 延遲毫秒數
+            callback: 回呼函數
+        """
+        if delay_ms <= 0:
+            callback()
+            return
+        timer = threading.Timer(delay_ms / 1000, callback)
+        timer.daemon = True
+        timer.start()
+    
+    def show_info(self, title, message):
+        """顯示資訊（無介面模式寫入日誌）"""
+        self.log_message(f"{title}: {message}".replace("\n", " "))
+    
+    def show_error(self, title, message):
+        """顯示錯誤（無介面模式寫入日誌）"""
+        self.log_message(f"錯誤 - {title}: {message}".replace("\n", " "))
+    
+    def show_warning(self, title, message):
+        """顯示警告（無介面模式寫入日誌）"""
+        self.log_message(f"警告 - {title}: {message}".replace("\n", " "))
+    
+    def ask_yes_no(self, title, message):
+        """詢問確認（無介面模式無人可回應，記錄後自動確認）"""
+        self.log_message(f"{title}: {message}（無介面模式自動確認）".replace("\n", " "))
+        return True
+    
+    def quit_application(self):
+        """結束程式"""
+        self.shutdown_event.set()
+    
+    def update_status(self, status, color):
+        """更新伺服器狀態"""
+        changed = status != self.server_status
+        self.server_status = status
+        if changed:
+            self.publish_event("status", status=SERVER_STATUS_NAMES.get(status, status))
+    
+    def update_toggle_button(self):
+        """介面回呼：伺服器啟動/關閉後更新切換按鈕"""
+    
+    def _update_command_entry_state(self):
+        """介面回呼：依伺服器狀態啟用/禁用命令輸入框"""
+    
+    def _disable_server_operation_buttons(self):
+        """介面回呼：伺服器操作期間禁用啟動/重啟按鈕"""
+    
+    def _enable_server_operation_buttons(self):
+        """介面回呼：伺服器操作完成後啟用啟動/重啟按鈕"""
+    
+    def _disable_operation_buttons(self):
+        """介面回呼：備份/更新期間禁用操作按鈕"""
+    
+    def _enable_operation_buttons(self):
+        """介面回呼：備份/更新完成後啟用操作按鈕"""
+    
+    def _lock_update_button(self):
+        """介面回呼：更新進入執行階段（無法再取消）"""
+    
+    def _reset_update_buttons(self):
+        """介面回呼：更新結束或取消後恢復更新按鈕"""
+    
+    def update_player_count(self):
+        """介面回呼：在線玩家數變更"""
+    
+    def update_players_management_display(self):
+        """介面回呼：玩家列表變更"""
+    
+    def update_crash_stats_label(self):
+        """介面回呼：崩潰統計變更"""
+    
+    def update_resource_display(self):
+        """介面回呼：資源取樣更新"""
+    
+    def update_version_display(self):
+        """介面回呼：伺服器版本變更"""
+    
+    def update_latest_version_display(self, text):
+        """介面回呼：最新版本檢查結果"""
+    
+    def update_release_cache_display(self):
+        """介面回呼：版本庫內容變更"""
+    
+    def update_last_manual_backup_label(self):
+        """介面回呼：手動備份時間變更"""
+    
+    def update_last_auto_backup_label(self):
+        """介面回呼：自動備份時間變更"""
+    
+    def update_backup_capacity_bar(self):
+        """介面回呼：備份容量變更"""
+    
+    def sync_difficulty_after_restart(self):
+        """啟動/重啟後確認 server.properties 是否有變更（內容有變更才重新解析）"""
+        self.file_watcher.check()
+    
+    def on_server_properties_changed(self, changed):
+        """介面回呼：server.properties 被外部修改（changed 為有變動的設定）"""
+    
+    def on_player_access_changed(self, xuids):
+        """介面回呼：白名單/權限被外部修改（xuids 為有變動的玩家）"""
+    
+    def show_backup_result(self, start_time, elapsed_time, size_mb, filename, success=True):
+        """介面回呼：手動備份完成（結果已寫入日誌）"""
+    
+    def show_update_check_result(self, current_version, latest_version, is_latest=True):
+        """介面回呼：手動檢查更新結果（結果已寫入日誌）"""
+    
+    def ask_for_immediate_update(self, latest_version):
+        """介面回呼：手動檢查發現新版本時詢問是否立即更新"""
+    
+    def on_server_installed(self):
+        """介面回呼：首次自動安裝伺服器完成"""
+    
+    # ========================================================================
+    # 無介面模式
+    # ========================================================================
+    
+    def start_services(self):
+        """處理中斷的更新，建立此實例的排程並啟動共用排程執行緒、檔案監看、指標匯出端點與控制 API"""
+        self.recover_interrupted_update()
+        self.setup_schedules()
+        self.shared.start()
+        self.file_watcher.start()
+        self.start_metrics_exporter()
+        self.start_control_api()
+    
+    def run_headless(self, auto_start=True, check_update=True):
+        """
+        以無介面模式執行（阻塞直到收到結束訊號）
+        
+        功能:
+            - 啟動排程與指標匯出
+            - 自動啟動伺服器並檢查更新
+            - 將標準輸入的每一行轉發為伺服器命令
+            - 收到 SIGINT/SIGTERM 時安全關閉伺服器後結束
+        
+        Args:
+            auto_start: 是否自動啟動伺服器
+            check_update: 是否在啟動時檢查更新
+        """
+        install_shutdown_handlers(self.shutdown_event)
+        
+        self.log_message(f"BDS Console 無介面模式啟動（資料目錄: {self.base_dir}）")
+        self.start_services()
+        if auto_start:
+            self.start_server()
+        if check_update:
+            self.auto_check_update_on_startup()
+        
+        if sys.stdin is not None:
+            threading.Thread(target=self._forward_stdin_commands, daemon=True).start()
+        
+        # 以逾時等待，讓主執行緒能及時處理訊號
+        while not self.shutdown_event.wait(1):
+            pass
+        
+        self.shutdown()
+    
+    def _forward_stdin_commands(self):
+        """將標準輸入的每一行轉發為伺服器命令（執行緒）"""
+        for line in sys.stdin:
+            command = line.strip()
+            if not command:
+                continue
+            if self.server_process is None:
+                self.log_message("伺服器未運行，忽略命令")
+                continue
+            self.send_server_command(command)
+    
+    def shutdown(self):
+        """安全關閉：中止倒數、關閉伺服器、停止背景服務"""
+        self.log_message("正在結束 BDS Console...")
+        self.crash_restart_pending = False
+        for countdown in (self.update_countdown, self.restart_countdown, self.maintenance_timer):
+            if countdown:
+                countdown.cancel()
+        if self.server_process is not None:
+            self._do_stop_server()
+        self.resource_sampler.stop()
+        self.file_watcher.stop()
+        self.flush_settings()
+        self.metrics_exporter.stop()
+        self.api_server.stop()
+        # 清除此實例的排程，避免關閉後仍被共用排程器觸發
+        self.shared.scheduler.clear(self.schedule_tag)
+
+
+# ============================================================================
+# 多實例管理
+# ============================================================================
+
+class ManagedInstance(BDSCore):
+    """
+    由 InstanceManager 管理的伺服器實例
+    
+    功能:
+        - 日誌與伺服器輸出加上實例名稱前綴
+        - 可指定輸出目標（圖形介面將其導向記錄區）
+    """
+    
+    def __init__(self, base_dir, shared, name, log_sink=None):
+        """
+        初始化實例
+        
+        Args:
+            base_dir: 實例資料根目錄
+            shared: 共用服務 SharedServices
+            name: 實例名稱
+            log_sink: 日誌輸出函數 (name, message)，None 則輸出到標準輸出
+        """
+        self.log_sink = log_sink
+        super().__init__(base_dir=base_dir, shared=shared, name=name)
+    
+    def log_message(self, message):
+        """輸出日誌訊息（加上實例名稱）"""
+        if self.log_sink is not None:
+            self.log_sink(self.instance_name, message)
+        else:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            print(f"[{timestamp}] [{self.instance_name}] {message}", flush=True)
+        self.publish_event("log", message=message)
+    
+    def on_console_line(self, line):
+        """伺服器輸出一行（有輸出函數時只記錄日誌，不轉送每一行輸出）"""
+        if self.log_sink is None:
+            print(f"[{self.instance_name}] {line}", flush=True)
+
+
+class InstanceManager:
+    """
+    多實例管理器
+    
+    功能:
+        - 從 data/instances.json 載入實例清單
+        - 建立共用服務（排程器、倒數計時、下載快取、工作執行緒池）並注入各實例
+        - 批次啟動、關閉實例，依名稱轉發命令
+    
+    instances.json 格式:
+        {
+            "instances": [
+                {"name": "survival", "base_dir": "instances/survival", "enabled": true}
+            ],
+            "worker_pool_size": 8,
+            "max_concurrent_jobs": 1,
+            "job_stagger_seconds": 30,
+            "release_cache_max_gb": 2
+        }
+        base_dir 為相對於根目錄的路徑（也可使用絕對路徑）；
+        各實例的排隊優先順序由該實例 config.json 的 job_priority 設定
+    """
+    
+    def __init__(self, root_dir, shared=None, log_sink=None):
+        """
+        初始化多實例管理器
+        
+        Args:
+            root_dir: 根目錄（instances.json 位於 root_dir/data）
+            shared: 既有的共用服務（圖形介面傳入主實例的服務），None 則自行建立
+            log_sink: 實例日誌輸出函數 (name, message)
+        """
+        self.root_dir = Path(root_dir)
+        self.instances_file = self.root_dir / "data" / "instances.json"
+        self.shutdown_event = threading.Event()
+        self.instances = {}
+        
+        entries, settings = self._load_instances_file()
+        if shared is None:
+            # 每個實例（含圖形介面的主實例）預留兩個工作執行緒，維護時段等待期間不會佔滿執行緒池
+            pool_size = settings.get("worker_pool_size") or max(WORKER_POOL_SIZE, (len(entries) + 1) * 2)
+            shared = SharedServices(
+                self.root_dir / "data" / "cache",
+                max_workers=pool_size,
+                max_concurrent_jobs=settings.get("max_concurrent_jobs", MAX_CONCURRENT_JOBS),
+                job_stagger_seconds=settings.get("job_stagger_seconds", JOB_STAGGER_SECONDS),
+                release_cache_max_gb=settings.get("release_cache_max_gb", RELEASE_CACHE_MAX_GB)
+            )
+        self.shared = shared
+        
+        for entry in entries:
+            name = entry["name"]
+            base_dir = Path(entry.get("base_dir") or Path("instances") / name)
+            if not base_dir.is_absolute():
+                base_dir = self.root_dir / base_dir
+            self.instances[name] = ManagedInstance(base_dir, shared, name, log_sink)
+    
+    def _load_instances_file(self):
+        """
+        讀取 instances.json
+        
+        Returns:
+            tuple: (啟用的實例設定列表, 主機層級設定 dict)
+        """
+        if not self.instances_file.exists():
+            return [], {}
+        try:
+            with open(self.instances_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"讀取實例設定失敗: {str(e)}")
+            return [], {}
+        
+        entries = []
+        names = set()
+        for entry in data.get("instances", []):
+            name = str(entry.get("name", "")).strip()
+            if not name or name in names or not entry.get("enabled", True):
+                continue
+            names.add(name)
+            entries.append(entry)
+        return entries, data
+    
+    def get(self, name):
+        """依名稱取得實例（不存在時返回 None）"""
+        return self.instances.get(name)
+    
+    def running_count(self):
+        """伺服器運行中的實例數"""
+        return sum(1 for instance in self.instances.values() if instance.server_process is not None)
+    
+    def start_all(self, auto_start=True, check_update=True):
+        """
+        啟動所有實例的排程與服務
+        
+        Args:
+            auto_start: 是否啟動各實例的伺服器
+            check_update: 是否在啟動時檢查更新
+        """
+        for instance in self.instances.values():
+            instance.start_services()
+            if auto_start:
+                self.shared.executor.submit(instance.start_server)
+            if check_update:
+                instance.auto_check_update_on_startup()
+    
+    def shutdown_all(self):
+        """同時關閉所有實例（各實例的關閉流程並行執行）"""
+        threads = [threading.Thread(target=instance.shutdown, daemon=True) for instance in self.instances.values()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+    
+    def run_headless(self, auto_start=True, check_update=True):
+        """
+        以無介面模式執行所有實例（阻塞直到收到結束訊號）
+        
+        標準輸入格式為「實例名稱: 命令」，例如 survival: list
+        
+        Args:
+            auto_start: 是否自動啟動伺服器
+            check_update: 是否在啟動時檢查更新
+        """
+        install_shutdown_handlers(self.shutdown_event)
+        
+        if not self.instances:
+            print(f"找不到任何實例，請建立 {self.instances_file}", flush=True)
+            return
+        
+        print(f"BDS Console 多實例模式啟動: {', '.join(self.instances)}", flush=True)
+        self.start_all(auto_start, check_update)
+        
+        if sys.stdin is not None:
+            threading.Thread(target=self._forward_stdin_commands, daemon=True).start()
+        
+        # 以逾時等待，讓主執行緒能及時處理訊號
+        while not self.shutdown_event.wait(1):
+            pass
+        
+        self.shutdown_all()
+        self.shared.shutdown()
+    
+    def _forward_stdin_commands(self):
+        """將標準輸入的「實例名稱: 命令」轉發到對應實例（執行緒）"""
+        for line in sys.stdin:
+            name, sep, command = line.strip().partition(":")
+            command = command.strip()
+            if not sep or not command:
+                continue
+            instance = self.get(name.strip())
+            if instance is None:
+                print(f"找不到實例: {name.strip()}", flush=True)
+                continue
+            if instance.server_process is None:
+                instance.log_message("伺服器未運行，忽略命令")
+                continue
+            instance.send_server_command(command)
+
+
+# ============================================================================
+# 無介面模式入口
+# ============================================================================
+
+def install_shutdown_handlers(shutdown_event):
+    """
+    註冊結束訊號處理（SIGINT/SIGTERM，Windows 另含 SIGBREAK）
+    
+    Args:
+        shutdown_event: 收到訊號時設定的 threading.Event
+    """
+    for sig_name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        if hasattr(signal, sig_name):
+            signal.signal(getattr(signal, sig_name), lambda signum, frame: shutdown_event.set())
+
+
+def main(argv=None):
+    """
+    無介面模式命令列入口
+    
+    Args:
+        argv: 命令列參數（None 則使用 sys.argv）
+    """
+    parser = argparse.ArgumentParser(description="BDS Console 無介面模式（daemon/服務）")
+    parser.add_argument("--base-dir", help="資料根目錄（預設為程式所在目錄）")
+    parser.add_argument("--no-start", action="store_true", help="啟動時不自動啟動伺服器")
+    parser.add_argument("--no-update-check", action="store_true", help="啟動時不檢查更新")
+    parser.add_argument("--instances", action="store_true",
+                        help="依 data/instances.json 同時管理多個伺服器實例")
+    args = parser.parse_args(argv)
+    
+    if args.instances:
+        manager = InstanceManager(args.base_dir or default_base_dir())
+        manager.run_headless(auto_start=not args.no_start, check_update=not args.no_update_check)
+        return
+    
+    core = BDSCore(base_dir=args.base_dir)
+    core.run_headless(auto_start=not args.no_start, check_update=not args.no_update_check)
+
+
+if __name__ == "__main__":
+    main()